@@ -42,6 +42,7 @@ export default function StockDetailPage({ params }: { params: Promise<{ ticker:
 
   const {
     historicalData,
+    fullHistoricalData,
     financialData,
     peerCompanies,
     valuationScore,
@@ -49,7 +50,8 @@ export default function StockDetailPage({ params }: { params: Promise<{ ticker:
     error,
   } = useStockDetailData(ticker, timeframe);
 
-  const currentPrice = historicalData.length > 0 ? historicalData[historicalData.length - 1].close : undefined;
+  // Prices come from the daily bars; the 5y chart series is decimated
+  const currentPrice = fullHistoricalData.length > 0 ? fullHistoricalData[fullHistoricalData.length - 1].close : undefined;
 
   if (loading) {
     return (
@@ -92,7 +94,7 @@ export default function StockDetailPage({ params }: { params: Promise<{ ticker:
       <StockHeader
         ticker={ticker}
         financialData={financialData}
-        historicalData={historicalData}
+        historicalData={fullHistoricalData}
         valuationScore={valuationScore}
       />
 
@@ -2,7 +2,7 @@
 
 import { useState, useEffect, useCallback, useMemo } from 'react';
 import portfolioService, { Portfolio, PortfolioHolding } from '@/services/portfolioService';
-import stockService, { StockFinancialData, StockHistoricalData } from '@/services/stockService';
+import stockService, { StockFinancialData, StockHistoricalData, StockQuote } from '@/services/stockService';
 
 export type Timeframe = '1m' | '3m' | '6m' | '1y' | '5y';
 
@@ -24,6 +24,7 @@ interface HoldingWithData {
   holding: PortfolioHolding;
   financialData: StockFinancialData | null;
   historicalData: StockHistoricalData[];
+  quote: StockQuote | null;
 }
 
 const DISPLAY_DAYS: Record<Timeframe, number> = {
@@ -76,23 +77,30 @@ export function usePortfolioData(portfolioId: number, timeframe: Timeframe): Por
       fetchStart.setDate(fetchStart.getDate() - DISPLAY_DAYS['5y']);
       const fetchStartDate = formatDate(fetchStart);
 
-      const enriched = await Promise.all(
-        holdingsResponse.map(async (holding) => {
-          try {
-            const [financialData, historicalData] = await Promise.all([
-              stockService.getFinancialData(holding.ticker),
-              stockService.getHistoricalData(holding.ticker, fetchStartDate, endDate),
-            ]);
-            const sortedData = historicalData.sort(
-              (a, b) => new Date(a.date).getTime() - new Date(b.date).getTime()
-            );
-            return { holding, financialData, historicalData: sortedData };
-          } catch (err) {
-            console.error(`Error fetching data for ${holding.ticker}:`, err);
-            return { holding, financialData: null as StockFinancialData | null, historicalData: [] };
-          }
-        })
-      );
+      // One batch call per data type for all holdings instead of two calls per holding
+      const tickers = Array.from(new Set(holdingsResponse.map((holding) => holding.ticker.toUpperCase())));
+      const [financialBatch, historicalBatch, quoteBatch] = await Promise.all([
+        stockService.getFinancialDataBatch(tickers),
+        stockService.getHistoricalDataBatch(tickers, fetchStartDate, endDate),
+        stockService.getQuotesBatch(tickers),
+      ]);
+
+      Object.entries({ ...financialBatch.errors, ...historicalBatch.errors, ...quoteBatch.errors }).forEach(([ticker, message]) => {
+        console.error(`Error fetching data for ${ticker}:`, message);
+      });
+
+      const enriched: HoldingWithData[] = holdingsResponse.map((holding) => {
+        const ticker = holding.ticker.toUpperCase();
+        const historicalData = [...(historicalBatch.data[ticker] || [])].sort(
+          (a, b) => new Date(a.date).getTime() - new Date(b.date).getTime()
+        );
+        return {
+          holding,
+          financialData: financialBatch.data[ticker] || null,
+          historicalData,
+          quote: quoteBatch.data[ticker] || null,
+        };
+      });
 
       setHoldingsWithData(enriched);
       setPortfolioData(portfolioResponse);
@@ -123,13 +131,16 @@ export function usePortfolioData(portfolioId: number, timeframe: Timeframe): Por
     displayStart.setDate(displayStart.getDate() - DISPLAY_DAYS[timeframe]);
     const displayStartDate = formatDate(displayStart);
 
-    const currentMetrics = holdingsWithData.map(({ holding, financialData, historicalData }) => {
+    const currentMetrics = holdingsWithData.map(({ holding, financialData, historicalData, quote }) => {
       const shares = holding.shares || 0;
       const costBasis = holding.cost_basis || 0;
       const name = financialData?.name || holding.ticker;
       const sector = financialData?.sector || 'Other';
-      const currentPrice = historicalData.length > 0 ? historicalData[historicalData.length - 1].close : 0;
-      const previousClose = historicalData.length > 1 ? historicalData[historicalData.length - 2].close : currentPrice;
+      // Prefer the latest quote; fall back to the last closes of the price history
+      const lastClose = historicalData.length > 0 ? historicalData[historicalData.length - 1].close : 0;
+      const currentPrice = quote?.price ?? lastClose;
+      const previousClose = quote?.previous_close
+        ?? (historicalData.length > 1 ? historicalData[historicalData.length - 2].close : currentPrice);
       const currentValue = currentPrice * shares;
       const dailyChangePercent = previousClose > 0 ? ((currentPrice - previousClose) / previousClose) * 100 : 0;
       const changePercent = costBasis > 0 ? (currentPrice / costBasis - 1) * 100 : dailyChangePercent;
@@ -31,8 +31,14 @@ const DISPLAY_DAYS: Record<Timeframe, number> = {
 
 const formatDate = (date: Date) => date.toISOString().split('T')[0];
 
+const daysAgo = (days: number) => formatDate(new Date(Date.now() - days * 24 * 60 * 60 * 1000));
+
+// The 5y chart is decimated by the data service; a few hundred points fill its width
+const LONG_RANGE_MAX_POINTS = 500;
+
 export function useStockDetailData(ticker: string, timeframe: Timeframe): StockDetailData {
   const [fullHistoricalData, setFullHistoricalData] = useState<StockHistoricalData[]>([]);
+  const [longRangeData, setLongRangeData] = useState<StockHistoricalData[]>([]);
   const [financialData, setFinancialData] = useState<StockFinancialData | null>(null);
   const [peerCompanies, setPeerCompanies] = useState<PeerCompany[]>([]);
   const [valuationScore, setValuationScore] = useState<ValuationScore | null>(null);
@@ -46,15 +52,17 @@ export function useStockDetailData(ticker: string, timeframe: Timeframe): StockD
         setError(null);
 
         const endDate = formatDate(new Date());
-        const startDate = formatDate(new Date(Date.now() - DISPLAY_DAYS['5y'] * 24 * 60 * 60 * 1000));
 
-        const [historicalResponse, financialResponse, valuationResponse] = await Promise.all([
-          stockService.getHistoricalData(ticker, startDate, endDate),
+        // Daily bars for up to a year; the 5y view gets a decimated series instead of every bar
+        const [historicalResponse, longRangeResponse, financialResponse, valuationResponse] = await Promise.all([
+          stockService.getHistoricalData(ticker, daysAgo(DISPLAY_DAYS['1y']), endDate),
+          stockService.getHistoricalData(ticker, daysAgo(DISPLAY_DAYS['5y']), endDate, { maxPoints: LONG_RANGE_MAX_POINTS }),
           stockService.getFinancialData(ticker),
           stockService.getValuationScore(ticker),
         ]);
 
         setFullHistoricalData(historicalResponse);
+        setLongRangeData(longRangeResponse);
         setFinancialData(financialResponse);
         setValuationScore(valuationResponse);
 
@@ -85,10 +93,11 @@ export function useStockDetailData(ticker: string, timeframe: Timeframe): StockD
     const days = DISPLAY_DAYS[timeframe];
     const cutoff = new Date();
     cutoff.setDate(cutoff.getDate() - days);
-    return fullHistoricalData
+    const source = timeframe === '5y' ? longRangeData : fullHistoricalData;
+    return source
       .filter((point) => new Date(point.date) >= cutoff)
       .sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime());
-  }, [fullHistoricalData, timeframe]);
+  }, [fullHistoricalData, longRangeData, timeframe]);
 
   return {
     ticker,
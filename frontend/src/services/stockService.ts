@@ -33,6 +33,8 @@ export interface PeerCompany {
   sector: string;
   industry: string;
   market_cap: number | null;
+  pe_ratio?: number | null;
+  pb_ratio?: number | null;
 }
 
 export interface SearchResult {
@@ -62,6 +64,25 @@ export interface SearchResult {
   is_trending?: boolean;
 }
 
+export interface StockQuote {
+  ticker: string;
+  price: number | null;
+  previous_close: number | null;
+  change: number | null;
+  change_percent: number | null;
+  volume: number | null;
+  currency: string | null;
+  market_time: string | null;
+  fetched_at: string;
+  age_seconds: number;
+  stale: boolean;
+}
+
+export interface BatchResponse<T> {
+  data: Record<string, T>;
+  errors: Record<string, string>;
+}
+
 export interface ValuationScore {
   ticker: string;
   rule_name: string;
@@ -76,8 +97,13 @@ export interface StockDetails extends StockFinancialData {
   last_updated: string;
 }
 
+export interface HistoricalOptions {
+  interval?: '1d' | '1wk' | '1mo';
+  maxPoints?: number;
+}
+
 const stockService = {
-  getHistoricalData: async (ticker: string, startDate?: string, endDate?: string) => {
+  getHistoricalData: async (ticker: string, startDate?: string, endDate?: string, options: HistoricalOptions = {}) => {
     let url = `/data-service/stocks/${ticker}/historical`;
     const params: Record<string, string> = {};
     
@@ -88,6 +114,15 @@ const stockService = {
     if (endDate) {
       params.end_date = endDate;
     }
+
+    // Weekly/monthly bars and decimation are computed by the data service
+    if (options.interval) {
+      params.interval = options.interval;
+    }
+
+    if (options.maxPoints) {
+      params.max_points = String(options.maxPoints);
+    }
     
     const response = await api.get<StockHistoricalData[]>(url, { params });
     return response.data;
@@ -98,6 +133,46 @@ const stockService = {
     return response.data;
   },
 
+  getHistoricalDataBatch: async (tickers: string[], startDate?: string, endDate?: string) => {
+    const params: Record<string, string> = {};
+
+    if (startDate) {
+      params.start_date = startDate;
+    }
+
+    if (endDate) {
+      params.end_date = endDate;
+    }
+
+    const response = await api.post<BatchResponse<StockHistoricalData[]>>(
+      '/data-service/stocks/batch/historical',
+      tickers,
+      { params }
+    );
+    return response.data;
+  },
+
+  getFinancialDataBatch: async (tickers: string[]) => {
+    const response = await api.post<BatchResponse<StockFinancialData>>(
+      '/data-service/stocks/batch/financials',
+      tickers
+    );
+    return response.data;
+  },
+
+  getQuote: async (ticker: string) => {
+    const response = await api.get<StockQuote>(`/data-service/stocks/${ticker}/quote`);
+    return response.data;
+  },
+
+  getQuotesBatch: async (tickers: string[]) => {
+    const response = await api.post<BatchResponse<StockQuote>>(
+      '/data-service/stocks/batch/quotes',
+      tickers
+    );
+    return response.data;
+  },
+
   getPeerCompanies: async (industry: string) => {
     const response = await api.get<PeerCompany[]>(`/data-service/industry/${industry}/peers`);
     return response.data;
@@ -156,36 +231,25 @@ const stockService = {
 
   getStockDetails: async (ticker: string) => {
     try {
-      // First, try to get financial data which includes most details
-      const financialData = await stockService.getFinancialData(ticker);
-      
-      // For price data, we need to get the latest price from historical data
-      const historicalData = await stockService.getHistoricalData(ticker);
+      // Financial data has most details; the price comes from the latest quote
+      const [financialData, quote] = await Promise.all([
+        stockService.getFinancialData(ticker),
+        stockService.getQuote(ticker).catch((error) => {
+          console.error(`Error fetching quote for ${ticker}:`, error);
+          return null;
+        }),
+      ]);
       
-      // Get the most recent closing price and calculate change percentage
-      let currentPrice = null;
-      let changePercent = null;
-      let previousClose = null;
-      
-      if (historicalData && historicalData.length > 1) {
-        const latestData = historicalData[historicalData.length - 1];
-        const previousData = historicalData[historicalData.length - 2];
-        
-        currentPrice = latestData.close;
-        previousClose = previousData.close;
-        
-        // Calculate change percentage
-        if (previousClose > 0) {
-          changePercent = ((currentPrice - previousClose) / previousClose * 100).toFixed(2);
-        }
-      }
+      const currentPrice = quote?.price ?? null;
+      const previousClose = quote?.previous_close ?? null;
+      const changePercent = quote?.change_percent != null ? quote.change_percent.toFixed(2) : null;
       
       return {
         ...financialData,
         current_price: currentPrice,
         previous_close: previousClose,
         change_percent: changePercent,
-        last_updated: new Date().toISOString(),
+        last_updated: quote?.fetched_at ?? new Date().toISOString(),
       };
     } catch (error) {
       console.error("Error fetching stock details:", error);
@@ -0,0 +1,131 @@
+from typing import List, Dict, Any, Optional, Sequence
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Price fields in storage order; dates are kept separately
+SERIES_FIELDS = ["open", "high", "low", "close", "volume", "adjusted_close"]
+SERIES_DTYPES = {
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.int64,
+    "adjusted_close": np.float64,
+}
+
+
+class BarSeries:
+    """
+    Price bars for one ticker as parallel NumPy arrays.
+
+    dates is datetime64[D] for daily bars (datetime64[s] for intraday bars) and
+    sorted ascending; every price field is an array of the same length. Data
+    sources, the historical store and the response formatters pass bars around
+    in this form, so no Python object is created per bar until a caller asks
+    for rows.
+    """
+    __slots__ = ("dates", "open", "high", "low", "close", "volume", "adjusted_close")
+
+    def __init__(self, dates: np.ndarray, **columns: np.ndarray):
+        self.dates = dates
+        for field in SERIES_FIELDS:
+            setattr(self, field, np.asarray(columns[field], dtype=SERIES_DTYPES[field]))
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @classmethod
+    def empty(cls) -> "BarSeries":
+        return cls(np.array([], dtype="datetime64[D]"), **{field: np.array([]) for field in SERIES_FIELDS})
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "BarSeries":
+        """From a yfinance history frame (Open/High/Low/Close/Volume columns, date index)"""
+        index = frame.index
+        if getattr(index, "tz", None) is not None:
+            # Keep exchange-local wall time, which is what the session dates refer to
+            index = index.tz_localize(None)
+        values = index.values
+        intraday = len(values) and (values.astype("datetime64[D]") != values).any()
+        dates = values.astype("datetime64[s]" if intraday else "datetime64[D]")
+        close = frame["Close"].to_numpy(dtype=np.float64)
+        return cls(
+            dates,
+            open=frame["Open"].to_numpy(dtype=np.float64),
+            high=frame["High"].to_numpy(dtype=np.float64),
+            low=frame["Low"].to_numpy(dtype=np.float64),
+            close=close,
+            volume=frame["Volume"].fillna(0).to_numpy(dtype=np.int64),
+            adjusted_close=close,  # Yahoo already adjusts Close
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Dict[str, Any]]) -> "BarSeries":
+        """From a list of bar dicts with a date key"""
+        if not rows:
+            return cls.empty()
+        return cls(
+            np.array([row["date"] for row in rows], dtype="datetime64[D]"),
+            **{field: np.array([row[field] for row in rows], dtype=SERIES_DTYPES[field]) for field in SERIES_FIELDS}
+        )
+
+    @classmethod
+    def from_columns(cls, dates: Sequence[date], columns: Dict[str, Sequence[Any]]) -> "BarSeries":
+        """From parallel sequences, e.g. the columns of a database query (None becomes NaN, or 0 volume)"""
+        arrays = {field: np.array(columns[field], dtype=np.float64) for field in SERIES_FIELDS}
+        arrays["volume"] = np.nan_to_num(arrays["volume"]).astype(np.int64)
+        return cls(np.array(dates, dtype="datetime64[D]"), **arrays)
+
+    @classmethod
+    def concat(cls, parts: Sequence["BarSeries"]) -> "BarSeries":
+        """Bars of several series one after the other (dedupe() to sort and drop repeated dates)"""
+        if not parts:
+            return cls.empty()
+        return cls(
+            np.concatenate([part.dates for part in parts]),
+            **{field: np.concatenate([getattr(part, field) for part in parts]) for field in SERIES_FIELDS}
+        )
+
+    def column(self, field: str) -> np.ndarray:
+        return self.dates if field == "date" else getattr(self, field)
+
+    def date_strings(self) -> List[str]:
+        unit = "D" if self.dates.dtype == np.dtype("datetime64[D]") else "s"
+        return np.datetime_as_string(self.dates, unit=unit).tolist()
+
+    def python_dates(self) -> List[Any]:
+        # datetime64[D] converts to datetime.date, datetime64[s] to datetime.datetime
+        return self.dates.tolist()
+
+    def to_columns(self, fields: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        """JSON-ready parallel lists per field, with ISO date strings"""
+        fields = fields or ["date"] + SERIES_FIELDS
+        return {field: self.date_strings() if field == "date" else getattr(self, field).tolist() for field in fields}
+
+    def to_rows(self, fields: Optional[List[str]] = None, iso_dates: bool = False) -> List[Dict[str, Any]]:
+        """One dict per bar, for callers that still work row by row"""
+        fields = fields or ["date"] + SERIES_FIELDS
+        dates = self.date_strings() if iso_dates else self.python_dates()
+        columns = [dates if field == "date" else getattr(self, field).tolist() for field in fields]
+        return [dict(zip(fields, values)) for values in zip(*columns)]
+
+    def dedupe(self) -> "BarSeries":
+        """Keep the last bar for each date, sorted by date"""
+        if len(self) < 2:
+            return self
+        # Reverse so np.unique picks the last occurrence of each date
+        _, positions = np.unique(self.dates[::-1], return_index=True)
+        keep = len(self) - 1 - positions
+        return self.take(keep)
+
+    def take(self, positions) -> "BarSeries":
+        """Bars at the given positions; a slice returns views without copying"""
+        return BarSeries(self.dates[positions], **{field: getattr(self, field)[positions] for field in SERIES_FIELDS})
+
+    def between(self, first: date, last: date) -> "BarSeries":
+        """Bars whose date falls in [first, last]"""
+        days = self.dates.astype("datetime64[D]")
+        mask = (days >= np.datetime64(first, "D")) & (days <= np.datetime64(last, "D"))
+        return self.take(np.flatnonzero(mask))
@@ -0,0 +1,347 @@
+import os
+import math
+import time
+import asyncio
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from datetime import date
+from dotenv import load_dotenv
+
+from app.adapters.data_source import DataSource, BatchResult
+from app.adapters.bar_series import BarSeries
+
+load_dotenv()
+
+# Bucket upper bounds: four per doubling from 1ms to about 65s
+BUCKET_BOUNDS_MS = [2 ** (i / 4) for i in range(65)]
+
+
+def _good_batch(result: BatchResult) -> bool:
+    """A batch answer is good unless every requested ticker failed"""
+    data, errors = result
+    return bool(data) or not errors
+
+
+def _source_fault(error: BaseException) -> bool:
+    """Whether an error says the source is unhealthy, rather than that it has nothing for the request"""
+    status = getattr(getattr(error, "response", None), "status_code", None) or getattr(error, "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500 and status != 429:
+        return False
+    return not isinstance(error, (ValueError, KeyError))
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latencies of successful calls, weighted towards recent ones.
+
+    Every `window` observations all counts are halved, so percentiles follow a
+    source whose latency drifts instead of averaging over its whole lifetime.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.counts = [0.0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.total = 0.0
+        self.observed = 0
+
+    def observe(self, seconds: float):
+        milliseconds = seconds * 1000
+        index = 0 if milliseconds <= 1 else min(len(BUCKET_BOUNDS_MS), math.ceil(math.log2(milliseconds) * 4))
+        self.counts[index] += 1
+        self.total += 1
+        self.observed += 1
+        if self.observed % self.window == 0:
+            self.counts = [count / 2 for count in self.counts]
+            self.total /= 2
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Latency in seconds below which `percent` of the weighted calls fall, interpolated within its bucket"""
+        if not self.total:
+            return None
+        target = self.total * percent / 100
+        seen = 0.0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= target:
+                upper = BUCKET_BOUNDS_MS[index] if index < len(BUCKET_BOUNDS_MS) else BUCKET_BOUNDS_MS[-1] * 2
+                lower = BUCKET_BOUNDS_MS[index - 1] if index else 0.0
+                return (lower + (upper - lower) * (target - seen) / count) / 1000
+            seen += count
+        return BUCKET_BOUNDS_MS[-1] / 1000
+
+    def stats(self) -> Dict[str, Any]:
+        def milliseconds(percent: float) -> Optional[float]:
+            value = self.percentile(percent)
+            return round(value * 1000, 1) if value is not None else None
+
+        return {
+            "count": self.observed,
+            "p50_ms": milliseconds(50),
+            "p95_ms": milliseconds(95),
+            "p99_ms": milliseconds(99),
+            # Non-empty buckets by upper bound in ms, after decay
+            "buckets": {
+                f"{BUCKET_BOUNDS_MS[index]:.1f}" if index < len(BUCKET_BOUNDS_MS) else "inf": round(count, 1)
+                for index, count in enumerate(self.counts) if count >= 0.05
+            },
+        }
+
+
+class CircuitBreaker:
+    """
+    Closed until `threshold` consecutive faults, then open for `reset_seconds`.
+
+    After that one probe call is let through (half-open): its success closes the
+    breaker, its failure opens it again.
+    """
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def available(self) -> bool:
+        """Whether a call may go to the source now"""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self.probing)
+
+    def allow(self) -> bool:
+        """Like available(), but in half-open state this claims the single probe"""
+        if not self.available():
+            return False
+        if self.opened_at is not None:
+            self.probing = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probing or (self.opened_at is None and self.failures >= self.threshold):
+            self.trips += 1
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+    def release(self):
+        """A call was cancelled before it told anything about the source's health"""
+        self.probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures, "trips": self.trips}
+
+
+class SourceHealth:
+    """Circuit breaker, per-method latency histograms and outcome counters of one source"""
+
+    def __init__(self, threshold: int, reset_seconds: float, window: int):
+        self.breaker = CircuitBreaker(threshold, reset_seconds)
+        self.window = window
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.calls = 0
+        self.wins = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    def histogram(self, method: str) -> LatencyHistogram:
+        if method not in self.latency:
+            self.latency[method] = LatencyHistogram(self.window)
+        return self.latency[method]
+
+
+class CompositeDataSource(DataSource):
+    """
+    Several data sources in order of preference, with hedged requests and failover.
+
+    Every call goes to the first source whose circuit breaker is closed. If it
+    has not answered within its HEDGE_PERCENTILE latency for that method (from
+    a per-source, per-method histogram of successful calls), the same call is
+    also sent to the next source, and so on down the list; the first good
+    answer wins and the calls still running are cancelled. A source that fails
+    is followed by the next one at once. Until HEDGE_MIN_SAMPLES calls have been
+    timed, the hedge waits HEDGE_DEFAULT_DELAY_MS, and at most HEDGE_MAX_FRACTION
+    of calls are hedged, so a slow primary cannot double the upstream load.
+
+    CIRCUIT_FAILURE_THRESHOLD consecutive faults (errors other than 4xx and
+    missing data) open a source's breaker for CIRCUIT_RESET_SECONDS. While
+    every breaker is open, calls still go to the first source.
+    """
+
+    def __init__(self, sources: List[Tuple[str, DataSource]]):
+        self.sources = sources
+        self.percentile = float(os.getenv("HEDGE_PERCENTILE", "95"))
+        self.min_samples = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+        self.default_delay = float(os.getenv("HEDGE_DEFAULT_DELAY_MS", "1000")) / 1000
+        self.min_delay = float(os.getenv("HEDGE_MIN_DELAY_MS", "10")) / 1000
+        self.max_fraction = float(os.getenv("HEDGE_MAX_FRACTION", "0.1"))
+        threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+        reset_seconds = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+        window = int(os.getenv("HEDGE_HISTOGRAM_WINDOW", "1000"))
+        self._health = {name: SourceHealth(threshold, reset_seconds, window) for name, _ in sources}
+        self.requests = 0
+        self.hedges = 0
+        self.hedges_skipped = 0
+        self.failovers = 0
+        self.exhausted = 0
+
+    async def get_historical_data(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict[str, Any]]:
+        return await self._first_good("get_historical_data", ticker, start_date, end_date)
+
+    async def get_historical_series(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> BarSeries:
+        return await self._first_good("get_historical_series", ticker, start_date, end_date)
+
+    async def get_financial_data(self, ticker: str) -> Dict[str, Any]:
+        return await self._first_good("get_financial_data", ticker)
+
+    async def get_peer_companies(self, industry: str) -> List[Dict[str, Any]]:
+        return await self._first_good("get_peer_companies", industry)
+
+    async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
+        return await self._first_good("search_stocks", query)
+
+    async def get_trending_stocks(self, count: Optional[int] = 5) -> List[Dict[str, Any]]:
+        return await self._first_good("get_trending_stocks", count)
+
+    async def get_historical_data_batch(self, tickers: List[str], start_date: Optional[date] = None, end_date: Optional[date] = None) -> BatchResult:
+        return await self._first_good("get_historical_data_batch", tickers, start_date, end_date, good=_good_batch)
+
+    async def get_historical_series_batch(self, tickers: List[str], start_date: Optional[date] = None, end_date: Optional[date] = None) -> BatchResult:
+        return await self._first_good("get_historical_series_batch", tickers, start_date, end_date, good=_good_batch)
+
+    async def get_financial_data_batch(self, tickers: List[str]) -> BatchResult:
+        return await self._first_good("get_financial_data_batch", tickers, good=_good_batch)
+
+    async def get_quotes(self, tickers: List[str]) -> BatchResult:
+        return await self._first_good("get_quotes", tickers, good=_good_batch)
+
+    async def _first_good(self, method: str, *args: Any, good: Callable[[Any], bool] = lambda result: True) -> Any:
+        """Call method on the sources in turn, hedging slow calls, and return the first good answer"""
+        self.requests += 1
+        running: Dict[asyncio.Future, str] = {}
+        position = 0
+        deadline = 0.0
+        first_error: Optional[BaseException] = None
+        fallback: Optional[Tuple[Any]] = None
+
+        def start(name: str, source: DataSource):
+            nonlocal deadline
+            running[asyncio.ensure_future(self._timed(name, source, method, args))] = name
+            deadline = time.monotonic() + self._hedge_delay(name, method)
+
+        def launch_next() -> bool:
+            """Start the call on the next source whose breaker lets it through"""
+            nonlocal position
+            while position < len(self.sources):
+                name, source = self.sources[position]
+                position += 1
+                if self._health[name].breaker.allow():
+                    start(name, source)
+                    return True
+            return False
+
+        def can_launch() -> bool:
+            return any(self._health[name].breaker.available() for name, _ in self.sources[position:])
+
+        if not launch_next():
+            start(*self.sources[0])
+        try:
+            while running:
+                timeout = max(0.0, deadline - time.monotonic()) if can_launch() else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if self.hedges < self.max_fraction * self.requests:
+                        self.hedges += 1
+                        launch_next()
+                    else:
+                        self.hedges_skipped += 1
+                        deadline = math.inf
+                    continue
+                for task in done:
+                    name = running.pop(task)
+                    error = task.exception()
+                    if error is None and good(task.result()):
+                        self._health[name].wins += 1
+                        return task.result()
+                    if error is None:
+                        fallback = fallback or (task.result(),)
+                    else:
+                        first_error = first_error or error
+                if not running and launch_next():
+                    self.failovers += 1
+        finally:
+            for task in running:
+                task.cancel()
+
+        self.exhausted += 1
+        # Nobody had a good answer: the first complete one (e.g. every ticker failed) beats an error
+        if fallback is not None:
+            return fallback[0]
+        raise first_error
+
+    async def _timed(self, name: str, source: DataSource, method: str, args: Tuple[Any, ...]) -> Any:
+        health = self._health[name]
+        health.calls += 1
+        started = time.monotonic()
+        try:
+            result = await getattr(source, method)(*args)
+        except asyncio.CancelledError:
+            # Lost to a hedge: how long it would have taken is unknown
+            health.cancelled += 1
+            health.breaker.release()
+            raise
+        except Exception as e:
+            health.errors += 1
+            if _source_fault(e):
+                health.breaker.record_failure()
+            else:
+                health.breaker.record_success()
+            raise
+        health.breaker.record_success()
+        health.histogram(method).observe(time.monotonic() - started)
+        return result
+
+    def _hedge_delay(self, name: str, method: str) -> float:
+        """How long to wait for this source before asking the next one"""
+        histogram = self._health[name].latency.get(method)
+        if histogram is None or histogram.observed < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, histogram.percentile(self.percentile))
+
+    async def aclose(self):
+        await asyncio.gather(*[source.aclose() for _, source in self.sources])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": type(self).__name__,
+            "requests": self.requests,
+            "hedges": self.hedges,
+            # Hedges not sent because HEDGE_MAX_FRACTION of requests were already hedged
+            "hedges_skipped": self.hedges_skipped,
+            "failovers": self.failovers,
+            # Requests no source answered well
+            "exhausted": self.exhausted,
+            "sources": {
+                name: {
+                    "adapter": source.stats(),
+                    "circuit": self._health[name].breaker.stats(),
+                    "calls": self._health[name].calls,
+                    "wins": self._health[name].wins,
+                    "errors": self._health[name].errors,
+                    "cancelled": self._health[name].cancelled,
+                    "hedge_delay_ms": {
+                        method: round(self._hedge_delay(name, method) * 1000, 1) for method in self._health[name].latency
+                    },
+                    "latency": {method: histogram.stats() for method, histogram in self._health[name].latency.items()},
+                }
+                for name, source in self.sources
+            },
+        }
@@ -1,10 +1,27 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from datetime import date
+from typing import List, Dict, Any, Optional, Callable, Tuple
+from datetime import date, datetime, timedelta
+
+from app.adapters.executor import get_executor
+from app.adapters.scheduler import get_scheduler
+from app.adapters.bar_series import BarSeries
+
+# Per-ticker results and per-ticker error messages
+BatchResult = Tuple[Dict[str, Any], Dict[str, str]]
 
 class DataSource(ABC):
     """Abstract base class for stock data sources"""
 
+    async def run_blocking(self, func: Callable[..., Any], *args: Any, timeout: Optional[float] = None, cost: int = 1) -> Any:
+        """
+        Run a blocking upstream call on the shared bounded executor instead of the event loop.
+
+        The call first waits for `cost` tokens from the upstream scheduler in the
+        current priority lane, and is retried there on 429/5xx errors.
+        """
+        return await get_scheduler().call(lambda: get_executor().run(func, *args, timeout=timeout), cost=cost)
+
     @abstractmethod
     async def get_historical_data(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict[str, Any]]:
         """Get historical price data for a ticker"""
@@ -29,3 +46,103 @@ class DataSource(ABC):
     async def get_trending_stocks(self, count: Optional[int] = 5) -> List[Dict[str, Any]]:
         """Get trending stocks from the data source"""
         pass
+
+    async def get_historical_data_batch(self, tickers: List[str], start_date: Optional[date] = None, end_date: Optional[date] = None) -> BatchResult:
+        """
+        Get historical price data for several tickers.
+
+        Sources with a native multi-symbol API should override this; the default
+        issues one get_historical_data call per ticker concurrently.
+        """
+        results = await asyncio.gather(
+            *[self.get_historical_data(ticker, start_date, end_date) for ticker in tickers],
+            return_exceptions=True
+        )
+        return _split_batch(tickers, results)
+
+    async def get_historical_series(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> BarSeries:
+        """
+        Get historical price data for a ticker as a columnar BarSeries.
+
+        Sources that receive bars as arrays (e.g. a DataFrame) should override this
+        to skip per-bar dicts; the default converts get_historical_data.
+        """
+        return BarSeries.from_rows(await self.get_historical_data(ticker, start_date, end_date))
+
+    async def get_historical_series_batch(self, tickers: List[str], start_date: Optional[date] = None, end_date: Optional[date] = None) -> BatchResult:
+        """Get a BarSeries for several tickers; the default issues one call per ticker concurrently"""
+        results = await asyncio.gather(
+            *[self.get_historical_series(ticker, start_date, end_date) for ticker in tickers],
+            return_exceptions=True
+        )
+        return _split_batch(tickers, results)
+
+    async def get_financial_data_batch(self, tickers: List[str]) -> BatchResult:
+        """
+        Get fundamental financial data for several tickers.
+
+        Sources with a native multi-symbol API should override this; the default
+        issues one get_financial_data call per ticker concurrently.
+        """
+        results = await asyncio.gather(
+            *[self.get_financial_data(ticker) for ticker in tickers],
+            return_exceptions=True
+        )
+        return _split_batch(tickers, results)
+
+    async def get_quotes(self, tickers: List[str]) -> BatchResult:
+        """
+        Get the latest quote (see build_quote) for several tickers.
+
+        Sources with a quote API should override this; the default derives the
+        quotes from the last two daily bars of the past ten days.
+        """
+        today = datetime.now().date()
+        data, errors = await self.get_historical_series_batch(tickers, today - timedelta(days=10), today + timedelta(days=1))
+        quotes = {}
+        for ticker, series in data.items():
+            if not len(series):
+                errors[ticker] = "No recent price data"
+                continue
+            closes = series.close.tolist()
+            quotes[ticker] = build_quote(
+                ticker, closes[-1], closes[-2] if len(closes) > 1 else None,
+                volume=int(series.volume[-1]), market_time=series.python_dates()[-1]
+            )
+        return quotes, errors
+
+    async def aclose(self):
+        """Release connections or other resources held by the source; called at shutdown"""
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters reported under "data_source" by /metrics"""
+        return {"source": type(self).__name__}
+
+def build_quote(ticker: str, price: Optional[float], previous_close: Optional[float], volume: Optional[int] = None,
+                market_time: Any = None, currency: Optional[str] = "USD") -> Dict[str, Any]:
+    """The quote dict shared by all sources, with the change computed from the previous close"""
+    change = price - previous_close if price is not None and previous_close else None
+    return {
+        "ticker": ticker,
+        "price": price,
+        "previous_close": previous_close,
+        "change": change,
+        "change_percent": change / previous_close * 100 if change is not None else None,
+        "volume": volume,
+        "currency": currency,
+        "market_time": market_time.isoformat() if hasattr(market_time, "isoformat") else market_time,
+    }
+
+def percent(fraction: Optional[float]) -> Optional[float]:
+    """A fraction as a percentage; dividend_yield is in percent from every source, as in yfinance's info"""
+    return fraction * 100 if fraction is not None else None
+
+def _split_batch(tickers: List[str], results: List[Any]) -> BatchResult:
+    data, errors = {}, {}
+    for ticker, result in zip(tickers, results):
+        if isinstance(result, Exception):
+            errors[ticker] = str(result) or result.__class__.__name__
+        else:
+            data[ticker] = result
+    return data, errors
@@ -0,0 +1,87 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class DataSourceTimeoutError(Exception):
+    """Raised when a blocking data source call exceeds its timeout"""
+    pass
+
+
+class BlockingCallExecutor:
+    """
+    Bounded thread pool for the blocking calls made by data source adapters.
+
+    yfinance/yahooquery block while they scrape Yahoo, so adapters run those calls
+    here instead of on the event loop. At most max_concurrency calls are admitted
+    (running or queued for a worker); each call is awaited for at most timeout seconds.
+    A call that times out keeps its admission slot until its thread really finishes.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_concurrency: Optional[int] = None, timeout: Optional[float] = None):
+        self.max_workers = max_workers or int(os.getenv("DATA_SOURCE_MAX_WORKERS", "16"))
+        self.max_concurrency = max_concurrency or int(os.getenv("DATA_SOURCE_MAX_CONCURRENCY", str(self.max_workers * 4)))
+        self.timeout = timeout or float(os.getenv("DATA_SOURCE_CALL_TIMEOUT", "30"))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="data-source")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.completed = 0
+        self.timeouts = 0
+
+    async def run(self, func: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """Run func(*args) on the pool and await its result"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop = asyncio.get_running_loop()
+
+        await self._semaphore.acquire()
+        self.in_flight += 1
+        future = self._pool.submit(func, *args)
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise DataSourceTimeoutError(f"{getattr(func, '__name__', 'call')} timed out after {timeout or self.timeout}s")
+
+    def _release(self):
+        self.in_flight -= 1
+        self.completed += 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[BlockingCallExecutor] = None
+
+
+def get_executor() -> BlockingCallExecutor:
+    """Get the process-wide executor, creating it on first use"""
+    global _executor
+    if _executor is None:
+        _executor = BlockingCallExecutor()
+    return _executor
+
+
+def set_executor(executor: BlockingCallExecutor):
+    """Replace the process-wide executor (benchmarks, alternative pool sizes)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+    _executor = executor
@@ -2,15 +2,53 @@ import os
 from dotenv import load_dotenv
 from app.adapters.data_source import DataSource
 from app.adapters.yahoo_finance import YahooFinanceAdapter
+from app.adapters.yahoo_http import YahooHttpAdapter
+from app.adapters.fixture import FixtureDataSource
+from app.adapters.composite import CompositeDataSource
 
 load_dotenv()
 
-def get_data_source() -> DataSource:
-    """Factory function to get the configured data source"""
-    source_type = os.getenv("DATA_SOURCE", "yahoo")
-    
-    if source_type.lower() == "yahoo":
+_data_source = None
+
+def create_data_source(source_type: str) -> DataSource:
+    """A new data source of the given type"""
+    if source_type == "yahoo":
         return YahooFinanceAdapter()
+    elif source_type == "yahoo_http":
+        # Yahoo's JSON endpoints over a pooled async HTTP client, without yfinance's threads
+        return YahooHttpAdapter()
+    elif source_type == "fixture":
+        # Local files with synthetic latency and errors, for offline load tests
+        return FixtureDataSource()
     else:
         # Default to Yahoo Finance
         return YahooFinanceAdapter()
+
+def get_data_source() -> DataSource:
+    """
+    Factory function to get the configured data source (one shared instance per process).
+
+    DATA_SOURCE names one source, or several in order of preference
+    (e.g. "yahoo_http,yahoo,fixture"), which are then hedged and failed over
+    by a CompositeDataSource.
+    """
+    global _data_source
+    if _data_source is not None:
+        return _data_source
+
+    source_types = []
+    for source_type in os.getenv("DATA_SOURCE", "yahoo").lower().split(","):
+        if source_type.strip() and source_type.strip() not in source_types:
+            source_types.append(source_type.strip())
+
+    if len(source_types) > 1:
+        _data_source = CompositeDataSource([(source_type, create_data_source(source_type)) for source_type in source_types])
+    else:
+        _data_source = create_data_source(source_types[0] if source_types else "yahoo")
+
+    return _data_source
+
+async def close_data_source():
+    """Release the shared data source's connections, if it was created"""
+    if _data_source is not None:
+        await _data_source.aclose()
@@ -0,0 +1,369 @@
+import os
+import json
+import random
+import asyncio
+import argparse
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+from app.adapters.data_source import DataSource, BatchResult, build_quote
+from app.adapters.bar_series import BarSeries, SERIES_FIELDS
+from app.adapters.scheduler import get_scheduler
+from app.services.market_calendar import is_trading_day
+
+load_dotenv()
+
+BARS_SCHEMA = pa.schema(
+    [("ticker", pa.string()), ("date", pa.date32())]
+    + [(field, pa.int64() if field == "volume" else pa.float64()) for field in SERIES_FIELDS]
+)
+COMPANY_FIELDS = [
+    "ticker", "name", "sector", "industry", "market_cap", "pe_ratio", "pb_ratio", "dividend_yield",
+    "eps", "revenue", "profit_margin", "debt_to_equity", "roe", "current_ratio",
+]
+PEER_LIMIT = 25
+SEARCH_LIMIT = 10
+
+# Sectors and industries of the generated companies; the sector names match the
+# keys of the Yahoo adapter's peer lists
+SECTORS = {
+    "Technology": ["Software", "Semiconductors", "Consumer Electronics"],
+    "Financial Services": ["Banks", "Asset Management", "Insurance"],
+    "Healthcare": ["Drug Manufacturers", "Medical Devices", "Biotechnology"],
+    "Consumer Cyclical": ["Specialty Retail", "Restaurants", "Auto Manufacturers"],
+    "Energy": ["Oil & Gas Integrated", "Oil & Gas E&P", "Renewable Utilities"],
+}
+
+
+class FixtureError(Exception):
+    """Injected upstream failure; status_code makes the scheduler retry it like an HTTP error"""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Injected fixture error ({status_code})")
+        self.status_code = status_code
+
+
+def _source_path(directory: str, name: str) -> Optional[str]:
+    for extension in (".parquet", ".csv"):
+        path = os.path.join(directory, name + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _read_source(path: str) -> pa.Table:
+    if path.endswith(".parquet"):
+        return pq.read_table(path, memory_map=True)
+    return pacsv.read_csv(path)
+
+
+def _normalize_bars(table: pa.Table) -> pa.Table:
+    """Cast to BARS_SCHEMA (missing prices become NaN) and sort by ticker and date"""
+    columns = []
+    for field in BARS_SCHEMA:
+        column = pc.cast(table.column(field.name), field.type)
+        if field.name in SERIES_FIELDS:
+            column = column.fill_null(0 if field.name == "volume" else float("nan"))
+        columns.append(column)
+    table = pa.Table.from_arrays(columns, schema=BARS_SCHEMA)
+    return table.sort_by([("ticker", "ascending"), ("date", "ascending")]).combine_chunks()
+
+
+def _ticker_offsets(table: pa.Table) -> Dict[str, Tuple[int, int]]:
+    """Row range of each ticker in a table sorted by ticker"""
+    encoded = table.column("ticker").combine_chunks().dictionary_encode()
+    indices = encoded.indices.to_numpy()
+    starts = np.concatenate(([0], np.flatnonzero(indices[1:] != indices[:-1]) + 1)) if len(indices) else np.array([], dtype=np.int64)
+    stops = np.concatenate((starts[1:], [len(indices)]))
+    names = encoded.dictionary.to_pylist()
+    return {names[indices[start]]: (int(start), int(stop)) for start, stop in zip(starts, stops)}
+
+
+def load_mapped_table(directory: str, name: str, normalize=None) -> pa.Table:
+    """
+    Memory-map fixture table `name` from directory.
+
+    A Parquet or CSV fixture is converted once into an uncompressed Arrow IPC
+    file next to it (name.arrow, rebuilt when the source is newer), and that
+    file is memory-mapped: column buffers are views of the page cache instead
+    of copies on the heap, so thousands of tickers load in milliseconds.
+    """
+    mapped = os.path.join(directory, f"{name}.arrow")
+    source = _source_path(directory, name)
+    if source and (not os.path.exists(mapped) or os.path.getmtime(mapped) < os.path.getmtime(source)):
+        table = _read_source(source)
+        table = normalize(table) if normalize else table.combine_chunks()
+        if normalize is _normalize_bars:
+            # Keep the per-ticker row ranges with the data so loading needs no scan
+            table = table.replace_schema_metadata({"offsets": json.dumps(_ticker_offsets(table))})
+        temporary = mapped + ".tmp"
+        with pa.OSFile(temporary, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(temporary, mapped)
+    if not os.path.exists(mapped):
+        raise FileNotFoundError(f"No {name}.parquet, {name}.csv or {name}.arrow fixture in {directory}")
+    return pa.ipc.open_file(pa.memory_map(mapped)).read_all()
+
+
+class FixtureDataSource(DataSource):
+    """
+    Deterministic data source backed by local fixture files, for offline load tests.
+
+    FIXTURE_DIR holds bars.parquet (or .csv) with ticker, date and the price
+    fields, and companies.parquet (or .csv) with COMPANY_FIELDS; generate them
+    with `python -m app.adapters.fixture`. Every call goes through the upstream
+    scheduler like a real upstream call, waits FIXTURE_LATENCY_MS (plus up to
+    FIXTURE_LATENCY_JITTER_MS) and fails with FIXTURE_ERROR_STATUS at
+    FIXTURE_ERROR_RATE. Latency and errors are drawn from a generator seeded
+    with FIXTURE_SEED.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getenv("FIXTURE_DIR", "fixtures")
+        self.latency = float(os.getenv("FIXTURE_LATENCY_MS", "0")) / 1000
+        self.jitter = float(os.getenv("FIXTURE_LATENCY_JITTER_MS", "0")) / 1000
+        self.error_rate = float(os.getenv("FIXTURE_ERROR_RATE", "0"))
+        self.error_status = int(os.getenv("FIXTURE_ERROR_STATUS", "503"))
+        self._random = random.Random(int(os.getenv("FIXTURE_SEED", "0")))
+
+        bars = load_mapped_table(self.directory, "bars", _normalize_bars)
+        metadata = bars.schema.metadata or {}
+        self._offsets = (
+            {ticker: tuple(rows) for ticker, rows in json.loads(metadata[b"offsets"]).items()}
+            if b"offsets" in metadata else _ticker_offsets(bars)
+        )
+        # Zero-copy views of the mapped columns; dates stay as int32 day numbers
+        self._days = bars.column("date").chunk(0).view(pa.int32()).to_numpy() if len(bars) else np.array([], dtype=np.int32)
+        self._columns = {field: bars.column(field).to_numpy() for field in SERIES_FIELDS}
+
+        companies = load_mapped_table(self.directory, "companies").to_pylist()
+        self._companies = {row["ticker"]: row for row in companies}
+        self._by_group: Dict[str, List[Dict[str, Any]]] = {}
+        for row in sorted(companies, key=lambda item: -(item.get("market_cap") or 0)):
+            for group in {(row.get("industry") or "").lower(), (row.get("sector") or "").lower()}:
+                self._by_group.setdefault(group, []).append(row)
+        print(f"Fixture data source: {len(self._offsets)} tickers, {len(bars)} bars from {self.directory}")
+
+    async def get_historical_data(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict[str, Any]]:
+        return (await self.get_historical_series(ticker, start_date, end_date)).to_rows()
+
+    async def get_historical_series(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> BarSeries:
+        await self._upstream()
+        return self._series(ticker, start_date, end_date)
+
+    async def get_historical_data_batch(self, tickers: List[str], start_date: Optional[date] = None, end_date: Optional[date] = None) -> BatchResult:
+        data, errors = await self.get_historical_series_batch(tickers, start_date, end_date)
+        return {ticker: series.to_rows() for ticker, series in data.items()}, errors
+
+    async def get_historical_series_batch(self, tickers: List[str], start_date: Optional[date] = None, end_date: Optional[date] = None) -> BatchResult:
+        await self._upstream(cost=len(tickers))
+        data, errors = {}, {}
+        for ticker in tickers:
+            try:
+                data[ticker] = self._series(ticker, start_date, end_date)
+            except ValueError as e:
+                errors[ticker] = str(e)
+        return data, errors
+
+    async def get_financial_data(self, ticker: str) -> Dict[str, Any]:
+        await self._upstream()
+        return self._financials(ticker)
+
+    async def get_financial_data_batch(self, tickers: List[str]) -> BatchResult:
+        await self._upstream(cost=len(tickers))
+        data, errors = {}, {}
+        for ticker in tickers:
+            try:
+                data[ticker] = self._financials(ticker)
+            except ValueError as e:
+                errors[ticker] = str(e)
+        return data, errors
+
+    async def get_quotes(self, tickers: List[str]) -> BatchResult:
+        """The last bar's close, moved by a small seeded random tick on every call"""
+        await self._upstream()
+        data, errors = {}, {}
+        for ticker in tickers:
+            if ticker not in self._offsets:
+                errors[ticker] = f"No fixture data for {ticker}"
+                continue
+            first, stop = self._offsets[ticker]
+            close = self._columns["close"]
+            previous = float(close[stop - 2]) if stop - first > 1 else None
+            price = float(close[stop - 1]) * (1 + self._random.gauss(0, 0.001))
+            data[ticker] = build_quote(
+                ticker, price, previous, volume=int(self._columns["volume"][stop - 1]), market_time=datetime.now()
+            )
+        return data, errors
+
+    async def get_peer_companies(self, industry: str) -> List[Dict[str, Any]]:
+        await self._upstream()
+        return [
+            {field: row.get(field) for field in ["ticker", "name", "sector", "industry", "market_cap", "pe_ratio", "pb_ratio"]}
+            for row in self._by_group.get(industry.lower(), [])[:PEER_LIMIT]
+        ]
+
+    async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
+        await self._upstream()
+        needle = query.strip().lower()
+        if not needle:
+            return []
+        matches = [
+            row for row in self._companies.values()
+            if row["ticker"].lower().startswith(needle) or needle in (row.get("name") or "").lower()
+        ]
+        matches.sort(key=lambda row: (not row["ticker"].lower().startswith(needle), -(row.get("market_cap") or 0)))
+        return [self._quote(row) for row in matches[:SEARCH_LIMIT]]
+
+    async def get_trending_stocks(self, count: Optional[int] = 5) -> List[Dict[str, Any]]:
+        await self._upstream()
+        # Highest volume on each ticker's latest bar
+        ranked = sorted(
+            (ticker for ticker in self._offsets if ticker in self._companies),
+            key=lambda ticker: -self._columns["volume"][self._offsets[ticker][1] - 1]
+        )
+        return [dict(self._quote(self._companies[ticker]), is_trending=True) for ticker in ranked[:count or 5]]
+
+    async def _upstream(self, cost: int = 1):
+        """Stand-in for the network round trip: scheduled, delayed and sometimes failing"""
+        await get_scheduler().call(self._simulate, cost=cost)
+
+    async def _simulate(self):
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise FixtureError(self.error_status)
+
+    def _series(self, ticker: str, start_date: Optional[date], end_date: Optional[date]) -> BarSeries:
+        if ticker not in self._offsets:
+            raise ValueError(f"No fixture data for {ticker}")
+        start_date = start_date or (datetime.now() - timedelta(days=365)).date()
+        end_date = end_date or datetime.now().date()
+        first, stop = self._offsets[ticker]
+        days = self._days[first:stop]
+        # The end date is exclusive, like Yahoo's
+        low, high = first + np.searchsorted(days, [
+            np.datetime64(start_date, "D").astype(np.int64), np.datetime64(end_date, "D").astype(np.int64)
+        ])
+        return BarSeries(
+            self._days[low:high].astype("datetime64[D]"),
+            **{field: column[low:high] for field, column in self._columns.items()}
+        )
+
+    def _financials(self, ticker: str) -> Dict[str, Any]:
+        row = self._companies.get(ticker)
+        if row is None:
+            raise ValueError(f"No fixture data for {ticker}")
+        return dict(row, date=datetime.now().date())
+
+    def _quote(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        price, change = None, 0.0
+        if row["ticker"] in self._offsets:
+            first, stop = self._offsets[row["ticker"]]
+            close = self._columns["close"]
+            price = float(close[stop - 1])
+            if stop - first > 1:
+                change = (price / close[stop - 2] - 1) * 100
+        return {
+            "ticker": row["ticker"],
+            "name": row.get("name", ""),
+            "sector": row.get("sector", ""),
+            "industry": row.get("industry", ""),
+            "market_cap": row.get("market_cap"),
+            "price": price,
+            "change_percent": str(round(change, 2)),
+            "currency": "USD",
+            "exchange": "FIXTURE",
+        }
+
+
+def generate_fixtures(directory: str, tickers: int = 500, years: int = 10, seed: int = 0,
+                      end: Optional[date] = None, chunk_size: int = 500) -> Tuple[int, int]:
+    """
+    Write bars.parquet and companies.parquet with N synthetic tickers × M years of daily bars.
+
+    Closes follow a geometric random walk with per-ticker drift and volatility
+    over the exchange's trading days up to `end` (today). Output is fully
+    determined by the arguments. Returns (tickers, bars) written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    end = end or date.today()
+    first = end - timedelta(days=365 * years)
+    days = np.array(
+        [first + timedelta(days=i) for i in range((end - first).days + 1) if is_trading_day(first + timedelta(days=i))],
+        dtype="datetime64[D]"
+    )
+    width = max(4, len(str(tickers - 1)))
+    names = [f"FX{i:0{width}d}" for i in range(tickers)]
+    sector_names = list(SECTORS)
+
+    companies = []
+    written = 0
+    with pq.ParquetWriter(os.path.join(directory, "bars.parquet"), BARS_SCHEMA) as writer:
+        for chunk_start in range(0, tickers, chunk_size):
+            chunk = names[chunk_start:chunk_start + chunk_size]
+            n = len(chunk)
+            drift = rng.normal(0.06, 0.10, n) / 252
+            volatility = rng.uniform(0.15, 0.60, n) / np.sqrt(252)
+            returns = rng.normal(drift[:, None], volatility[:, None], (n, len(days)))
+            close = rng.uniform(5, 500, n)[:, None] * np.exp(np.cumsum(returns, axis=1))
+            previous = np.concatenate((close[:, :1], close[:, :-1]), axis=1)
+            open_ = previous * (1 + rng.normal(0, volatility[:, None] / 4, close.shape))
+            spread = np.abs(rng.normal(0, volatility[:, None] / 2, close.shape))
+            high = np.maximum(open_, close) * (1 + spread)
+            low = np.minimum(open_, close) * (1 - spread)
+            volume = rng.lognormal(13, 1, (n, 1)) * rng.lognormal(0, 0.4, close.shape)
+
+            writer.write_table(pa.table({
+                "ticker": np.repeat(np.array(chunk, dtype=object), len(days)),
+                "date": np.tile(days, n),
+                "open": open_.ravel(), "high": high.ravel(), "low": low.ravel(), "close": close.ravel(),
+                "volume": volume.astype(np.int64).ravel(), "adjusted_close": close.ravel(),
+            }, schema=BARS_SCHEMA))
+            written += close.size
+
+            shares = rng.lognormal(18, 1, n)
+            pe_ratio = rng.lognormal(3, 0.5, n)
+            for i, ticker in enumerate(chunk):
+                sector = sector_names[rng.integers(len(sector_names))]
+                industry = SECTORS[sector][rng.integers(len(SECTORS[sector]))]
+                last = float(close[i, -1])
+                companies.append({
+                    "ticker": ticker,
+                    "name": f"Fixture {industry} {ticker[2:]} Inc",
+                    "sector": sector,
+                    "industry": industry,
+                    "market_cap": float(last * shares[i]),
+                    "pe_ratio": float(pe_ratio[i]),
+                    "pb_ratio": float(rng.lognormal(1, 0.6)),
+                    "dividend_yield": float(rng.uniform(0, 5)),
+                    "eps": float(last / pe_ratio[i]),
+                    "revenue": float(last * shares[i] / rng.uniform(1, 8)),
+                    "profit_margin": float(rng.normal(0.12, 0.08)),
+                    "debt_to_equity": float(rng.lognormal(4, 0.7)),
+                    "roe": float(rng.normal(0.15, 0.1)),
+                    "current_ratio": float(rng.lognormal(0.3, 0.4)),
+                })
+
+    pq.write_table(pa.Table.from_pylist(companies), os.path.join(directory, "companies.parquet"))
+    return tickers, written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate fixtures for DATA_SOURCE=fixture")
+    parser.add_argument("--directory", default=os.getenv("FIXTURE_DIR", "fixtures"))
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    count, bars = generate_fixtures(args.directory, args.tickers, args.years, args.seed)
+    print(f"Wrote {count} tickers and {bars} bars to {args.directory}")
@@ -0,0 +1,238 @@
+import os
+import time
+import random
+import asyncio
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Priority lanes, highest first
+LANES = ["interactive", "alerts", "batch"]
+
+# Lane of the calls made while handling the current request or task; set from the
+# X-Upstream-Priority header and by background jobs, inherited by the tasks they start
+upstream_lane: ContextVar[str] = ContextVar("upstream_lane", default="interactive")
+
+WAIT_SAMPLES = 512
+
+
+def parse_lane(value: Optional[str]) -> str:
+    """Lane named by a header value; unknown or missing values are interactive"""
+    value = (value or "").strip().lower()
+    return value if value in LANES else "interactive"
+
+
+def upstream_status(error: BaseException) -> Optional[int]:
+    """
+    HTTP status behind a data source error, if it is one worth retrying (429 or 5xx).
+
+    yfinance raises YFRateLimitError when throttled and lets requests/curl_cffi
+    HTTP errors (which carry the response) through otherwise.
+    """
+    if "RateLimit" in type(error).__name__ or "Too Many Requests" in str(error):
+        return 429
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None) or getattr(error, "status_code", None)
+    if isinstance(status, int) and (status == 429 or 500 <= status < 600):
+        return status
+    return None
+
+
+class LaneStats:
+    __slots__ = ("granted", "waits")
+
+    def __init__(self):
+        self.granted = 0
+        self.waits: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+
+    def to_dict(self, depth: int) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+        return {
+            "queue_depth": depth,
+            "granted": self.granted,
+            "wait_ms_avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "wait_ms_p95": round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else 0.0,
+            "wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0,
+        }
+
+
+class UpstreamScheduler:
+    """
+    Token bucket in front of every upstream (Yahoo) call, with priority lanes.
+
+    Tokens refill at rate per second up to burst. Waiting calls are granted
+    strictly by lane (interactive, then alerts, then batch) and first-come within
+    a lane. Batch calls additionally leave `reserve` tokens in the bucket, so an
+    interactive call arriving while background jobs saturate the quota still
+    finds a token.
+
+    Calls failing with 429 or 5xx are retried with full-jitter exponential
+    backoff. A 429 also halves the refill rate (down to min_rate); every success
+    adds back a step until the configured rate is reached again.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        reserve: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_max: Optional[float] = None,
+    ):
+        self.max_rate = rate or float(os.getenv("UPSTREAM_RATE_PER_SECOND", "5"))
+        self.burst = burst or int(os.getenv("UPSTREAM_BURST", "10"))
+        reserve = reserve if reserve is not None else int(os.getenv("UPSTREAM_INTERACTIVE_RESERVE", "2"))
+        # Batch calls must still be able to fit in a full bucket
+        self.reserve = max(0, min(reserve, self.burst - 1))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("UPSTREAM_MAX_RETRIES", "3"))
+        self.backoff_base = backoff_base or float(os.getenv("UPSTREAM_BACKOFF_BASE_SECONDS", "0.5"))
+        self.backoff_max = backoff_max or float(os.getenv("UPSTREAM_BACKOFF_MAX_SECONDS", "30"))
+        self.min_rate = self.max_rate / 8
+        self.rate = self.max_rate
+
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._queues: Dict[str, Deque[Tuple[asyncio.Future, int, float]]] = {lane: deque() for lane in LANES}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._lanes = {lane: LaneStats() for lane in LANES}
+        self.retries = 0
+        self.throttled = 0
+        self.server_errors = 0
+
+    async def call(self, func: Callable[[], Awaitable[Any]], cost: int = 1, lane: Optional[str] = None) -> Any:
+        """Await func() once the lane is granted tokens, retrying on 429/5xx"""
+        lane = lane or upstream_lane.get()
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(lane, cost)
+            try:
+                result = await func()
+            except Exception as e:
+                status = upstream_status(e)
+                if status is None or attempt == self.max_retries:
+                    raise
+                self._on_failure(status)
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                print(f"Upstream call failed with {status}; retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+            self._on_success()
+            return result
+
+    async def acquire(self, lane: str, cost: int = 1):
+        """Wait until `cost` tokens are granted to the lane"""
+        cost = max(1, min(cost, self.burst - self.reserve if lane == "batch" else self.burst))
+        enqueued = time.monotonic()
+        if self._idle_ahead(lane) and self._take(lane, cost):
+            self._granted(lane, enqueued)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._queues[lane].append((future, cost, enqueued))
+        self._wake()
+        await future
+
+    def _idle_ahead(self, lane: str) -> bool:
+        # Nobody of the same or a higher priority is waiting
+        return not any(self._queues[other] for other in LANES[:LANES.index(lane) + 1])
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self, lane: str, cost: int) -> bool:
+        self._refill()
+        needed = cost + (self.reserve if lane == "batch" else 0)
+        if self._tokens < needed:
+            return False
+        self._tokens -= cost
+        return True
+
+    def _granted(self, lane: str, enqueued: float):
+        stats = self._lanes[lane]
+        stats.granted += 1
+        stats.waits.append(time.monotonic() - enqueued)
+
+    def _wake(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            # A fresh event per dispatcher, so it belongs to the running event loop
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        self._wakeup.set()
+
+    async def _dispatch(self):
+        """Grant tokens to waiting calls in lane order until the queues are empty"""
+        while True:
+            head = None
+            for lane in LANES:
+                queue = self._queues[lane]
+                # Drop calls whose caller gave up (timeout, client disconnect)
+                while queue and queue[0][0].done():
+                    queue.popleft()
+                if queue:
+                    head = lane
+                    break
+            if head is None:
+                return
+
+            future, cost, enqueued = self._queues[head][0]
+            if self._take(head, cost):
+                self._queues[head].popleft()
+                future.set_result(None)
+                self._granted(head, enqueued)
+                continue
+
+            # Sleep until enough tokens accumulate, or a new (possibly higher priority) call arrives
+            needed = cost + (self.reserve if head == "batch" else 0) - self._tokens
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), needed / self.rate)
+            except asyncio.TimeoutError:
+                pass
+
+    def _on_failure(self, status: int):
+        self.retries += 1
+        if status == 429:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+        else:
+            self.server_errors += 1
+
+    def _on_success(self):
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "rate_per_second": round(self.rate, 3),
+            "max_rate_per_second": self.max_rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "server_errors": self.server_errors,
+            "lanes": {lane: self._lanes[lane].to_dict(len(self._queues[lane])) for lane in LANES},
+        }
+
+
+_scheduler: Optional[UpstreamScheduler] = None
+
+
+def get_scheduler() -> UpstreamScheduler:
+    """Get the process-wide scheduler, creating it on first use"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = UpstreamScheduler()
+    return _scheduler
+
+
+def set_scheduler(scheduler: UpstreamScheduler):
+    """Replace the process-wide scheduler (benchmarks, alternative quotas)"""
+    global _scheduler
+    _scheduler = scheduler
@@ -2,14 +2,96 @@ import yfinance as yf
 import pandas as pd
 import yahooquery as yq
 from typing import List, Dict, Any, Optional
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
 
-from app.adapters.data_source import DataSource
+from app.adapters.data_source import DataSource, BatchResult, build_quote, percent
+from app.adapters.bar_series import BarSeries
+from app.adapters.executor import get_executor
+from app.services.market_calendar import has_trading_day
+
+
+def expects_bars(start_date: date, end_date: date) -> bool:
+    """
+    Whether [start_date, end_date) holds a completed session, so an empty history means the download failed.
+
+    yfinance reports a failed symbol as an empty (or all-NaN) frame, which
+    would otherwise be stored as a range without bars. Windows of holidays and
+    weekends, or of today's session before the open, legitimately have none.
+    """
+    yesterday = datetime.now().date() - timedelta(days=1)
+    return has_trading_day(start_date, min(end_date - timedelta(days=1), yesterday))
+
+
+# In a real implementation, we would search for companies in the same industry
+# For demonstration, we use a dummy list for specific industries
+INDUSTRY_PEERS = {
+    "Technology": ["AAPL", "MSFT", "GOOG", "META", "AMZN"],
+    "Financial Services": ["JPM", "BAC", "WFC", "C", "GS"],
+    "Healthcare": ["JNJ", "PFE", "MRK", "ABBV", "UNH"],
+    "Consumer Cyclical": ["AMZN", "HD", "MCD", "NKE", "SBUX"],
+    "Energy": ["XOM", "CVX", "COP", "BP", "SHEL"]
+}
 
 class YahooFinanceAdapter(DataSource):
-    """Yahoo Finance implementation of the DataSource interface"""
+    """
+    Yahoo Finance implementation of the DataSource interface.
+
+    yfinance and yahooquery are blocking, so every public method runs its
+    _-prefixed implementation on the bounded executor (see run_blocking).
+    """
 
     async def get_historical_data(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict[str, Any]]:
+        return (await self.get_historical_series(ticker, start_date, end_date)).to_rows()
+
+    async def get_historical_series(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> BarSeries:
+        return await self.run_blocking(self._get_historical_series, ticker, start_date, end_date)
+
+    async def get_financial_data(self, ticker: str) -> Dict[str, Any]:
+        return await self.run_blocking(self._get_financial_data, ticker)
+
+    async def get_peer_companies(self, industry: str) -> List[Dict[str, Any]]:
+        # One multi-symbol fundamentals call for all peers, so the ratios come along
+        peers = self._industry_peers().get(industry, [])
+        if not peers:
+            return []
+        data, _ = await self.get_financial_data_batch(peers)
+        return [
+            {field: data[ticker].get(field) for field in ["ticker", "name", "sector", "industry", "market_cap", "pe_ratio", "pb_ratio"]}
+            for ticker in peers
+            if ticker in data
+        ]
+
+    async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
+        # A search plus up to ten info scrapes
+        return await self.run_blocking(self._search_stocks, query, timeout=self._multi_call_timeout(), cost=11)
+
+    async def get_trending_stocks(self, count: Optional[int] = 5) -> List[Dict[str, Any]]:
+        return await self.run_blocking(self._get_trending_stocks, count, timeout=self._multi_call_timeout(), cost=(count or 5) + 1)
+
+    async def get_historical_data_batch(self, tickers: List[str], start_date: Optional[date] = None, end_date: Optional[date] = None) -> BatchResult:
+        data, errors = await self.get_historical_series_batch(tickers, start_date, end_date)
+        return {ticker: series.to_rows() for ticker, series in data.items()}, errors
+
+    async def get_historical_series_batch(self, tickers: List[str], start_date: Optional[date] = None, end_date: Optional[date] = None) -> BatchResult:
+        if len(tickers) == 1:
+            return await super().get_historical_series_batch(tickers, start_date, end_date)
+        # yf.download makes one request per symbol
+        return await self.run_blocking(self._get_historical_series_batch, tickers, start_date, end_date, timeout=self._multi_call_timeout(), cost=len(tickers))
+
+    async def get_financial_data_batch(self, tickers: List[str]) -> BatchResult:
+        if len(tickers) == 1:
+            return await super().get_financial_data_batch(tickers)
+        return await self.run_blocking(self._get_financial_data_batch, tickers, timeout=self._multi_call_timeout(), cost=len(tickers))
+
+    async def get_quotes(self, tickers: List[str]) -> BatchResult:
+        # One /v7 quote request covers up to 1,500 symbols
+        return await self.run_blocking(self._get_quotes, tickers)
+
+    def _multi_call_timeout(self) -> float:
+        """Timeout for methods that make several upstream calls in sequence"""
+        return get_executor().timeout * 3
+
+    def _get_historical_series(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> BarSeries:
         # Default to last year if no dates provided
         if not start_date:
             start_date = (datetime.now() - timedelta(days=365)).date()
@@ -19,23 +101,70 @@ class YahooFinanceAdapter(DataSource):
         # Get data from Yahoo Finance
         stock = yf.Ticker(ticker)
         hist = stock.history(start=start_date, end=end_date)
+        if hist.empty and expects_bars(start_date, end_date):
+            raise ValueError(f"No price data returned for {ticker}")
 
-        # Convert to list of dictionaries
-        result = []
-        for index, row in hist.iterrows():
-            result.append({
-                "date": index.date(),
-                "open": float(row["Open"]),
-                "high": float(row["High"]),
-                "low": float(row["Low"]),
-                "close": float(row["Close"]),
-                "volume": int(row["Volume"]),
-                "adjusted_close": float(row["Close"])  # Yahoo already adjusts Close
-            })
+        return BarSeries.from_frame(hist)
 
-        return result
+    def _get_historical_series_batch(self, tickers: List[str], start_date: Optional[date] = None, end_date: Optional[date] = None) -> BatchResult:
+        # Default to last year if no dates provided
+        if not start_date:
+            start_date = (datetime.now() - timedelta(days=365)).date()
+        if not end_date:
+            end_date = datetime.now().date()
 
-    async def get_financial_data(self, ticker: str) -> Dict[str, Any]:
+        # One multi-symbol download instead of one history() call per ticker
+        frame = yf.download(
+            tickers, start=start_date, end=end_date,
+            group_by="ticker", auto_adjust=True, threads=True, progress=False
+        )
+
+        # A failed symbol is missing from the frame or all NaN; yfinance's own error
+        # list is process-global and reset by every download, so it is not consulted
+        expected = expects_bars(start_date, end_date)
+        data, errors = {}, {}
+        for ticker in tickers:
+            try:
+                hist = frame[ticker] if isinstance(frame.columns, pd.MultiIndex) else frame
+            except KeyError:
+                hist = None
+            # Dates on which only other tickers traded come back as all-NaN rows
+            hist = hist.dropna(subset=["Close"]) if hist is not None and "Close" in hist else None
+            if hist is not None and not hist.empty:
+                data[ticker] = BarSeries.from_frame(hist)
+            elif expected:
+                errors[ticker] = "No price data returned"
+            else:
+                data[ticker] = BarSeries.empty()
+
+        return data, errors
+
+    def _get_quotes(self, tickers: List[str]) -> BatchResult:
+        quotes = yq.Ticker(tickers).quotes
+        if not isinstance(quotes, dict):
+            # yahooquery reports a failed request as a message string
+            return {}, {ticker: str(quotes or "No data returned") for ticker in tickers}
+
+        data, errors = {}, {}
+        for ticker in tickers:
+            quote = quotes.get(ticker)
+            if not isinstance(quote, dict) or quote.get("regularMarketPrice") is None:
+                errors[ticker] = "No quote returned"
+                continue
+            market_time = quote.get("regularMarketTime")
+            if isinstance(market_time, (int, float)):
+                market_time = datetime.fromtimestamp(market_time, tz=timezone.utc)
+            data[ticker] = build_quote(
+                ticker,
+                quote.get("regularMarketPrice"),
+                quote.get("regularMarketPreviousClose"),
+                volume=quote.get("regularMarketVolume"),
+                market_time=market_time,
+                currency=quote.get("currency", "USD"),
+            )
+        return data, errors
+
+    def _get_financial_data(self, ticker: str) -> Dict[str, Any]:
         stock = yf.Ticker(ticker)
 
         # Get basic info
@@ -62,39 +191,51 @@ class YahooFinanceAdapter(DataSource):
 
         return financial_data
 
-    async def get_peer_companies(self, industry: str) -> List[Dict[str, Any]]:
-        # In a real implementation, we would search for companies in the same industry
-        # For demonstration, we'll return a dummy list for specific industries
-        industry_peers = {
-            "Technology": ["AAPL", "MSFT", "GOOG", "META", "AMZN"],
-            "Financial Services": ["JPM", "BAC", "WFC", "C", "GS"],
-            "Healthcare": ["JNJ", "PFE", "MRK", "ABBV", "UNH"],
-            "Consumer Cyclical": ["AMZN", "HD", "MCD", "NKE", "SBUX"],
-            "Energy": ["XOM", "CVX", "COP", "BP", "SHEL"]
-        }
-
-        peers = industry_peers.get(industry, [])
-        result = []
+    def _get_financial_data_batch(self, tickers: List[str]) -> BatchResult:
+        # yahooquery fetches the quoteSummary modules for all symbols concurrently
+        modules = yq.Ticker(tickers, asynchronous=True).get_modules(
+            ["price", "summaryProfile", "summaryDetail", "defaultKeyStatistics", "financialData"]
+        )
 
-        # Get basic info for each peer
-        for peer_ticker in peers:
-            try:
-                stock = yf.Ticker(peer_ticker)
-                info = stock.info
-                result.append({
-                    "ticker": peer_ticker,
-                    "name": info.get("shortName", ""),
-                    "sector": info.get("sector", ""),
-                    "industry": info.get("industry", ""),
-                    "market_cap": info.get("marketCap", None)
-                })
-            except Exception as e:
-                # Skip failed lookups
+        data, errors = {}, {}
+        for ticker in tickers:
+            summary = modules.get(ticker) if isinstance(modules, dict) else None
+            if not isinstance(summary, dict):
+                # yahooquery reports per-symbol failures as strings
+                errors[ticker] = str(summary or "No data returned")
                 continue
 
-        return result
+            price = summary.get("price") or {}
+            profile = summary.get("summaryProfile") or {}
+            detail = summary.get("summaryDetail") or {}
+            statistics = summary.get("defaultKeyStatistics") or {}
+            financials = summary.get("financialData") or {}
 
-    async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
+            data[ticker] = {
+                "ticker": ticker,
+                "name": price.get("shortName", ""),
+                "sector": profile.get("sector", ""),
+                "industry": profile.get("industry", ""),
+                "pe_ratio": detail.get("trailingPE", None),
+                "pb_ratio": statistics.get("priceToBook", None),
+                # summaryDetail gives a fraction, yfinance's info a percentage
+                "dividend_yield": percent(detail.get("dividendYield", None)),
+                "market_cap": detail.get("marketCap", price.get("marketCap", None)),
+                "eps": statistics.get("trailingEps", None),
+                "revenue": financials.get("totalRevenue", None),
+                "profit_margin": financials.get("profitMargins", statistics.get("profitMargins", None)),
+                "debt_to_equity": financials.get("debtToEquity", None),
+                "roe": financials.get("returnOnEquity", None),
+                "current_ratio": financials.get("currentRatio", None),
+                "date": datetime.now().date()
+            }
+
+        return data, errors
+
+    def _industry_peers(self) -> Dict[str, List[str]]:
+        return INDUSTRY_PEERS
+
+    def _search_stocks(self, query: str) -> List[Dict[str, Any]]:
         """
         Search for stocks based on a query string.
         Uses yahooquery search capabilities to find relevant stocks.
@@ -273,7 +414,7 @@ class YahooFinanceAdapter(DataSource):
         
         return result
         
-    async def get_trending_stocks(self, count: Optional[int] = 5) -> List[Dict[str, Any]]:
+    def _get_trending_stocks(self, count: Optional[int] = 5) -> List[Dict[str, Any]]:
         """
         Get trending stocks from Yahoo Finance using yahooquery.
         
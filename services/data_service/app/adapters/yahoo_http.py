@@ -0,0 +1,379 @@
+import os
+import time
+import asyncio
+from collections import deque
+from typing import List, Dict, Any, Optional, Deque, Tuple
+from datetime import date, datetime, timedelta, timezone
+
+import httpx
+import numpy as np
+from dotenv import load_dotenv
+
+from app.adapters.data_source import DataSource, BatchResult, build_quote, percent
+from app.adapters.bar_series import BarSeries
+from app.adapters.executor import DataSourceTimeoutError
+from app.adapters.scheduler import get_scheduler
+from app.adapters.yahoo_finance import INDUSTRY_PEERS
+
+load_dotenv()
+
+# Yahoo answers the default python-httpx agent with 429s
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+SUMMARY_MODULES = "price,summaryProfile,summaryDetail,defaultKeyStatistics,financialData"
+LATENCY_SAMPLES = 512
+SEARCH_LIMIT = 10
+
+
+class YahooHttpError(Exception):
+    """Error response from a Yahoo endpoint; status_code makes the scheduler retry 429/5xx"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Yahoo returned {status_code}: {message}")
+        self.status_code = status_code
+
+
+def _raw(value: Any) -> Any:
+    """quoteSummary values are {"raw": ..., "fmt": ...} unless formatted=false is honoured"""
+    return value.get("raw") if isinstance(value, dict) else value
+
+
+def day_timestamp(day: date) -> int:
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+
+
+class YahooHttpAdapter(DataSource):
+    """
+    Yahoo Finance over its JSON endpoints, with one shared httpx.AsyncClient.
+
+    Bars come from /v8/finance/chart, quotes from /v7/finance/quote (up to
+    YAHOO_HTTP_QUOTE_BATCH_SIZE symbols per request), fundamentals from
+    /v10/finance/quoteSummary, search and trending from /v1/finance. Requests
+    run on the event loop instead of yfinance's worker threads, over a pool of
+    at most YAHOO_HTTP_MAX_CONNECTIONS connections of which
+    YAHOO_HTTP_MAX_KEEPALIVE are kept open between requests, and fail after
+    YAHOO_HTTP_CONNECT_TIMEOUT / YAHOO_HTTP_TIMEOUT seconds. Every request goes
+    through the upstream scheduler, which retries 429/5xx.
+
+    The quote and quoteSummary endpoints want a crumb tied to a session cookie,
+    fetched once from YAHOO_HTTP_COOKIE_URL and /v1/test/getcrumb and renewed on
+    a 401. Point YAHOO_HTTP_BASE_URL at `python -m app.adapters.yahoo_replay
+    serve` (with YAHOO_HTTP_COOKIE_URL empty) to run against recorded responses.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url or os.getenv("YAHOO_HTTP_BASE_URL", "https://query1.finance.yahoo.com")
+        self.cookie_url = os.getenv("YAHOO_HTTP_COOKIE_URL", "https://fc.yahoo.com")
+        self.connect_timeout = float(os.getenv("YAHOO_HTTP_CONNECT_TIMEOUT", "2"))
+        self.timeout = float(os.getenv("YAHOO_HTTP_TIMEOUT", "5"))
+        self.max_connections = int(os.getenv("YAHOO_HTTP_MAX_CONNECTIONS", "20"))
+        self.max_keepalive = int(os.getenv("YAHOO_HTTP_MAX_KEEPALIVE", "10"))
+        self.keepalive_seconds = float(os.getenv("YAHOO_HTTP_KEEPALIVE_SECONDS", "30"))
+        self.quote_batch_size = int(os.getenv("YAHOO_HTTP_QUOTE_BATCH_SIZE", "100"))
+        self._transport = transport
+        self._http: Optional[httpx.AsyncClient] = None
+        self._crumb: Optional[str] = None
+        self._crumb_lock: Optional[asyncio.Lock] = None
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.requests = 0
+        self.connections_opened = 0
+        self.timeouts = 0
+        self.errors: Dict[int, int] = {}
+
+    async def get_historical_data(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict[str, Any]]:
+        return (await self.get_historical_series(ticker, start_date, end_date)).to_rows()
+
+    async def get_historical_series(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> BarSeries:
+        # Default to last year if no dates provided
+        start_date = start_date or (datetime.now() - timedelta(days=365)).date()
+        end_date = end_date or datetime.now().date()
+        body = await self._request(f"/v8/finance/chart/{ticker}", {
+            "period1": day_timestamp(start_date),
+            "period2": day_timestamp(end_date),
+            "interval": "1d",
+            "events": "div,split",
+            "includeAdjustedClose": "true",
+        })
+        return self._chart_series(body)
+
+    async def get_financial_data(self, ticker: str) -> Dict[str, Any]:
+        body = await self._request(
+            f"/v10/finance/quoteSummary/{ticker}", {"modules": SUMMARY_MODULES, "formatted": "false"}, crumb=True
+        )
+        result = (body.get("quoteSummary") or {}).get("result") or []
+        if not result:
+            raise YahooHttpError(404, f"No fundamentals for {ticker}")
+        return self._financials(ticker, result[0])
+
+    async def get_peer_companies(self, industry: str) -> List[Dict[str, Any]]:
+        peers = INDUSTRY_PEERS.get(industry, [])
+        if not peers:
+            return []
+        data, _ = await self.get_financial_data_batch(peers)
+        return [
+            {field: data[ticker].get(field) for field in ["ticker", "name", "sector", "industry", "market_cap", "pe_ratio", "pb_ratio"]}
+            for ticker in peers
+            if ticker in data
+        ]
+
+    async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
+        """Search matches, priced by one multi-symbol quote request instead of a lookup per match"""
+        body = await self._request("/v1/finance/search", {
+            "q": query, "quotesCount": SEARCH_LIMIT, "newsCount": 0, "listsCount": 0,
+        })
+        matches = [item for item in body.get("quotes") or [] if item.get("symbol")][:SEARCH_LIMIT]
+        priced = [item["symbol"] for item in matches if item.get("quoteType") in ["EQUITY", "ETF"]]
+        quotes, _ = await self._raw_quotes(priced) if priced else ({}, {})
+
+        result = []
+        for item in matches:
+            symbol = item["symbol"]
+            result_item = {
+                "ticker": symbol,
+                "name": item.get("shortname") or item.get("longname", ""),
+                "exchange": item.get("exchange", ""),
+                "type": item.get("quoteType", ""),
+                "exchange_display": item.get("exchDisp", ""),
+            }
+            quote = quotes.get(symbol)
+            if quote:
+                result_item.update({
+                    "sector": item.get("sector", ""),
+                    "industry": item.get("industry", ""),
+                    "market_cap": quote.get("marketCap"),
+                    "price": quote.get("regularMarketPrice"),
+                    "currency": quote.get("currency", "USD"),
+                    "pe_ratio": quote.get("trailingPE"),
+                    "dividend_yield": percent(quote.get("trailingAnnualDividendYield")),
+                })
+                if item.get("quoteType") == "ETF":
+                    result_item["asset_class"] = "ETF"
+            result.append(result_item)
+
+        # Sort results by market cap if available
+        return sorted(result, key=lambda x: x.get("market_cap") or 0, reverse=True)
+
+    async def get_trending_stocks(self, count: Optional[int] = 5) -> List[Dict[str, Any]]:
+        count = count or 5
+        # A few extra in case some have no quote
+        body = await self._request("/v1/finance/trending/US", {"count": count + 5})
+        results = (body.get("finance") or {}).get("result") or []
+        symbols = [item["symbol"] for item in (results[0].get("quotes") or [] if results else []) if item.get("symbol")]
+        quotes, _ = await self._raw_quotes(symbols) if symbols else ({}, {})
+
+        result = []
+        for symbol in symbols:
+            quote = quotes.get(symbol)
+            if not quote or quote.get("regularMarketPrice") is None:
+                continue
+            result.append({
+                "ticker": symbol,
+                "name": quote.get("shortName", ""),
+                # Not part of the quote endpoint's fields
+                "sector": "",
+                "industry": "",
+                "market_cap": quote.get("marketCap"),
+                "price": quote.get("regularMarketPrice"),
+                "change_percent": str(round(quote.get("regularMarketChangePercent") or 0.0, 2)),
+                "currency": quote.get("currency", "USD"),
+                "is_trending": True,
+            })
+            if len(result) >= count:
+                break
+        return result
+
+    async def get_quotes(self, tickers: List[str]) -> BatchResult:
+        quotes, failed = await self._raw_quotes(tickers)
+
+        data, errors = {}, {}
+        for ticker in tickers:
+            quote = quotes.get(ticker)
+            if ticker in failed:
+                errors[ticker] = failed[ticker]
+                continue
+            if quote is None or quote.get("regularMarketPrice") is None:
+                errors[ticker] = "No quote returned"
+                continue
+            market_time = quote.get("regularMarketTime")
+            if isinstance(market_time, (int, float)):
+                market_time = datetime.fromtimestamp(market_time, tz=timezone.utc)
+            data[ticker] = build_quote(
+                ticker,
+                quote.get("regularMarketPrice"),
+                quote.get("regularMarketPreviousClose"),
+                volume=quote.get("regularMarketVolume"),
+                market_time=market_time,
+                currency=quote.get("currency", "USD"),
+            )
+        return data, errors
+
+    async def _raw_quotes(self, symbols: List[str]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """
+        /v7/finance/quote results by symbol, and the error of each symbol whose request failed.
+
+        Symbols are sent YAHOO_HTTP_QUOTE_BATCH_SIZE per request, requests in
+        parallel. Raises if every request failed.
+        """
+        chunks = [symbols[i:i + self.quote_batch_size] for i in range(0, len(symbols), self.quote_batch_size)]
+        bodies = await asyncio.gather(*[
+            self._request("/v7/finance/quote", {"symbols": ",".join(chunk)}, crumb=True) for chunk in chunks
+        ], return_exceptions=True)
+        if bodies and all(isinstance(body, Exception) for body in bodies):
+            raise bodies[0]
+
+        quotes, failed = {}, {}
+        for chunk, body in zip(chunks, bodies):
+            if isinstance(body, Exception):
+                failed.update({symbol: str(body) or body.__class__.__name__ for symbol in chunk})
+                continue
+            for quote in (body.get("quoteResponse") or {}).get("result") or []:
+                quotes[quote.get("symbol")] = quote
+        return quotes, failed
+
+    async def _request(self, path: str, params: Dict[str, Any], crumb: bool = False) -> Dict[str, Any]:
+        """GET a JSON endpoint through the upstream scheduler"""
+        return await get_scheduler().call(lambda: self._get_json(path, params, crumb))
+
+    async def _get_json(self, path: str, params: Dict[str, Any], crumb: bool = False) -> Dict[str, Any]:
+        client = self._client()
+        params = dict(params)
+        for attempt in range(2):
+            if crumb:
+                params["crumb"] = await self._get_crumb()
+            started = time.monotonic()
+            try:
+                response = await client.get(path, params=params, extensions={"trace": self._trace})
+            except httpx.TimeoutException as e:
+                self.timeouts += 1
+                raise DataSourceTimeoutError(f"GET {path} timed out ({e.__class__.__name__})")
+            self.requests += 1
+            self._latencies.append(time.monotonic() - started)
+            if response.status_code == 401 and crumb and attempt == 0:
+                # Crumb expired with its cookie
+                self._crumb = None
+                continue
+            if response.status_code >= 400:
+                self.errors[response.status_code] = self.errors.get(response.status_code, 0) + 1
+                raise YahooHttpError(response.status_code, self._error_message(response))
+            return response.json()
+
+    async def _get_crumb(self) -> str:
+        if self._crumb_lock is None:
+            self._crumb_lock = asyncio.Lock()
+        async with self._crumb_lock:
+            if self._crumb is None:
+                client = self._client()
+                if self.cookie_url:
+                    # Sets the session cookie the crumb belongs to; the page itself is an error
+                    try:
+                        await client.get(self.cookie_url)
+                    except httpx.HTTPError as e:
+                        print(f"Yahoo cookie request failed: {e}")
+                response = await client.get("/v1/test/getcrumb")
+                if response.status_code >= 400:
+                    raise YahooHttpError(response.status_code, "No crumb returned")
+                self._crumb = response.text.strip()
+            return self._crumb
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"User-Agent": USER_AGENT, "Accept": "application/json"},
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=self.keepalive_seconds,
+                ),
+                transport=self._transport,
+            )
+        return self._http
+
+    async def _trace(self, event: str, info: Dict[str, Any]):
+        # Requests on a kept-alive connection skip this event
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    def _error_message(self, response: httpx.Response) -> str:
+        try:
+            body = response.json()
+        except ValueError:
+            return response.reason_phrase
+        # Endpoints wrap errors as {"chart": {"error": {"code": ..., "description": ...}}} and the like
+        for section in body.values() if isinstance(body, dict) else []:
+            error = section.get("error") if isinstance(section, dict) else None
+            if isinstance(error, dict):
+                return error.get("description") or error.get("code") or response.reason_phrase
+        return response.reason_phrase
+
+    def _chart_series(self, body: Dict[str, Any]) -> BarSeries:
+        results = (body.get("chart") or {}).get("result") or []
+        if not results or not results[0].get("timestamp"):
+            return BarSeries.empty()
+        result = results[0]
+        # Bar timestamps are the session open in UTC; the offset gives the exchange's date
+        offset = (result.get("meta") or {}).get("gmtoffset") or 0
+        days = (np.asarray(result["timestamp"], dtype=np.int64) + offset) // 86400
+        indicators = result.get("indicators") or {}
+        quote = (indicators.get("quote") or [{}])[0]
+        # Missing bars come back as nulls, which become NaN
+        prices = {field: np.array(quote.get(field) or [None] * len(days), dtype=np.float64) for field in ["open", "high", "low", "close"]}
+        adjusted = np.array(((indicators.get("adjclose") or [{}])[0]).get("adjclose") or prices["close"], dtype=np.float64)
+        volume = np.nan_to_num(np.array(quote.get("volume") or [None] * len(days), dtype=np.float64))
+
+        keep = np.flatnonzero(~np.isnan(prices["close"]))
+        # Adjust like yfinance's auto_adjust, so the bars match what YahooFinanceAdapter stores
+        ratio = np.where(prices["close"] != 0, adjusted / prices["close"], 1.0)
+        close = adjusted[keep]
+        return BarSeries(
+            days[keep].astype("datetime64[D]"),
+            open=(prices["open"] * ratio)[keep],
+            high=(prices["high"] * ratio)[keep],
+            low=(prices["low"] * ratio)[keep],
+            close=close,
+            volume=volume[keep].astype(np.int64),
+            adjusted_close=close,
+        ).dedupe()  # The live session can be repeated as an extra bar
+
+    def _financials(self, ticker: str, summary: Dict[str, Any]) -> Dict[str, Any]:
+        price = summary.get("price") or {}
+        profile = summary.get("summaryProfile") or {}
+        detail = summary.get("summaryDetail") or {}
+        statistics = summary.get("defaultKeyStatistics") or {}
+        financials = summary.get("financialData") or {}
+        return {
+            "ticker": ticker,
+            "name": price.get("shortName", ""),
+            "sector": profile.get("sector", ""),
+            "industry": profile.get("industry", ""),
+            "pe_ratio": _raw(detail.get("trailingPE")),
+            "pb_ratio": _raw(statistics.get("priceToBook")),
+            "dividend_yield": percent(_raw(detail.get("dividendYield"))),
+            "market_cap": _raw(detail.get("marketCap", price.get("marketCap"))),
+            "eps": _raw(statistics.get("trailingEps")),
+            "revenue": _raw(financials.get("totalRevenue")),
+            "profit_margin": _raw(financials.get("profitMargins", statistics.get("profitMargins"))),
+            "debt_to_equity": _raw(financials.get("debtToEquity")),
+            "roe": _raw(financials.get("returnOnEquity")),
+            "current_ratio": _raw(financials.get("currentRatio")),
+            "date": datetime.now().date()
+        }
+
+    async def aclose(self):
+        if self._http is not None:
+            client, self._http = self._http, None
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        return {
+            "source": type(self).__name__,
+            "base_url": self.base_url,
+            "requests": self.requests,
+            # Fewer connections than requests means keep-alive is reusing them
+            "connections_opened": self.connections_opened,
+            "timeouts": self.timeouts,
+            "errors": {str(status): count for status, count in sorted(self.errors.items())},
+            "latency_ms_p50": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else 0.0,
+            "latency_ms_p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 1) if latencies else 0.0,
+        }
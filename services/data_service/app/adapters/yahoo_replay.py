@@ -0,0 +1,233 @@
+import os
+import re
+import json
+import time
+import asyncio
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date, timedelta
+from urllib.parse import urlsplit, parse_qs
+
+from dotenv import load_dotenv
+
+from app.adapters.yahoo_http import YahooHttpAdapter, SUMMARY_MODULES, day_timestamp
+
+load_dotenv()
+
+CHART_PATH = re.compile(r"^/v8/finance/chart/([^/]+)$")
+SUMMARY_PATH = re.compile(r"^/v10/finance/quoteSummary/([^/]+)$")
+TRENDING_PATH = re.compile(r"^/v1/finance/trending/([^/]+)$")
+
+
+def _file_name(key: str) -> str:
+    """Recording file name for a symbol or search query"""
+    return re.sub(r"[^A-Za-z0-9._^=-]", "_", key) + ".json"
+
+
+class ReplayStore:
+    """
+    Recorded Yahoo responses in a directory, answering requests like the live endpoints.
+
+    Layout: chart/SYMBOL.json and quoteSummary/SYMBOL.json hold whole response
+    bodies, quote/SYMBOL.json one /v7/finance/quote result, search/QUERY.json
+    and trending/REGION.json whole bodies. A chart request gets the recorded
+    bars between its period1 and period2, and a quote request the recorded
+    results of the symbols it names, so recordings serve any date range and
+    any batching. Unknown symbols get Yahoo's 404 body, unknown queries no matches.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._cache: Dict[str, Any] = {}
+
+    def respond(self, path: str, query: Dict[str, List[str]]) -> Tuple[int, Dict[str, Any]]:
+        """Status and JSON body for a GET of path with the parsed query string"""
+        match = CHART_PATH.match(path)
+        if match:
+            body = self._load("chart", match.group(1))
+            if body is None:
+                return 404, {"chart": {"result": None, "error": {"code": "Not Found", "description": "No data found, symbol may be delisted"}}}
+            return 200, self._slice_chart(body, int(query.get("period1", ["0"])[0]), int(query.get("period2", [str(2 ** 40)])[0]))
+
+        if path == "/v7/finance/quote":
+            symbols = [symbol for symbol in query.get("symbols", [""])[0].split(",") if symbol]
+            results = [quote for quote in (self._load("quote", symbol) for symbol in symbols) if quote is not None]
+            return 200, {"quoteResponse": {"result": results, "error": None}}
+
+        match = SUMMARY_PATH.match(path)
+        if match:
+            body = self._load("quoteSummary", match.group(1))
+            if body is None:
+                return 404, {"quoteSummary": {"result": None, "error": {"code": "Not Found", "description": f"Quote not found for symbol: {match.group(1)}"}}}
+            return 200, body
+
+        if path == "/v1/finance/search":
+            body = self._load("search", query.get("q", [""])[0].lower())
+            return 200, body if body is not None else {"quotes": [], "news": [], "count": 0}
+
+        match = TRENDING_PATH.match(path)
+        if match:
+            body = self._load("trending", match.group(1))
+            return 200, body if body is not None else {"finance": {"result": [{"count": 0, "quotes": []}], "error": None}}
+
+        return 404, {"finance": {"result": None, "error": {"code": "Not Found", "description": f"No recording for {path}"}}}
+
+    def save(self, kind: str, key: str, body: Any):
+        os.makedirs(os.path.join(self.directory, kind), exist_ok=True)
+        with open(os.path.join(self.directory, kind, _file_name(key)), "w") as file:
+            json.dump(body, file)
+
+    def _load(self, kind: str, key: str) -> Optional[Any]:
+        path = os.path.join(self.directory, kind, _file_name(key))
+        if path not in self._cache:
+            if not os.path.exists(path):
+                return None
+            with open(path) as file:
+                self._cache[path] = json.load(file)
+        return self._cache[path]
+
+    def _slice_chart(self, body: Dict[str, Any], period1: int, period2: int) -> Dict[str, Any]:
+        result = dict(body["chart"]["result"][0])
+        timestamps = result.get("timestamp") or []
+        keep = [i for i, timestamp in enumerate(timestamps) if period1 <= timestamp < period2]
+        result["timestamp"] = [timestamps[i] for i in keep]
+        indicators = result.get("indicators") or {}
+        result["indicators"] = {
+            name: [{field: [values[i] for i in keep] for field, values in series.items()} for series in entries]
+            for name, entries in indicators.items()
+        }
+        return {"chart": {"result": [result], "error": None}}
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """HTTP/1.1 server over a ReplayStore, with per-request and per-connection latency"""
+
+    daemon_threads = True
+    # The default backlog of 5 drops concurrent connects, which then wait a second for the SYN retry
+    request_queue_size = 128
+
+    def __init__(self, address: Tuple[str, int], store: ReplayStore, latency: float = 0.0, connect_latency: float = 0.0):
+        super().__init__(address, ReplayHandler)
+        self.store = store
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.requests = 0
+        self.connections = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like Yahoo's servers
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; with Nagle a kept-alive connection waits on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+        if self.server.connect_latency:
+            # Stand-in for the TCP and TLS handshakes a pooled connection saves
+            time.sleep(self.server.connect_latency)
+
+    def do_GET(self):
+        self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        url = urlsplit(self.path)
+        if url.path == "/v1/test/getcrumb":
+            self._send(200, b"replay", "text/plain")
+            return
+        status, body = self.server.store.respond(url.path, parse_qs(url.query))
+        self._send(status, json.dumps(body).encode(), "application/json")
+
+    def _send(self, status: int, payload: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any):
+        pass
+
+
+def serve(directory: str, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0, connect_latency_ms: float = 0,
+          background: bool = False) -> ReplayServer:
+    """
+    Start a replay server (port 0 picks a free port; see server.base_url).
+
+    With background=True it runs on a daemon thread and this returns at once;
+    call server.shutdown() to stop it.
+    """
+    server = ReplayServer((host, port), ReplayStore(directory), latency_ms / 1000, connect_latency_ms / 1000)
+    if background:
+        threading.Thread(target=server.serve_forever, name="yahoo-replay", daemon=True).start()
+    else:
+        server.serve_forever()
+    return server
+
+
+async def record(directory: str, tickers: List[str], queries: List[str], years: int = 10, trending: bool = True) -> int:
+    """Fetch live responses for the tickers and search queries into directory; returns the number saved"""
+    store = ReplayStore(directory)
+    source = YahooHttpAdapter()
+    saved = 0
+    try:
+        today = date.today()
+        for ticker in tickers:
+            store.save("chart", ticker, await source._get_json(f"/v8/finance/chart/{ticker}", {
+                "period1": day_timestamp(today - timedelta(days=365 * years)),
+                "period2": day_timestamp(today + timedelta(days=1)),
+                "interval": "1d",
+                "events": "div,split",
+                "includeAdjustedClose": "true",
+            }))
+            store.save("quoteSummary", ticker, await source._get_json(
+                f"/v10/finance/quoteSummary/{ticker}", {"modules": SUMMARY_MODULES, "formatted": "false"}, crumb=True
+            ))
+            saved += 2
+        body = await source._get_json("/v7/finance/quote", {"symbols": ",".join(tickers)}, crumb=True)
+        for quote in (body.get("quoteResponse") or {}).get("result") or []:
+            store.save("quote", quote["symbol"], quote)
+            saved += 1
+        for query in queries:
+            store.save("search", query.lower(), await source._get_json("/v1/finance/search", {
+                "q": query, "quotesCount": 10, "newsCount": 0, "listsCount": 0,
+            }))
+            saved += 1
+        if trending:
+            store.save("trending", "US", await source._get_json("/v1/finance/trending/US", {"count": 25}))
+            saved += 1
+    finally:
+        await source.aclose()
+    return saved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record Yahoo responses and replay them for DATA_SOURCE=yahoo_http")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="Fetch live responses into the directory")
+    record_parser.add_argument("tickers", nargs="+")
+    record_parser.add_argument("--search", action="append", default=[], help="Search query to record (repeatable)")
+    record_parser.add_argument("--years", type=int, default=10)
+    serve_parser = commands.add_parser("serve", help="Serve the recorded responses over HTTP")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--latency-ms", type=float, default=0)
+    serve_parser.add_argument("--connect-latency-ms", type=float, default=0)
+    for command in (record_parser, serve_parser):
+        command.add_argument("--directory", default=os.getenv("YAHOO_REPLAY_DIR", "recordings"))
+    args = parser.parse_args()
+
+    if args.command == "record":
+        count = asyncio.run(record(args.directory, args.tickers, args.search, args.years))
+        print(f"Recorded {count} responses to {args.directory}")
+    else:
+        print(f"Replaying {args.directory} on http://{args.host}:{args.port}")
+        serve(args.directory, args.host, args.port, args.latency_ms, args.connect_latency_ms)
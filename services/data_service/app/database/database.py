@@ -1,7 +1,11 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,12 +13,47 @@ load_dotenv()
 # Get database URL from environment variable or use default
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/valuecompass")
 
-# Create SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+# Connection pool per engine: kept-open connections, extra ones allowed under load,
+# seconds to wait for a free connection, and a liveness check before each checkout
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Asyncio drivers for the async engine, by backend
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def pool_options(url: str) -> dict:
+    """Pool settings for a server database; SQLite keeps SQLAlchemy's own pooling"""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def async_database_url(url: str) -> str:
+    """The same database through its asyncio driver (asyncpg for PostgreSQL, aiosqlite for SQLite)"""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS[parsed.get_backend_name()]).render_as_string(hide_password=False)
+
+
+# Create SQLAlchemy engine; used by startup and background tasks
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL))
+
+# Async engine for request handlers, so queries do not block the event loop
+async_engine = create_async_engine(async_database_url(DATABASE_URL), **pool_options(DATABASE_URL))
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Loaded attributes stay readable after commit, which handlers use to release the connection early
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class
 Base = declarative_base()
 
@@ -25,3 +64,38 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def insert_for(db: Session):
+    """Dialect-specific INSERT construct supporting ON CONFLICT upserts"""
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite_insert
+    return postgresql_insert
+
+def upgrade_schema():
+    """Apply schema changes that create_all cannot make to tables that already exist"""
+    inspector = inspect(engine)
+
+    # Unique (stock_id, date) on historical_data; drop duplicate bars before adding it
+    unique_names = {c["name"] for c in inspector.get_unique_constraints("historical_data")}
+    unique_names.update(i["name"] for i in inspector.get_indexes("historical_data") if i.get("unique"))
+    if "uq_historical_data_stock_date" not in unique_names:
+        with engine.begin() as conn:
+            conn.execute(text(
+                "DELETE FROM historical_data WHERE id NOT IN "
+                "(SELECT MIN(id) FROM historical_data GROUP BY stock_id, date)"
+            ))
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_historical_data_stock_date "
+                "ON historical_data (stock_id, date)"
+            ))
+
+    # Snapshot refresh timestamp used by the fundamentals cache
+    financial_columns = {c["name"] for c in inspector.get_columns("financial_data")}
+    if "fetched_at" not in financial_columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE financial_data ADD COLUMN fetched_at TIMESTAMP"))
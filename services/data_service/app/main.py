@@ -1,11 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
-from app.routers import historical, financials, peers
-from app.database.database import engine, Base
+from app.routers import historical, financials, peers, metrics, quotes, derived, returns
+from app.database.database import engine, Base, upgrade_schema
+from app.adapters.executor import get_executor
+from app.adapters.factory import close_data_source
+from app.adapters.scheduler import upstream_lane, parse_lane
+from app.services.peer_index import peer_index
+from app.services.symbol_index import symbol_index
+from app.services.trending_snapshot import trending_snapshot
+from app.services.quote_hub import quote_hub
+from app.services.write_behind import write_behind
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+upgrade_schema()
 
 app = FastAPI(
     title="Value Compass Data Service",
@@ -20,13 +30,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Snapshot-Age", "X-Snapshot-Time", "ETag", "Last-Modified"],
 )
 
+# Compress responses for clients that send Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+@app.middleware("http")
+async def upstream_priority(request: Request, call_next):
+    """Put upstream calls made for this request in the lane named by X-Upstream-Priority"""
+    upstream_lane.set(parse_lane(request.headers.get("x-upstream-priority")))
+    return await call_next(request)
+
 # Include routers
 app.include_router(historical.router, prefix="/stocks", tags=["Historical Data"])
 app.include_router(financials.router, prefix="/stocks", tags=["Financial Data"])
+app.include_router(quotes.router, prefix="/stocks", tags=["Quotes"])
+app.include_router(derived.router, prefix="/stocks", tags=["Derived Metrics"])
+app.include_router(returns.router, prefix="/stocks", tags=["Returns Matrix"])
 app.include_router(peers.router, prefix="/industry", tags=["Industry Data"])
+app.include_router(metrics.router, tags=["Metrics"])
 
 @app.get("/", tags=["Root"])
 async def read_root():
     return {"message": "Welcome to the Value Compass Data Service API"}
+
+@app.on_event("startup")
+async def startup_event():
+    """Start the background refresh of the in-memory indexes and snapshots, the quote poller and the write-behind flushes"""
+    write_behind.start()
+    peer_index.start()
+    symbol_index.start()
+    trending_snapshot.start()
+    quote_hub.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks, write what the write-behind buffer still holds and release the data source's threads and connections"""
+    await peer_index.stop()
+    await symbol_index.stop()
+    await trending_snapshot.stop()
+    await quote_hub.stop()
+    # After the quote poller, whose last quotes go through the buffer
+    await write_behind.stop()
+    get_executor().shutdown()
+    await close_data_source()
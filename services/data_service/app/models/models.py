@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Table
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, JSON, ForeignKey, Table, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import date
 
@@ -18,9 +18,13 @@ class Stock(Base):
     # Relationships
     historical_data = relationship("HistoricalData", back_populates="stock")
     financial_data = relationship("FinancialData", back_populates="stock")
+    historical_coverage = relationship("HistoricalCoverage", back_populates="stock")
 
 class HistoricalData(Base):
     __tablename__ = "historical_data"
+    __table_args__ = (
+        UniqueConstraint("stock_id", "date", name="uq_historical_data_stock_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     stock_id = Column(Integer, ForeignKey("stocks.id"))
@@ -35,6 +39,18 @@ class HistoricalData(Base):
     # Relationships
     stock = relationship("Stock", back_populates="historical_data")
 
+class HistoricalCoverage(Base):
+    """Date ranges (inclusive) for which historical_data holds every available bar"""
+    __tablename__ = "historical_coverage"
+
+    id = Column(Integer, primary_key=True, index=True)
+    stock_id = Column(Integer, ForeignKey("stocks.id"), index=True)
+    start_date = Column(Date)
+    end_date = Column(Date)
+
+    # Relationships
+    stock = relationship("Stock", back_populates="historical_coverage")
+
 class FinancialData(Base):
     __tablename__ = "financial_data"
 
@@ -51,6 +67,50 @@ class FinancialData(Base):
     profit_margin = Column(Float)
     roe = Column(Float)
     current_ratio = Column(Float)
+    fetched_at = Column(DateTime, nullable=True)  # When the snapshot was last refreshed
     
     # Relationships
     stock = relationship("Stock", back_populates="financial_data")
+
+class TrendingSnapshot(Base):
+    __tablename__ = "trending_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    fetched_at = Column(DateTime, index=True)
+    stocks = Column(JSON)  # Trending stocks in rank order, as served by /industry/trending
+
+class LatestQuote(Base):
+    """The most recent quote per ticker, kept current by the quote store"""
+    __tablename__ = "latest_quotes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ticker = Column(String, unique=True, index=True)
+    price = Column(Float)
+    previous_close = Column(Float)
+    change = Column(Float)
+    change_percent = Column(Float)
+    volume = Column(BigInteger)
+    currency = Column(String)
+    market_time = Column(DateTime)  # Time of the last trade, as reported by the source
+    fetched_at = Column(DateTime)  # When the quote was fetched
+
+class DerivedMetric(Base):
+    """Per-bar metrics computed from the stored bars when they are ingested"""
+    __tablename__ = "derived_metrics"
+    __table_args__ = (
+        UniqueConstraint("stock_id", "date", name="uq_derived_metrics_stock_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    stock_id = Column(Integer, ForeignKey("stocks.id"), index=True)
+    date = Column(Date, index=True)
+    log_return = Column(Float)  # Log return of the adjusted close since the previous bar
+    volatility_20 = Column(Float)  # Annualized standard deviation of the last 20 log returns
+    volatility_60 = Column(Float)
+    volatility_252 = Column(Float)
+    high_52w = Column(Float)  # Highest high of the last 252 bars
+    low_52w = Column(Float)
+    max_drawdown_52w = Column(Float)  # Largest peak-to-trough fall of the adjusted close in the last 252 bars (negative)
+    momentum_63 = Column(Float)  # Adjusted close return over the last 63 bars
+    momentum_252 = Column(Float)
+    momentum_12_1 = Column(Float)  # Return from 252 bars ago to 21 bars ago
@@ -0,0 +1,86 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException, Body, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import List, Dict, Any, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+
+from app.database.database import get_async_db
+from app.adapters.factory import get_data_source
+from app.services.historical_store import HistoricalStore
+from app.services.batch import normalize_tickers
+from app.services.derived_metrics import refresh_derived_metrics, latest_derived_metrics
+from app.services.http_cache import conditional_response
+from app.services.write_behind import write_behind
+
+load_dotenv()
+
+router = APIRouter()
+
+# Bars kept in store for the metrics: a 252-session window plus holidays
+DERIVED_METRICS_HISTORY_DAYS = int(os.getenv("DERIVED_METRICS_HISTORY_DAYS", "400"))
+
+
+async def load_derived_metrics(tickers: List[str], db: AsyncSession) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """Latest metrics per ticker, after storing any missing completed sessions of the metrics window"""
+    today = datetime.now().date()
+    store = HistoricalStore(db, get_data_source())
+    stock_ids, errors = await store.ensure_bars(tickers, today - timedelta(days=DERIVED_METRICS_HISTORY_DAYS), today)
+
+    # Metrics are computed as bars are written, so fetched bars still in the buffer are written first
+    if write_behind.pending("bars", stock_ids.values()):
+        await write_behind.flush()
+    # Bars stored before the metrics existed get theirs on first read
+    await db.run_sync(refresh_derived_metrics, list(stock_ids.values()))
+    await db.commit()
+    data = await db.run_sync(latest_derived_metrics, stock_ids)
+    await db.commit()
+
+    for ticker in stock_ids:
+        if ticker not in data:
+            errors[ticker] = "No price history"
+    return data, errors
+
+@router.get("/{ticker}/derived", response_model=Dict[str, Any])
+async def get_derived_metrics(request: Request, ticker: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get the latest derived metrics for a ticker.
+
+    Log return, annualized volatility over 20/60/252 sessions, 52-week high and
+    low, maximum drawdown over 52 weeks and 63/252-session and 12-1 month
+    momentum, all as of "date". They are computed when bars are ingested, so
+    this reads one row; metrics whose window is not yet filled are null.
+    Responses carry an ETag and the metrics date as Last-Modified.
+    """
+    ticker = ticker.upper()
+
+    try:
+        data, errors = await load_derived_metrics([ticker], db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve derived metrics: {str(e)}")
+
+    if ticker not in data:
+        raise HTTPException(status_code=404, detail=f"No derived metrics available for {ticker}: {errors.get(ticker)}")
+    response = JSONResponse(content=jsonable_encoder(data[ticker]))
+    return conditional_response(request, response, last_modified=data[ticker]["date"])
+
+@router.post("/batch/derived", response_model=Dict[str, Any])
+async def get_derived_metrics_batch(
+    tickers: List[str] = Body(..., description="Tickers to fetch"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the latest derived metrics for many tickers in one call.
+
+    Returns {"data": {ticker: metrics}, "errors": {ticker: message}}.
+    """
+    tickers = normalize_tickers(tickers)
+
+    try:
+        data, errors = await load_derived_metrics(tickers, db)
+        return {"data": data, "errors": errors}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve derived metrics: {str(e)}")
@@ -1,76 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Dict, Any
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Body, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import List, Dict, Any
 from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.database import get_db
+from app.database.database import get_async_db
 from app.adapters.factory import get_data_source
-from app.models.models import Stock, FinancialData
+from app.services.fundamentals_cache import fundamentals_cache
+from app.services.batch import normalize_tickers
+from app.services.http_cache import conditional_response, snapshot_etag
 
 router = APIRouter()
 
 @router.get("/{ticker}/financials", response_model=Dict[str, Any])
-async def get_financial_data(ticker: str, db: Session = Depends(get_db)):
-    """Get financial data for a specific ticker"""
+async def get_financial_data(request: Request, ticker: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get financial data for a specific ticker.
+
+    Served from the fundamentals cache; entries older than FUNDAMENTALS_TTL_SECONDS
+    are returned as-is and refreshed in the background. The "freshness" field
+    reports when each value was fetched.
+
+    The ETag identifies the snapshot (values and fetch times) and Last-Modified
+    is the newest fetch time; a matching If-None-Match gets 304 Not Modified.
+    The ETag is weak because the freshness ages in the body change over time.
+    """
     ticker = ticker.upper()
     
     try:
-        # Get data from the adapter
-        data_source = get_data_source()
-        data = await data_source.get_financial_data(ticker)
-        
-        # Check if we have data for this stock in the database
-        stock = db.query(Stock).filter(Stock.ticker == ticker).first()
-        
-        # If stock doesn't exist, create it
-        if not stock:
-            stock = Stock(
-                ticker=ticker,
-                name=data.get("name", ""),
-                sector=data.get("sector", ""),
-                industry=data.get("industry", ""),
-                country=data.get("country", ""),
-                last_updated=datetime.now().date()
-            )
-            db.add(stock)
-            db.commit()
-            db.refresh(stock)
-        else:
-            # Update stock information
-            stock.name = data.get("name", stock.name)
-            stock.sector = data.get("sector", stock.sector)
-            stock.industry = data.get("industry", stock.industry)
-            stock.last_updated = datetime.now().date()
-            db.commit()
-        
-        # Store financial data in database
-        today = datetime.now().date()
-        
-        # Check if we already have financial data for today
-        existing = db.query(FinancialData).filter(
-            FinancialData.stock_id == stock.id,
-            FinancialData.date == today
-        ).first()
-        
-        if not existing:
-            financial_data = FinancialData(
-                stock_id=stock.id,
-                date=today,
-                pe_ratio=data.get("pe_ratio"),
-                pb_ratio=data.get("pb_ratio"),
-                dividend_yield=data.get("dividend_yield"),
-                market_cap=data.get("market_cap"),
-                eps=data.get("eps"),
-                revenue=data.get("revenue"),
-                debt_to_equity=data.get("debt_to_equity"),
-                profit_margin=data.get("profit_margin"),
-                roe=data.get("roe"),
-                current_ratio=data.get("current_ratio")
-            )
-            db.add(financial_data)
-            db.commit()
-        
-        return data
+        result = await fundamentals_cache.get(ticker, db, get_data_source())
+        freshness = result.get("freshness", {})
+        as_of = {field: value["as_of"] for field, value in freshness.items()}
+        snapshot = {key: value for key, value in result.items() if key != "freshness"}
+        response = JSONResponse(content=jsonable_encoder(result))
+        return conditional_response(
+            request,
+            response,
+            etag=snapshot_etag([jsonable_encoder(snapshot), as_of]),
+            last_modified=datetime.fromisoformat(max(as_of.values())) if as_of else None
+        )
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve financial data: {str(e)}")
+
+@router.post("/batch/financials", response_model=Dict[str, Any])
+async def get_financial_data_batch(
+    tickers: List[str] = Body(..., description="Tickers to fetch"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get financial data for many tickers in one call.
+
+    Returns {"data": {ticker: financials}, "errors": {ticker: message}}; tickers
+    that fail are reported in "errors" without failing the whole batch.
+    """
+    tickers = normalize_tickers(tickers)
+
+    try:
+        data, errors = await fundamentals_cache.get_many(tickers, db, get_data_source())
+        return {"data": data, "errors": errors}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve financial data: {str(e)}")
@@ -1,73 +1,105 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Request
 from typing import List, Dict, Any, Optional
-from datetime import date, datetime
-from sqlalchemy.orm import Session
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.database import get_db
+from app.database.database import get_async_db
 from app.adapters.factory import get_data_source
-from app.models.models import Stock, HistoricalData
+from app.services.historical_store import HistoricalStore, apply_since
+from app.services.batch import normalize_tickers
+from app.services.historical_format import parse_fields, parse_format, historical_response, historical_batch_response
+from app.services.resample import parse_interval, parse_max_points, resample, lttb
+from app.services.http_cache import conditional_response
 
 router = APIRouter()
 
+
+def parse_since(since: Optional[date], interval: str, max_points: Optional[int]) -> Optional[date]:
+    # Aggregated or decimated bars depend on bars before the cursor, so they cannot be appended
+    if since and (interval != "1d" or max_points):
+        raise HTTPException(status_code=400, detail="since can only be used with interval=1d and without max_points")
+    return since
+
+
 @router.get("/{ticker}/historical", response_model=List[Dict[str, Any]])
 async def get_historical_data(
+    request: Request,
     ticker: str,
     start_date: Optional[date] = Query(None, description="Start date for historical data"),
-    end_date: Optional[date] = Query(None, description="End date for historical data"),
-    db: Session = Depends(get_db)
+    end_date: Optional[date] = Query(None, description="End date for historical data (exclusive)"),
+    format: str = Query("rows", description="rows (list of bars), columnar (array per field) or arrow (Arrow IPC stream)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. date,close"),
+    interval: str = Query("1d", description="Bar size: 1d, 1wk or 1mo (aggregated from stored daily bars)"),
+    max_points: Optional[int] = Query(None, description="Decimate to at most this many bars (LTTB on close)"),
+    since: Optional[date] = Query(None, description="Only return bars dated after this day (the client's last stored bar)"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get historical price data for a specific ticker"""
+    """
+    Get historical price data for a specific ticker.
+
+    Bars are served from the database; only date ranges missing from the
+    coverage ledger are requested from the data source. Weekly and monthly bars
+    and decimated series are computed from the stored daily bars.
+
+    Responses carry a strong ETag and the date of the latest bar as
+    Last-Modified; a matching If-None-Match gets 304 Not Modified. With since=
+    only the bars after that date are returned, for clients that append to a
+    copy they already hold. The latest bar may still change while its session
+    is open, so clients should pass the date before their last bar.
+    """
     ticker = ticker.upper()
-    
+    format = parse_format(format)
+    selected = parse_fields(fields)
+    interval = parse_interval(interval)
+    max_points = parse_max_points(max_points)
+    start_date = apply_since(start_date, parse_since(since, interval, max_points))
+
+    try:
+        store = HistoricalStore(db, get_data_source())
+        series = await store.get_historical_series(ticker, start_date, end_date)
+        latest = series.dates[-1].astype("datetime64[D]").item() if len(series) else None
+        series = resample(series, interval)
+        if max_points:
+            series = lttb(series, max_points)
+        return conditional_response(request, historical_response(series, format, selected), last_modified=latest)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve historical data: {str(e)}")
+
+@router.post("/batch/historical", response_model=Dict[str, Any])
+async def get_historical_data_batch(
+    tickers: List[str] = Body(..., description="Tickers to fetch"),
+    start_date: Optional[date] = Query(None, description="Start date for historical data"),
+    end_date: Optional[date] = Query(None, description="End date for historical data (exclusive)"),
+    format: str = Query("rows", description="rows, columnar or arrow (one table with a ticker column)"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. date,close"),
+    interval: str = Query("1d", description="Bar size: 1d, 1wk or 1mo (aggregated from stored daily bars)"),
+    max_points: Optional[int] = Query(None, description="Decimate each series to at most this many bars (LTTB on close)"),
+    since: Optional[date] = Query(None, description="Only return bars dated after this day (the client's last stored bar)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get historical price data for many tickers in one call.
+
+    Returns {"data": {ticker: [bars]}, "errors": {ticker: message}}; tickers that
+    fail are reported in "errors" without failing the whole batch. With
+    format=arrow the errors are in the "errors" schema metadata as JSON.
+    With since= only the bars after that date are returned for every ticker.
+    """
+    tickers = normalize_tickers(tickers)
+    format = parse_format(format)
+    selected = parse_fields(fields)
+    interval = parse_interval(interval)
+    max_points = parse_max_points(max_points)
+    start_date = apply_since(start_date, parse_since(since, interval, max_points))
+
     try:
-        # Get data from the adapter
-        data_source = get_data_source()
-        data = await data_source.get_historical_data(ticker, start_date, end_date)
-        
-        # Check if we have data for this stock in the database
-        stock = db.query(Stock).filter(Stock.ticker == ticker).first()
-        
-        # If stock doesn't exist, create it
-        if not stock:
-            # Get financial data to get company details
-            financial_data = await data_source.get_financial_data(ticker)
-            
-            stock = Stock(
-                ticker=ticker,
-                name=financial_data.get("name", ""),
-                sector=financial_data.get("sector", ""),
-                industry=financial_data.get("industry", ""),
-                country=financial_data.get("country", ""),
-                last_updated=datetime.now().date()
-            )
-            db.add(stock)
-            db.commit()
-            db.refresh(stock)
-        
-        # Store historical data in database
-        for item in data:
-            # Check if we already have this data point
-            existing = db.query(HistoricalData).filter(
-                HistoricalData.stock_id == stock.id,
-                HistoricalData.date == item["date"]
-            ).first()
-            
-            if not existing:
-                hist_data = HistoricalData(
-                    stock_id=stock.id,
-                    date=item["date"],
-                    open=item["open"],
-                    high=item["high"],
-                    low=item["low"],
-                    close=item["close"],
-                    volume=item["volume"],
-                    adjusted_close=item["adjusted_close"]
-                )
-                db.add(hist_data)
-        
-        db.commit()
-        
-        return data
-    
+        store = HistoricalStore(db, get_data_source())
+        data, errors = await store.get_historical_series_batch(tickers, start_date, end_date)
+        data = {ticker: resample(series, interval) for ticker, series in data.items()}
+        if max_points:
+            data = {ticker: lttb(series, max_points) for ticker, series in data.items()}
+        return historical_batch_response(data, errors, format, selected)
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve historical data: {str(e)}")
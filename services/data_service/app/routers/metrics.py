@@ -0,0 +1,47 @@
+from fastapi import APIRouter
+from typing import Dict, Any
+
+from app.adapters.executor import get_executor
+from app.adapters.factory import get_data_source
+from app.adapters.scheduler import get_scheduler
+from app.services.singleflight import single_flight_stats
+from app.services.peer_index import peer_index
+from app.services.symbol_index import symbol_index
+from app.services.trending_snapshot import trending_snapshot
+from app.services.quote_hub import quote_hub
+from app.services.quote_store import quote_store
+from app.services.price_store import price_store
+from app.services.returns_matrix import returns_matrix
+from app.services.write_behind import write_behind
+
+router = APIRouter()
+
+@router.get("/metrics", response_model=Dict[str, Any])
+async def get_metrics():
+    """
+    Get internal counters for the upstream data path.
+
+    "single_flight" reports, per data kind, how many ticker requests reached the
+    coalescing layer, how many upstream executions they caused and how many were
+    served by joining a fetch already in flight. "upstream_scheduler" reports
+    the token bucket, retries and per-lane queue depth and wait times.
+    "write_behind" reports pending records, batch sizes and flush lag.
+    "data_source" reports the configured source's own counters, e.g. requests
+    and connections opened by DATA_SOURCE=yahoo_http. "price_store" reports
+    reads from the memory-mapped price files and the files written.
+    "returns_matrix" reports the rows and sessions held and what was loaded.
+    """
+    return {
+        "single_flight": single_flight_stats(),
+        "executor": get_executor().stats(),
+        "data_source": get_data_source().stats(),
+        "upstream_scheduler": get_scheduler().stats(),
+        "peer_index": peer_index.stats(),
+        "symbol_index": symbol_index.stats(),
+        "trending": trending_snapshot.stats(),
+        "quote_hub": quote_hub.stats(),
+        "quote_store": quote_store.stats(),
+        "write_behind": write_behind.stats(),
+        "price_store": price_store.stats(),
+        "returns_matrix": returns_matrix.stats(),
+    }
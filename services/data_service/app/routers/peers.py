@@ -1,44 +1,98 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.database import get_db
+from app.database.database import get_async_db
 from app.adapters.factory import get_data_source
+from app.services.peer_index import peer_index
+from app.services.symbol_index import symbol_index
+from app.services.trending_snapshot import trending_snapshot
+from app.services.quote_store import quote_store
 
 router = APIRouter()
 
 @router.get("/{industry}/peers", response_model=List[Dict[str, Any]])
-async def get_industry_peers(industry: str, db: Session = Depends(get_db)):
-    """Get peer companies for a specific industry"""
+async def get_industry_peers(
+    industry: str,
+    limit: Optional[int] = Query(50, description="Maximum number of peers to return, largest first"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get peer companies for a specific industry (or sector), ranked by market cap.
+
+    Peers come from the in-memory peer index with their latest ratios; the data
+    source is only asked for industries the index does not know yet.
+    """
     try:
-        # Get data from the adapter
-        data_source = get_data_source()
-        data = await data_source.get_peer_companies(industry)
+        data = peer_index.get(industry)
+        if data is None:
+            # Get data from the adapter
+            data_source = get_data_source()
+            data = await data_source.get_peer_companies(industry)
+        
+        # Limit results if specified
+        if limit and len(data) > limit:
+            data = data[:limit]
         
         return data
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve peer companies: {str(e)}")
 
+def with_quote(item: Dict[str, Any], quote: Optional[Dict[str, Any]], include_quote: bool) -> Dict[str, Any]:
+    """A search result with the price and currency of its quote, and the quote itself if asked for"""
+    result = dict(item)
+    if quote is not None:
+        result["price"] = quote.get("price")
+        result["currency"] = quote.get("currency")
+    else:
+        result.setdefault("price", None)
+        result.setdefault("currency", None)
+    if include_quote:
+        result["quote"] = quote
+    return result
+
 @router.get("/search", response_model=List[Dict[str, Any]])
 async def search_stocks(
     query: str, 
     limit: Optional[int] = Query(10, description="Maximum number of results to return"),
-    db: Session = Depends(get_db)
+    include_quotes: bool = Query(False, description="Add each result's latest quote"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Search for stocks by name or ticker.
     
-    This endpoint uses yahooquery to search for stocks and provides autocomplete functionality.
+    Autocomplete is answered from the local symbol index. The data source search
+    is also asked when the index has fewer than limit matches or only fuzzy
+    ones; its results are added to the index and each query is sent upstream at
+    most once per SYMBOL_SEARCH_UPSTREAM_TTL_SECONDS. Each result has the price
+    and currency of its latest quote from the quote store; with include_quotes
+    it also gets the whole "quote" (null if none is available).
     """
     try:
-        # Get data from the adapter
-        data_source = get_data_source()
-        data = await data_source.search_stocks(query)
+        limit = limit or 10
+        data, prefix_matched = symbol_index.match(query, limit)
+        if (len(data) < limit or not prefix_matched) and not symbol_index.searched_upstream(query):
+            # Get data from the adapter
+            data_source = get_data_source()
+            upstream = await data_source.search_stocks(query)
+            if upstream:
+                symbol_index.add(upstream)
+            symbol_index.record_upstream_search(query)
+            # Upstream matches rank above local ones that only matched by trigrams
+            merged: Dict[str, Dict[str, Any]] = {}
+            for item in (data + upstream if prefix_matched else upstream + data):
+                merged.setdefault(item["ticker"], item)
+            data = list(merged.values())
         
         # Limit results if specified
-        if limit and len(data) > limit:
+        if len(data) > limit:
             data = data[:limit]
+
+        if data:
+            tickers = list(dict.fromkeys(item["ticker"] for item in data))
+            quotes, _ = await quote_store.get_many(tickers, db, get_data_source())
+            data = [with_quote(item, quotes.get(item["ticker"]), include_quotes) for item in data]
         
         return data
     
@@ -46,14 +100,20 @@ async def search_stocks(
         raise HTTPException(status_code=500, detail=f"Failed to search stocks: {str(e)}")
         
 @router.get("/trending", response_model=List[Dict[str, Any]])
-async def get_trending_stocks(count: Optional[int] = Query(5, description="Number of trending stocks to return"), 
-                             db: Session = Depends(get_db)):
-    """Get trending stocks from Yahoo Finance"""
+async def get_trending_stocks(response: Response,
+                             count: Optional[int] = Query(5, description="Number of trending stocks to return"), 
+                             db: AsyncSession = Depends(get_async_db)):
+    """
+    Get trending stocks from Yahoo Finance.
+
+    Served from a snapshot refreshed in the background; X-Snapshot-Age gives its
+    age in seconds and X-Snapshot-Time when it was fetched.
+    """
     try:
-        # Get data from the adapter
-        data_source = get_data_source()
-        data = await data_source.get_trending_stocks(count)
+        data = await trending_snapshot.get(count)
         
+        response.headers["X-Snapshot-Age"] = str(trending_snapshot.age_seconds())
+        response.headers["X-Snapshot-Time"] = trending_snapshot.fetched_at.isoformat()
         return data
     
     except Exception as e:
@@ -0,0 +1,149 @@
+import os
+import json
+import asyncio
+from typing import List
+from typing import Dict, Any
+from fastapi import APIRouter, Depends, Body, Query, Request, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+
+from app.database.database import get_async_db
+from app.adapters.factory import get_data_source
+from app.services.batch import normalize_tickers
+from app.services.quote_hub import quote_hub, QuoteSubscription
+from app.services.quote_store import quote_store
+
+load_dotenv()
+
+router = APIRouter()
+
+# Seconds between keep-alives on an idle stream
+QUOTE_HEARTBEAT_SECONDS = float(os.getenv("QUOTE_HEARTBEAT_SECONDS", "15"))
+# Upper bound on the tickers one client can follow
+QUOTE_MAX_TICKERS_PER_CLIENT = int(os.getenv("QUOTE_MAX_TICKERS_PER_CLIENT", "100"))
+
+
+@router.get("/{ticker}/quote", response_model=Dict[str, Any])
+async def get_quote(ticker: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get the latest quote for a ticker.
+
+    Served from the quote store: quotes younger than QUOTE_TTL_SECONDS are
+    returned as-is, older ones are refreshed with a quote call, which is far
+    cheaper than the financials or a price history. "age_seconds" and "stale"
+    report how current the quote is.
+    """
+    ticker = ticker.upper()
+
+    try:
+        data, errors = await quote_store.get_many([ticker], db, get_data_source())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve quote: {str(e)}")
+
+    if ticker not in data:
+        raise HTTPException(status_code=404, detail=f"No quote available for {ticker}: {errors.get(ticker)}")
+    return data[ticker]
+
+@router.post("/batch/quotes", response_model=Dict[str, Any])
+async def get_quotes_batch(
+    tickers: List[str] = Body(..., description="Tickers to quote"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the latest quotes for many tickers in one call.
+
+    Returns {"data": {ticker: quote}, "errors": {ticker: message}}; quotes that
+    need a refresh are fetched together with one batch quote call.
+    """
+    tickers = normalize_tickers(tickers)
+
+    try:
+        data, errors = await quote_store.get_many(tickers, db, get_data_source())
+        return {"data": data, "errors": errors}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve quotes: {str(e)}")
+
+def parse_stream_tickers(tickers: List[str], subscription: QuoteSubscription = None) -> List[str]:
+    normalized = normalize_tickers(tickers)
+    following = len(subscription.tickers | set(normalized)) if subscription else len(normalized)
+    if following > QUOTE_MAX_TICKERS_PER_CLIENT:
+        raise HTTPException(status_code=400, detail=f"At most {QUOTE_MAX_TICKERS_PER_CLIENT} tickers can be followed per client")
+    return normalized
+
+@router.get("/quotes/stream")
+async def stream_quotes(request: Request, tickers: str = Query(..., description="Comma-separated tickers to follow")):
+    """
+    Stream quotes as Server-Sent Events.
+
+    Each update is an "event: quote" whose data is the quote JSON; the latest
+    known quotes are sent right after connecting. Idle streams get a comment
+    line every QUOTE_HEARTBEAT_SECONDS. A client that reads slowly receives
+    only the newest quote of each ticker.
+    """
+    symbols = parse_stream_tickers(tickers.split(","))
+    subscription = quote_hub.connect()
+    quote_hub.subscribe(subscription, symbols)
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                quotes = await subscription.next(timeout=QUOTE_HEARTBEAT_SECONDS)
+                if not quotes:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield "".join(f"event: quote\ndata: {json.dumps(jsonable_encoder(quote))}\n\n" for quote in quotes)
+        finally:
+            quote_hub.disconnect(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Proxies must not buffer the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/quotes/ws")
+async def quotes_socket(websocket: WebSocket):
+    """
+    Stream quotes over a WebSocket.
+
+    Clients send {"action": "subscribe" | "unsubscribe", "tickers": [...]} and
+    receive {"type": "quotes", "quotes": [...]} with every pending update, or
+    {"type": "error", "detail": ...} for an invalid message.
+    """
+    await websocket.accept()
+    subscription = quote_hub.connect()
+
+    async def receive():
+        while True:
+            message = await websocket.receive_json()
+            action = message.get("action") if isinstance(message, dict) else None
+            try:
+                if action not in ("subscribe", "unsubscribe") or not isinstance(message.get("tickers"), list):
+                    raise HTTPException(status_code=400, detail='Expected {"action": "subscribe" | "unsubscribe", "tickers": [...]}')
+                if action == "subscribe":
+                    quote_hub.subscribe(subscription, parse_stream_tickers(message["tickers"], subscription))
+                else:
+                    quote_hub.unsubscribe(subscription, normalize_tickers(message["tickers"]))
+            except HTTPException as e:
+                await websocket.send_json({"type": "error", "detail": e.detail})
+
+    async def send():
+        while True:
+            quotes = await subscription.next()
+            await websocket.send_json({"type": "quotes", "quotes": jsonable_encoder(quotes)})
+
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        quote_hub.disconnect(subscription)
+        for task in tasks:
+            # Surface errors other than the client going away
+            if task.done() and not task.cancelled() and task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+                print(f"Quote socket closed with error: {task.exception()}")
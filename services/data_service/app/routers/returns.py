@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi.responses import JSONResponse
+from typing import List, Dict, Any, Optional
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.database import get_async_db
+from app.adapters.factory import get_data_source
+from app.services.historical_store import HistoricalStore, resolve_date_range
+from app.services.batch import normalize_tickers
+from app.services.market_calendar import last_trading_day_on_or_before
+from app.services.returns_matrix import returns_matrix
+
+router = APIRouter()
+
+MATRIX_FIELDS = ["adjusted_close", "log_return"]
+
+
+def parse_matrix_fields(fields: Optional[str]) -> List[str]:
+    """Validate a comma-separated fields= selection of matrices; both when empty"""
+    if not fields:
+        return list(MATRIX_FIELDS)
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in MATRIX_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown) or '(none)'}; expected any of {', '.join(MATRIX_FIELDS)}"
+        )
+    return selected
+
+
+def matrix_rows(matrix: np.ndarray) -> List[List[Optional[float]]]:
+    """Nested lists for JSON, with missing values as null"""
+    values = matrix.astype(object)
+    values[np.isnan(matrix)] = None
+    return values.tolist()
+
+
+@router.post("/batch/returns", response_model=Dict[str, Any])
+async def get_returns_matrix(
+    tickers: List[str] = Body(..., description="Tickers to fetch"),
+    start_date: Optional[date] = Query(None, description="Start date of the window"),
+    end_date: Optional[date] = Query(None, description="End date of the window (exclusive)"),
+    fields: Optional[str] = Query(None, description="Comma-separated matrices to return: adjusted_close, log_return"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get aligned adjusted closes and daily log returns of several tickers.
+
+    Returns {"tickers": [...], "dates": [...], "adjusted_close": [[...]],
+    "log_return": [[...]], "errors": {ticker: message}}: one row per ticker in
+    "tickers" and one column per exchange session in "dates", null where a
+    ticker has no bar. Log returns are against the previous session's close.
+    The rows are cut from the shared returns matrix, which only loads the
+    sessions it does not hold yet.
+    """
+    tickers = normalize_tickers(tickers)
+    selected = parse_matrix_fields(fields)
+    if len(tickers) > returns_matrix.max_tickers:
+        raise HTTPException(status_code=400, detail=f"At most {returns_matrix.max_tickers} tickers are allowed per request")
+    start_date, end_date = resolve_date_range(start_date, end_date)
+
+    try:
+        store = HistoricalStore(db, get_data_source())
+        # The first session's return needs the close of the session before it
+        previous_session = last_trading_day_on_or_before(start_date - timedelta(days=1))
+        stock_ids, errors = await store.ensure_bars(tickers, previous_session, end_date)
+        sessions, closes, returns = await returns_matrix.get(
+            store.read_series, list(stock_ids.values()), start_date, end_date - timedelta(days=1)
+        )
+        matrices = {"adjusted_close": closes, "log_return": returns}
+        content = {"tickers": list(stock_ids), "dates": np.datetime_as_string(sessions).tolist()}
+        content.update({field: matrix_rows(matrices[field]) for field in selected})
+        content["errors"] = errors
+        return JSONResponse(content=content)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to retrieve returns matrix: {str(e)}")
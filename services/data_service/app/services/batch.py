@@ -0,0 +1,19 @@
+import os
+from typing import List
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Upper bound on tickers accepted by the batch endpoints
+BATCH_MAX_TICKERS = int(os.getenv("BATCH_MAX_TICKERS", "500"))
+
+
+def normalize_tickers(tickers: List[str]) -> List[str]:
+    """Upper-case and de-duplicate a batch request, preserving order"""
+    normalized = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers if ticker and ticker.strip()))
+    if not normalized:
+        raise HTTPException(status_code=400, detail="At least one ticker is required")
+    if len(normalized) > BATCH_MAX_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_TICKERS} tickers are allowed per request")
+    return normalized
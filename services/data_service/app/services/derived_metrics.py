@@ -0,0 +1,208 @@
+import math
+from collections import deque
+from typing import List, Dict, Any, Optional
+from datetime import date, timedelta
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.database.database import insert_for
+from app.models.models import HistoricalData, DerivedMetric
+
+TRADING_DAYS = 252
+VOLATILITY_WINDOWS = [20, 60, 252]
+MOMENTUM_WINDOWS = [63, 252]
+# Momentum from 12 months ago to 1 month ago, skipping the most recent month
+MOMENTUM_SKIP = 21
+# Bars further apart than this are a hole in the stored history, not consecutive sessions
+MAX_BAR_GAP_DAYS = 7
+# Bars before the first updated one needed to fill every window
+LOOKBACK_BARS = TRADING_DAYS + 1
+
+METRIC_FIELDS = [
+    "log_return", "volatility_20", "volatility_60", "volatility_252", "high_52w", "low_52w",
+    "max_drawdown_52w", "momentum_63", "momentum_252", "momentum_12_1",
+]
+
+
+class RollingMoments:
+    """
+    Mean and variance of the last `window` values.
+
+    Welford's update adds each value in O(1) and its inverse removes the value
+    that falls out of the window, so a series is processed in one pass.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values: deque = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, value: float):
+        if len(self.values) == self.window:
+            old = self.values.popleft()
+            if self.values:
+                delta = old - self.mean
+                self.mean -= delta / len(self.values)
+                self.m2 -= delta * (old - self.mean)
+            else:
+                self.mean = self.m2 = 0.0
+        self.values.append(value)
+        delta = value - self.mean
+        self.mean += delta / len(self.values)
+        self.m2 += delta * (value - self.mean)
+
+    def std(self) -> Optional[float]:
+        """Sample standard deviation, once the window is full"""
+        if len(self.values) < self.window:
+            return None
+        # Removals can leave a tiny negative residue when all values are equal
+        return math.sqrt(max(self.m2, 0.0) / (self.window - 1))
+
+
+def segment_metrics(prices: np.ndarray, highs: np.ndarray, lows: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Metrics for each bar of a run of consecutive sessions; NaN until a window is full.
+
+    prices are adjusted closes. Volatilities are annualized with sqrt(252).
+    """
+    n = len(prices)
+    metrics = {field: np.full(n, np.nan) for field in METRIC_FIELDS}
+
+    returns = np.full(n, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = np.log(prices[1:] / prices[:-1])
+    returns[~np.isfinite(returns)] = np.nan
+    metrics["log_return"] = returns
+
+    for window in VOLATILITY_WINDOWS:
+        moments = RollingMoments(window)
+        column = metrics[f"volatility_{window}"]
+        for i in range(1, n):
+            if math.isnan(returns[i]):
+                # A missing price would poison the running sums; start the window over
+                moments = RollingMoments(window)
+                continue
+            moments.push(returns[i])
+            std = moments.std()
+            if std is not None:
+                column[i] = std * math.sqrt(TRADING_DAYS)
+
+    if n >= TRADING_DAYS:
+        metrics["high_52w"][TRADING_DAYS - 1:] = np.fmax.reduce(sliding_window_view(highs, TRADING_DAYS), axis=1)
+        metrics["low_52w"][TRADING_DAYS - 1:] = np.fmin.reduce(sliding_window_view(lows, TRADING_DAYS), axis=1)
+        windows = sliding_window_view(prices, TRADING_DAYS)
+        peaks = np.maximum.accumulate(windows, axis=1)
+        metrics["max_drawdown_52w"][TRADING_DAYS - 1:] = (windows / peaks - 1).min(axis=1)
+
+    for window in MOMENTUM_WINDOWS:
+        if n > window:
+            metrics[f"momentum_{window}"][window:] = prices[window:] / prices[:-window] - 1
+    if n > TRADING_DAYS:
+        metrics["momentum_12_1"][TRADING_DAYS:] = prices[TRADING_DAYS - MOMENTUM_SKIP:-MOMENTUM_SKIP] / prices[:-TRADING_DAYS] - 1
+
+    return metrics
+
+
+def compute_metrics(dates: np.ndarray, prices: np.ndarray, highs: np.ndarray, lows: np.ndarray) -> Dict[str, np.ndarray]:
+    """Metrics for every bar, restarting the windows after holes in the stored history"""
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    breaks = np.flatnonzero(np.diff(days) > MAX_BAR_GAP_DAYS) + 1
+    bounds = [0] + breaks.tolist() + [len(dates)]
+
+    segments = [
+        segment_metrics(prices[start:end], highs[start:end], lows[start:end])
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+    return {field: np.concatenate([segment[field] for segment in segments]) for field in METRIC_FIELDS}
+
+
+def update_derived_metrics(db: Session, stock_id: int, since: Optional[date] = None) -> int:
+    """
+    Recompute the derived metrics of a stock's bars dated since onwards (all bars without since).
+
+    Only the LOOKBACK_BARS bars before since are read besides the updated ones,
+    so appending a session costs a few hundred rows read and one row written.
+    Rows are upserted (committed by the caller); returns the number written.
+    """
+    columns = [HistoricalData.date, HistoricalData.high, HistoricalData.low, HistoricalData.close, HistoricalData.adjusted_close]
+    query = db.query(*columns).filter(HistoricalData.stock_id == stock_id)
+    before = []
+    if since:
+        before = query.filter(HistoricalData.date < since).order_by(HistoricalData.date.desc()).limit(LOOKBACK_BARS).all()[::-1]
+        query = query.filter(HistoricalData.date >= since)
+    updated = query.order_by(HistoricalData.date).all()
+    if not updated:
+        return 0
+
+    dates, highs, lows, closes, adjusted = (np.array(values, dtype=dtype) for values, dtype in zip(
+        zip(*(before + updated)), ["datetime64[D]", float, float, float, float]
+    ))
+    # Bars without an adjusted close (or high/low) fall back to the close
+    prices = np.where(np.isnan(adjusted), closes, adjusted)
+    metrics = compute_metrics(dates, prices, np.where(np.isnan(highs), closes, highs), np.where(np.isnan(lows), closes, lows))
+
+    first = len(before)
+    rows = [
+        dict(
+            {field: None if math.isnan(value) else value for field, value in zip(METRIC_FIELDS, values)},
+            stock_id=stock_id,
+            date=bar_date
+        )
+        for bar_date, *values in zip(
+            [row.date for row in updated], *[metrics[field][first:].tolist() for field in METRIC_FIELDS]
+        )
+    ]
+
+    insert = insert_for(db)
+    stmt = insert(DerivedMetric)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["stock_id", "date"],
+        set_={field: stmt.excluded[field] for field in METRIC_FIELDS}
+    )
+    db.execute(stmt, rows)
+    return len(rows)
+
+
+def refresh_derived_metrics(db: Session, stock_ids: List[int]) -> int:
+    """Compute metrics for stored bars that have none yet, e.g. bars ingested before the metrics existed"""
+    if not stock_ids:
+        return 0
+    latest_bars = dict(db.query(HistoricalData.stock_id, func.max(HistoricalData.date)).filter(
+        HistoricalData.stock_id.in_(stock_ids)
+    ).group_by(HistoricalData.stock_id).all())
+    latest_metrics = dict(db.query(DerivedMetric.stock_id, func.max(DerivedMetric.date)).filter(
+        DerivedMetric.stock_id.in_(stock_ids)
+    ).group_by(DerivedMetric.stock_id).all())
+
+    written = 0
+    for stock_id, bar_date in latest_bars.items():
+        metric_date = latest_metrics.get(stock_id)
+        if metric_date is None or metric_date < bar_date:
+            written += update_derived_metrics(db, stock_id, metric_date + timedelta(days=1) if metric_date else None)
+    return written
+
+
+def latest_derived_metrics(db: Session, stock_ids: Dict[str, int]) -> Dict[str, Dict[str, Any]]:
+    """The most recent metrics row of each ticker"""
+    latest = db.query(
+        DerivedMetric.stock_id,
+        func.max(DerivedMetric.date).label("date")
+    ).filter(DerivedMetric.stock_id.in_(list(stock_ids.values()))).group_by(DerivedMetric.stock_id).subquery()
+
+    rows = db.query(DerivedMetric).join(
+        latest, (latest.c.stock_id == DerivedMetric.stock_id) & (latest.c.date == DerivedMetric.date)
+    ).all()
+
+    tickers = {stock_id: ticker for ticker, stock_id in stock_ids.items()}
+    return {
+        tickers[row.stock_id]: dict(
+            {field: getattr(row, field) for field in METRIC_FIELDS},
+            ticker=tickers[row.stock_id],
+            date=row.date
+        )
+        for row in rows
+    }
@@ -0,0 +1,243 @@
+import os
+import asyncio
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Set, Tuple
+from datetime import datetime, time
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+
+from app.adapters.data_source import DataSource, BatchResult
+from app.adapters.scheduler import upstream_lane
+from app.database.database import insert_for
+from app.models.models import Stock, FinancialData
+from app.services.singleflight import financials_flight
+from app.services.peer_index import peer_index
+from app.services.symbol_index import symbol_index
+from app.services.write_behind import write_behind
+
+load_dotenv()
+
+# Fields copied from the Stock row; all other fields come from the FinancialData snapshot
+PROFILE_FIELDS = ["name", "sector", "industry"]
+RATIO_FIELDS = [
+    "pe_ratio", "pb_ratio", "dividend_yield", "market_cap", "eps", "revenue",
+    "profit_margin", "debt_to_equity", "roe", "current_ratio",
+]
+
+
+class CacheEntry:
+    """Fundamentals for one ticker and the time each field was fetched"""
+    __slots__ = ("data", "fetched_at")
+
+    def __init__(self, data: Dict[str, Any], fetched_at: Dict[str, datetime]):
+        self.data = data
+        self.fetched_at = fetched_at
+
+    def age_seconds(self, now: datetime) -> float:
+        return (now - min(self.fetched_at.values())).total_seconds()
+
+
+class FundamentalsCache:
+    """
+    TTL cache for /stocks/{ticker}/financials with stale-while-revalidate.
+
+    Lookups go through an in-process LRU, then the latest FinancialData snapshot,
+    and only then the data source. An entry older than the TTL is still returned
+    immediately while a background task refreshes it. Fetched fundamentals are
+    stored through the write-behind buffer, so no request waits on the write.
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None, max_entries: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds or int(os.getenv("FUNDAMENTALS_TTL_SECONDS", "21600"))
+        self.max_entries = max_entries or int(os.getenv("FUNDAMENTALS_CACHE_SIZE", "2048"))
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        # The event loop only keeps weak references to tasks
+        self._refresh_tasks: Set[asyncio.Task] = set()
+
+    async def get(self, ticker: str, db: AsyncSession, data_source: DataSource) -> Dict[str, Any]:
+        """Get fundamentals for a ticker with per-field freshness metadata"""
+        data, errors = await self.get_many([ticker], db, data_source)
+        if ticker in errors:
+            raise RuntimeError(errors[ticker])
+        return data[ticker]
+
+    async def get_many(self, tickers: List[str], db: AsyncSession, data_source: DataSource) -> BatchResult:
+        """
+        Get fundamentals for several tickers.
+
+        Cache misses are fetched with one multi-symbol data source call and stale
+        entries are refreshed together in one background task. Returns the results
+        and an error message for each ticker that could not be fetched.
+        """
+        now = datetime.now()
+        entries = {ticker: self._entries[ticker] for ticker in tickers if ticker in self._entries}
+
+        not_cached = [ticker for ticker in tickers if ticker not in entries]
+        if not_cached:
+            for ticker, entry in (await db.run_sync(self._load_snapshots, not_cached)).items():
+                self._put(ticker, entry)
+                entries[ticker] = entry
+            # Return the connection to the pool before any wait on the data source
+            await db.commit()
+
+        stale = [ticker for ticker, entry in entries.items() if entry.age_seconds(now) > self.ttl_seconds]
+        for ticker in entries:
+            if ticker not in stale:
+                self._entries.move_to_end(ticker)
+        if stale:
+            self._schedule_refresh(stale, data_source)
+
+        errors = {}
+        missing = [ticker for ticker in tickers if ticker not in entries]
+        if missing:
+            fetched, errors = await self._fetch_many(missing, data_source)
+            entries.update(fetched)
+
+        data = {ticker: self._render(entries[ticker], now) for ticker in tickers if ticker in entries}
+        return data, errors
+
+    def invalidate(self, ticker: str):
+        self._entries.pop(ticker, None)
+
+    def _put(self, ticker: str, entry: CacheEntry):
+        self._entries[ticker] = entry
+        self._entries.move_to_end(ticker)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _render(self, entry: CacheEntry, now: datetime) -> Dict[str, Any]:
+        result = dict(entry.data)
+        result["freshness"] = {
+            field: {
+                "as_of": fetched_at.isoformat(),
+                "age_seconds": int((now - fetched_at).total_seconds()),
+                "stale": (now - fetched_at).total_seconds() > self.ttl_seconds
+            }
+            for field, fetched_at in entry.fetched_at.items()
+        }
+        return result
+
+    def _schedule_refresh(self, tickers: List[str], data_source: DataSource):
+        tickers = [ticker for ticker in tickers if ticker not in self._refreshing]
+        if not tickers:
+            return
+        self._refreshing.update(tickers)
+        task = asyncio.create_task(self._refresh(tickers, data_source))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _refresh(self, tickers: List[str], data_source: DataSource):
+        # Callers already got the stale entries, so the refresh can wait behind interactive calls
+        upstream_lane.set("batch")
+        try:
+            _, errors = await self._fetch_many(tickers, data_source)
+            for ticker, error in errors.items():
+                print(f"Background fundamentals refresh failed for {ticker}: {error}")
+        except Exception as e:
+            # Keep serving the stale entries; the next request retries
+            print(f"Background fundamentals refresh failed for {', '.join(tickers)}: {e}")
+        finally:
+            self._refreshing.difference_update(tickers)
+
+    async def _fetch_many(self, tickers: List[str], data_source: DataSource) -> Tuple[Dict[str, CacheEntry], Dict[str, str]]:
+        """Fetch tickers from the data source, joining fetches already in flight for any of them"""
+        return await financials_flight.do_batch(tickers, lambda new_tickers: self._fetch_and_store(new_tickers, data_source))
+
+    async def _fetch_and_store(self, tickers: List[str], data_source: DataSource) -> Tuple[Dict[str, CacheEntry], Dict[str, str]]:
+        data, errors = await data_source.get_financial_data_batch(tickers)
+        fetched_at = datetime.now()
+
+        await write_behind.put("financials", {ticker: (item, fetched_at) for ticker, item in data.items()})
+
+        entries = {}
+        for ticker, item in data.items():
+            entries[ticker] = CacheEntry(item, {field: fetched_at for field in PROFILE_FIELDS + RATIO_FIELDS})
+            self._put(ticker, entries[ticker])
+            peer_index.update(item)
+        symbol_index.add(list(data.values()))
+
+        return entries, errors
+
+    def _load_snapshots(self, db: Session, tickers: List[str]) -> Dict[str, CacheEntry]:
+        """Rebuild entries from the Stock rows and their latest FinancialData snapshots"""
+        latest = db.query(
+            FinancialData.stock_id,
+            func.max(FinancialData.date).label("date")
+        ).join(Stock, Stock.id == FinancialData.stock_id).filter(
+            Stock.ticker.in_(tickers)
+        ).group_by(FinancialData.stock_id).subquery()
+
+        rows = db.query(Stock, FinancialData).join(
+            FinancialData, FinancialData.stock_id == Stock.id
+        ).join(
+            latest, and_(latest.c.stock_id == FinancialData.stock_id, latest.c.date == FinancialData.date)
+        ).all()
+
+        entries = {}
+        for stock, snapshot in rows:
+            # Snapshots written before fetched_at existed only carry their date
+            snapshot_time = snapshot.fetched_at or datetime.combine(snapshot.date, time.min)
+            # The profile is written together with the snapshot unless another path touched it later
+            profile_time = snapshot_time
+            if stock.last_updated and stock.last_updated > snapshot.date:
+                profile_time = datetime.combine(stock.last_updated, time.min)
+
+            data = {"ticker": stock.ticker}
+            data.update({field: getattr(stock, field) for field in PROFILE_FIELDS})
+            data.update({field: getattr(snapshot, field) for field in RATIO_FIELDS})
+            data["date"] = snapshot.date
+
+            fetched_at = {field: profile_time for field in PROFILE_FIELDS}
+            fetched_at.update({field: snapshot_time for field in RATIO_FIELDS})
+            entries[stock.ticker] = CacheEntry(data, fetched_at)
+
+        return entries
+
+    def _store_many(self, db: Session, records: Dict[str, Tuple[Dict[str, Any], datetime]]):
+        for ticker, (item, fetched_at) in records.items():
+            self._store(ticker, item, fetched_at, db)
+
+    def _store(self, ticker: str, data: Dict[str, Any], fetched_at: datetime, db: Session):
+        """Upsert the Stock row and today's FinancialData snapshot (committed by the caller)"""
+        today = fetched_at.date()
+
+        stock = db.query(Stock).filter(Stock.ticker == ticker).first()
+
+        # If stock doesn't exist, create it; another process may be creating it at the same time
+        if not stock:
+            insert = insert_for(db)
+            db.execute(insert(Stock).values(
+                ticker=ticker,
+                name=data.get("name", ""),
+                sector=data.get("sector", ""),
+                industry=data.get("industry", ""),
+                country=data.get("country", ""),
+                last_updated=today
+            ).on_conflict_do_nothing(index_elements=["ticker"]))
+            stock = db.query(Stock).filter(Stock.ticker == ticker).first()
+        else:
+            # Update stock information
+            stock.name = data.get("name", stock.name)
+            stock.sector = data.get("sector", stock.sector)
+            stock.industry = data.get("industry", stock.industry)
+            stock.last_updated = today
+
+        snapshot = db.query(FinancialData).filter(
+            FinancialData.stock_id == stock.id,
+            FinancialData.date == today
+        ).first()
+        if not snapshot:
+            snapshot = FinancialData(stock_id=stock.id, date=today)
+            db.add(snapshot)
+
+        for field in RATIO_FIELDS:
+            setattr(snapshot, field, data.get(field))
+        snapshot.fetched_at = fetched_at
+
+
+fundamentals_cache = FundamentalsCache()
+# Registered before the bars, whose rows reference the Stock rows written here
+write_behind.register("financials", fundamentals_cache._store_many)
@@ -0,0 +1,82 @@
+import json
+from typing import List, Dict, Optional
+
+import numpy as np
+import pyarrow as pa
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+
+from app.adapters.bar_series import BarSeries
+from app.services.historical_store import BAR_FIELDS
+
+HISTORICAL_FIELDS = ["date"] + BAR_FIELDS
+HISTORICAL_FORMATS = ["rows", "columnar", "arrow"]
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Validate a comma-separated fields= projection; all fields when empty"""
+    if not fields:
+        return list(HISTORICAL_FIELDS)
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in HISTORICAL_FIELDS]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown) or '(none)'}; expected any of {', '.join(HISTORICAL_FIELDS)}"
+        )
+    return selected
+
+
+def parse_format(format: str) -> str:
+    if format not in HISTORICAL_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}; expected one of {', '.join(HISTORICAL_FORMATS)}")
+    return format
+
+
+def to_arrow_table(data: Dict[str, BarSeries], fields: List[str], errors: Optional[Dict[str, str]] = None) -> pa.Table:
+    """One long table with a ticker column; per-ticker errors go in the schema metadata"""
+    series = list(data.values())
+    tickers = pa.DictionaryArray.from_arrays(
+        np.repeat(np.arange(len(series), dtype=np.int32), [len(item) for item in series]),
+        pa.array(list(data.keys()), type=pa.string())
+    )
+    columns = {"ticker": tickers}
+    for field in fields:
+        parts = [item.column(field) for item in series] or [BarSeries.empty().column(field)]
+        # The arrays are handed to Arrow as-is; datetime64[D] becomes date32
+        columns[field] = pa.array(np.concatenate(parts))
+    table = pa.table(columns)
+    return table.replace_schema_metadata({"errors": json.dumps(errors or {})})
+
+
+def arrow_response(table: pa.Table) -> Response:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(content=sink.getvalue().to_pybytes(), media_type=ARROW_MEDIA_TYPE)
+
+
+def historical_response(series: BarSeries, format: str, fields: List[str]):
+    """Render one ticker's bars in the requested format"""
+    if format == "arrow":
+        return arrow_response(to_arrow_table({"": series}, fields).drop_columns(["ticker"]))
+    if format == "columnar":
+        return JSONResponse(content=series.to_columns(fields))
+    # Already JSON-native; skip the per-item encoder pass of the response model
+    return JSONResponse(content=series.to_rows(fields, iso_dates=True))
+
+
+def historical_batch_response(data: Dict[str, BarSeries], errors: Dict[str, str], format: str, fields: List[str]):
+    """Render several tickers' bars in the requested format"""
+    if format == "arrow":
+        return arrow_response(to_arrow_table(data, fields, errors))
+    if format == "columnar":
+        return JSONResponse(content={
+            "data": {ticker: series.to_columns(fields) for ticker, series in data.items()},
+            "errors": errors
+        })
+    return JSONResponse(content={
+        "data": {ticker: series.to_rows(fields, iso_dates=True) for ticker, series in data.items()},
+        "errors": errors
+    })
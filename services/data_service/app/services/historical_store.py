@@ -0,0 +1,388 @@
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date, datetime, timedelta
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.adapters.data_source import DataSource, BatchResult
+from app.adapters.bar_series import BarSeries
+from app.database.database import SessionLocal, insert_for
+from app.models.models import Stock, HistoricalData, HistoricalCoverage
+from app.services.fundamentals_cache import fundamentals_cache
+from app.services.singleflight import historical_flight, KeyedResult
+from app.services.derived_metrics import update_derived_metrics
+from app.services.write_behind import write_behind
+from app.services.price_store import price_store
+from app.services.returns_matrix import returns_matrix
+from app.services.market_calendar import (
+    first_trading_day_on_or_after,
+    last_trading_day_on_or_before,
+    has_trading_day,
+)
+
+DateRange = Tuple[date, date]
+
+BAR_FIELDS = ["open", "high", "low", "close", "volume", "adjusted_close"]
+
+
+def resolve_date_range(start_date: Optional[date] = None, end_date: Optional[date] = None) -> DateRange:
+    """Apply the default one-year window used by the data sources"""
+    if not end_date:
+        end_date = datetime.now().date()
+    if not start_date:
+        start_date = (datetime.now() - timedelta(days=365)).date()
+    return start_date, end_date
+
+
+def apply_since(start_date: Optional[date], since: Optional[date]) -> Optional[date]:
+    """Narrow the window to bars after the client's since= cursor"""
+    if not since:
+        return start_date
+    return max(start_date, since + timedelta(days=1)) if start_date else since + timedelta(days=1)
+
+
+def missing_ranges(first: date, last: date, covered: List[DateRange]) -> List[DateRange]:
+    """
+    Return the sub-ranges of [first, last] not accounted for by the covered ranges.
+
+    Gaps without any trading session (weekends, exchange holidays) are dropped and
+    the remaining gaps are trimmed to their first and last session.
+    """
+    gaps = []
+    cursor = first
+    for start, end in sorted(covered):
+        if end < cursor:
+            continue
+        if start > last:
+            break
+        if start > cursor:
+            gaps.append((cursor, start - timedelta(days=1)))
+        cursor = max(cursor, end + timedelta(days=1))
+        if cursor > last:
+            break
+    if cursor <= last:
+        gaps.append((cursor, last))
+
+    return [
+        (first_trading_day_on_or_after(start), last_trading_day_on_or_before(end))
+        for start, end in gaps
+        if has_trading_day(start, end)
+    ]
+
+
+def merge_ranges(ranges: List[DateRange]) -> List[DateRange]:
+    """Merge overlapping ranges and ranges separated only by non-trading days"""
+    merged: List[DateRange] = []
+    for start, end in sorted(ranges):
+        if merged:
+            prev_start, prev_end = merged[-1]
+            if not has_trading_day(prev_end + timedelta(days=1), start - timedelta(days=1)):
+                merged[-1] = (prev_start, max(prev_end, end))
+                continue
+        merged.append((start, end))
+    return merged
+
+
+def upsert_bars(db: Session, stock_id: int, series: BarSeries):
+    """
+    Insert or update bars with a set-based INSERT ... ON CONFLICT (stock_id, date) DO UPDATE.
+
+    Bars that were stored while their session was still open are overwritten.
+    """
+    # ON CONFLICT cannot touch the same row twice in one statement, so keep the last bar per date
+    series = series.dedupe()
+    if not len(series):
+        return
+
+    columns = [series.python_dates()] + [getattr(series, field).tolist() for field in BAR_FIELDS]
+    rows = [
+        dict(zip(["date"] + BAR_FIELDS, values), stock_id=stock_id)
+        for values in zip(*columns)
+    ]
+
+    insert = insert_for(db)
+    stmt = insert(HistoricalData)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["stock_id", "date"],
+        set_={field: stmt.excluded[field] for field in BAR_FIELDS}
+    )
+    # Executed as a multi-row VALUES batch by the driver (psycopg2 execute_values)
+    db.execute(stmt, rows)
+
+
+def coverable(ranges: List[DateRange]) -> List[DateRange]:
+    """The parts of fetched ranges that can be marked as covered"""
+    # Today's session may still be in progress, so it is never marked as covered
+    yesterday = datetime.now().date() - timedelta(days=1)
+    return [(start, min(end, yesterday)) for start, end in ranges if start <= yesterday]
+
+
+def record_coverage(db: Session, stock_id: int, ranges: List[DateRange]):
+    """Add fetched ranges to the ledger, merging them with adjacent ranges"""
+    ranges = coverable(ranges)
+    if not ranges:
+        return
+
+    rows = db.query(HistoricalCoverage).filter(HistoricalCoverage.stock_id == stock_id).all()
+    merged = merge_ranges([(row.start_date, row.end_date) for row in rows] + ranges)
+
+    for row in rows:
+        db.delete(row)
+    for range_start, range_end in merged:
+        db.add(HistoricalCoverage(stock_id=stock_id, start_date=range_start, end_date=range_end))
+
+
+class PendingBars:
+    """Fetched bars of one stock waiting in the write-behind buffer, with the ranges they cover"""
+    __slots__ = ("series", "ranges")
+
+    def __init__(self, series: BarSeries, ranges: List[DateRange]):
+        self.series = series
+        self.ranges = ranges
+
+
+def merge_pending_bars(pending: PendingBars, newer: PendingBars) -> PendingBars:
+    # Later fetches win for dates fetched twice, e.g. a session that was still open
+    return PendingBars(BarSeries.concat([pending.series, newer.series]).dedupe(), pending.ranges + newer.ranges)
+
+
+def load_series(db: Session, stock_ids: List[int], first: Optional[date] = None, last: Optional[date] = None) -> Dict[int, BarSeries]:
+    """Stored bars of several stocks in [first, last] (all of them by default), per stock id"""
+    if not stock_ids:
+        return {}
+    # Plain column tuples instead of ORM objects; split per stock after transposing
+    query = db.query(
+        HistoricalData.stock_id, HistoricalData.date, *[getattr(HistoricalData, field) for field in BAR_FIELDS]
+    ).filter(HistoricalData.stock_id.in_(stock_ids))
+    if first:
+        query = query.filter(HistoricalData.date >= first)
+    if last:
+        query = query.filter(HistoricalData.date <= last)
+    rows = query.order_by(HistoricalData.stock_id, HistoricalData.date).all()
+    if not rows:
+        return {}
+
+    columns = list(zip(*rows))
+    series = BarSeries.from_columns(columns[1], dict(zip(BAR_FIELDS, columns[2:])))
+    owners = np.array(columns[0])
+    bounds = [0] + (np.flatnonzero(owners[1:] != owners[:-1]) + 1).tolist() + [len(owners)]
+    return {
+        int(owners[start]): series.take(slice(start, end))
+        for start, end in zip(bounds[:-1], bounds[1:])
+    }
+
+
+def store_pending_bars(db: Session, records: Dict[int, PendingBars]):
+    """Write-behind writer: upsert the bars, extend the coverage ledger, update the derived metrics and the returns matrix"""
+    for stock_id, pending in records.items():
+        upsert_bars(db, stock_id, pending.series)
+        record_coverage(db, stock_id, pending.ranges)
+        if len(pending.series):
+            # Later metrics depend on these bars too, so everything from the first range on is recomputed
+            update_derived_metrics(db, stock_id, min(start for start, _ in pending.ranges))
+            returns_matrix.record(stock_id, pending.series)
+
+
+async def sync_price_files(records: Dict[int, PendingBars]):
+    """
+    Write-behind committed callback: bring the price store files of the stored stocks up to date.
+
+    The files are only touched once the bars are committed, and in a thread,
+    as waiting for the lock of the price store and rewriting files would
+    otherwise hold up the event loop.
+    """
+    if price_store.enabled:
+        await asyncio.to_thread(_sync_price_files, records)
+
+
+def _sync_price_files(records: Dict[int, PendingBars]):
+    """A stock without a file gets one with all its rows, which now include the new bars; the others get them merged in"""
+    db = SessionLocal()
+    try:
+        complete = load_series(db, [stock_id for stock_id in records if not price_store.has(stock_id)])
+        for stock_id, pending in records.items():
+            if stock_id in complete:
+                price_store.replace(stock_id, complete[stock_id])
+            elif price_store.has(stock_id):
+                price_store.merge(stock_id, pending.series)
+            else:
+                # No rows at all: an empty file keeps later reads off the database
+                price_store.replace(stock_id, pending.series)
+    except Exception:
+        # A file missing the new bars would hide them; without one, reads rebuild it from the database
+        for stock_id in records:
+            price_store.discard(stock_id)
+        raise
+    finally:
+        db.close()
+
+
+class HistoricalStore:
+    """
+    Read-through store for historical price bars.
+
+    Bars are served from the historical_data table. A per-stock coverage ledger
+    records which date ranges have already been fetched, so the data source is
+    only asked for the ranges that are missing (typically the last few sessions).
+    Fetched bars, their coverage and their derived metrics are stored through
+    the write-behind buffer; until it has flushed them, reads and coverage
+    lookups add the pending bars to what the tables hold.
+
+    Queries go through an AsyncSession; the bulk reads and writes are plain
+    Session code run with run_sync, so they do not block the event loop either.
+    """
+
+    def __init__(self, db: AsyncSession, data_source: DataSource):
+        self.db = db
+        self.data_source = data_source
+
+    async def get_historical_data(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Get historical bars for [start_date, end_date), fetching only uncovered ranges"""
+        return (await self.get_historical_series(ticker, start_date, end_date)).to_rows()
+
+    async def get_historical_data_batch(self, tickers: List[str], start_date: Optional[date] = None, end_date: Optional[date] = None) -> BatchResult:
+        """Get historical bars for several tickers as lists of bar dicts"""
+        data, errors = await self.get_historical_series_batch(tickers, start_date, end_date)
+        return {ticker: series.to_rows() for ticker, series in data.items()}, errors
+
+    async def get_historical_series(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> BarSeries:
+        """Get historical bars for [start_date, end_date) as a BarSeries"""
+        data, errors = await self.get_historical_series_batch([ticker], start_date, end_date)
+        if ticker not in data:
+            raise RuntimeError(errors.get(ticker) or f"No historical data available for {ticker}")
+        return data[ticker]
+
+    async def get_historical_series_batch(self, tickers: List[str], start_date: Optional[date] = None, end_date: Optional[date] = None) -> BatchResult:
+        """
+        Get historical bars for several tickers over the same window.
+
+        Tickers missing the same date ranges are fetched together with one
+        multi-symbol data source call. Returns a BarSeries per ticker and an error
+        message for each ticker that could not be fetched.
+        """
+        start_date, end_date = resolve_date_range(start_date, end_date)
+
+        # The end date is exclusive, matching the upstream data sources
+        first, last = start_date, end_date - timedelta(days=1)
+        if last < first:
+            return {ticker: BarSeries.empty() for ticker in tickers}, {}
+
+        stock_ids, errors = await self.ensure_bars(tickers, start_date, end_date)
+        series = await self.read_series(list(stock_ids.values()), first, last)
+        data = {ticker: series.get(stock_id) or BarSeries.empty() for ticker, stock_id in stock_ids.items()}
+        return data, errors
+
+    async def read_series(self, stock_ids: List[int], first: date, last: date) -> Dict[int, BarSeries]:
+        """Stored and pending bars of several stocks in [first, last], per stock id (stocks without any are left out)"""
+        # Taken before the query: bars flushed while it runs are either in its results or still here
+        pending = write_behind.pending("bars", stock_ids)
+        if price_store.enabled:
+            series, missing = price_store.read(stock_ids, first, last)
+            if missing:
+                series.update(await self.db.run_sync(self._create_price_files, missing, first, last))
+        else:
+            series = await self.db.run_sync(load_series, stock_ids, first, last)
+        # Coalesced requests resume together; hand the connection back before the response is sent
+        await self.db.commit()
+        for stock_id, bars in pending.items():
+            parts = [series[stock_id]] if stock_id in series else []
+            series[stock_id] = BarSeries.concat(parts + [bars.series.between(first, last)]).dedupe()
+        return series
+
+    async def ensure_bars(self, tickers: List[str], start_date: Optional[date] = None, end_date: Optional[date] = None) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """
+        Fetch and store the uncovered ranges of [start_date, end_date) without loading any bars.
+
+        Returns the Stock id of each ticker whose bars are stored and an error
+        message for each ticker that could not be fetched.
+        """
+        start_date, end_date = resolve_date_range(start_date, end_date)
+        first, last = start_date, end_date - timedelta(days=1)
+
+        stock_ids, errors = await self._get_stock_ids(tickers)
+
+        # Group tickers by the ranges they are missing so each group is one upstream call
+        coverage = await self._get_coverage(list(stock_ids.values()))
+        groups: Dict[Tuple[DateRange, ...], List[str]] = {}
+        for ticker, stock_id in stock_ids.items():
+            gaps = tuple(missing_ranges(first, last, coverage.get(stock_id, [])))
+            if gaps:
+                groups.setdefault(gaps, []).append(ticker)
+        # Return the connection to the pool while waiting on the data source
+        await self.db.commit()
+
+        for gaps, group in groups.items():
+            for gap_start, gap_end in gaps:
+                if not group:
+                    break
+                # Requests already filling the same (ticker, range) are joined instead of repeated
+                keys = [(ticker, gap_start, gap_end) for ticker in group]
+                _, key_errors = await historical_flight.do_batch(
+                    keys, lambda new_keys, gap=(gap_start, gap_end): self._fill_gap(new_keys, stock_ids, *gap)
+                )
+                group_errors = {ticker: error for (ticker, _, _), error in key_errors.items()}
+
+                errors.update(group_errors)
+                group = [ticker for ticker in group if ticker not in group_errors]
+
+        return {ticker: stock_id for ticker, stock_id in stock_ids.items() if ticker not in errors}, errors
+
+    async def _fill_gap(self, keys: List[Tuple[str, date, date]], stock_ids: Dict[str, int], gap_start: date, gap_end: date) -> KeyedResult:
+        """Fetch one missing range for several tickers and queue it for writing"""
+        tickers = [ticker for ticker, _, _ in keys]
+        data, errors = await self.data_source.get_historical_series_batch(tickers, gap_start, gap_end + timedelta(days=1))
+
+        await write_behind.put("bars", {
+            stock_ids[ticker]: PendingBars(series.dedupe(), [(gap_start, gap_end)])
+            for ticker, series in data.items()
+        })
+
+        return (
+            {key: len(data[key[0]]) for key in keys if key[0] in data},
+            {key: errors[key[0]] for key in keys if key[0] in errors},
+        )
+
+    async def _get_stock_ids(self, tickers: List[str]) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """Map tickers to Stock ids, creating the missing Stock rows from their fundamentals"""
+        stock_ids = dict((await self.db.execute(select(Stock.ticker, Stock.id).where(Stock.ticker.in_(tickers)))).all())
+
+        errors = {}
+        missing = [ticker for ticker in tickers if ticker not in stock_ids]
+        if missing:
+            await self.db.commit()
+            # The fundamentals cache stores the company profile as a Stock row; the bars need its id now
+            _, errors = await fundamentals_cache.get_many(missing, self.db, self.data_source)
+            await write_behind.flush()
+            stock_ids.update((await self.db.execute(select(Stock.ticker, Stock.id).where(Stock.ticker.in_(missing)))).all())
+            # Fetched, but the flush that stores the Stock row failed
+            for ticker in missing:
+                if ticker not in stock_ids and ticker not in errors:
+                    errors[ticker] = "Stock could not be stored"
+
+        return {ticker: stock_ids[ticker] for ticker in tickers if ticker in stock_ids}, errors
+
+    async def _get_coverage(self, stock_ids: List[int]) -> Dict[int, List[DateRange]]:
+        # Taken before the query, like the pending bars of a read
+        pending = write_behind.pending("bars", stock_ids)
+        rows = (await self.db.execute(
+            select(HistoricalCoverage.stock_id, HistoricalCoverage.start_date, HistoricalCoverage.end_date)
+            .where(HistoricalCoverage.stock_id.in_(stock_ids))
+        )).all()
+        coverage: Dict[int, List[DateRange]] = {}
+        for row in rows:
+            coverage.setdefault(row.stock_id, []).append((row.start_date, row.end_date))
+        for stock_id, bars in pending.items():
+            coverage.setdefault(stock_id, []).extend(coverable(bars.ranges))
+        return coverage
+
+    def _create_price_files(self, db: Session, stock_ids: List[int], first: date, last: date) -> Dict[int, BarSeries]:
+        """Build the price store files of stocks read before they had one; returns their bars in [first, last]"""
+        complete = load_series(db, stock_ids)
+        for stock_id in stock_ids:
+            price_store.create(stock_id, complete.get(stock_id) or BarSeries.empty())
+        return {stock_id: series.between(first, last) for stock_id, series in complete.items()}
+
+
+write_behind.register("bars", store_pending_bars, merge_pending_bars, committed=sync_price_files)
@@ -0,0 +1,77 @@
+import hashlib
+import json
+from datetime import date, datetime, time, timezone
+from email.utils import format_datetime
+from typing import Any, Optional, Union
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# Clients may keep a copy, but must revalidate it before every use
+CACHE_CONTROL = "no-cache"
+
+
+def body_etag(body: bytes) -> str:
+    """Strong validator: the digest of the exact response bytes"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def snapshot_etag(snapshot: Any) -> str:
+    """
+    Weak validator for responses rendered from a snapshot.
+
+    Used where the body also carries request-time values (e.g. the age of a
+    cached value), so equal snapshots are equivalent but not byte-identical.
+    """
+    encoded = json.dumps(snapshot, sort_keys=True, default=str).encode()
+    return "W/" + body_etag(encoded)
+
+
+def http_date(moment: Union[date, datetime]) -> str:
+    """
+    Format a Last-Modified value.
+
+    A date is the start of that day in UTC; a naive datetime is local time, as
+    written by datetime.now() throughout the service.
+    """
+    if not isinstance(moment, datetime):
+        moment = datetime.combine(moment, time.min, tzinfo=timezone.utc)
+    return format_datetime(moment.astimezone(timezone.utc), usegmt=True)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check with the weak comparison RFC 9110 prescribes for it"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    etag: Optional[str] = None,
+    last_modified: Optional[Union[date, datetime]] = None,
+) -> Response:
+    """
+    Attach ETag/Last-Modified to a rendered response, or answer 304 Not Modified.
+
+    The ETag defaults to a strong digest of the response body. A 304 repeats
+    the validators and carries no body.
+    """
+    etag = etag or body_etag(response.body)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
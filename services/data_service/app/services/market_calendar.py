@@ -0,0 +1,100 @@
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import FrozenSet, Optional
+
+import numpy as np
+
+
+def _easter_sunday(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The n-th given weekday (Monday=0) of a month"""
+    first = date(year, month, 1)
+    offset = (weekday - first.weekday()) % 7
+    return first + timedelta(days=offset + 7 * (n - 1))
+
+
+def _last_weekday(year: int, month: int, weekday: int) -> date:
+    """The last given weekday (Monday=0) of a month"""
+    if month == 12:
+        last = date(year, 12, 31)
+    else:
+        last = date(year, month + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(holiday: date) -> Optional[date]:
+    """Shift a fixed-date holiday that falls on a weekend to the nearest weekday"""
+    if holiday.weekday() == 5:
+        # NYSE does not observe Saturday New Year's Day on the previous Friday
+        if holiday.month == 1 and holiday.day == 1:
+            return None
+        return holiday - timedelta(days=1)
+    if holiday.weekday() == 6:
+        return holiday + timedelta(days=1)
+    return holiday
+
+
+@lru_cache(maxsize=64)
+def exchange_holidays(year: int) -> FrozenSet[date]:
+    """Full-day US exchange (NYSE/Nasdaq) holidays for a year"""
+    fixed = [date(year, 1, 1), date(year, 7, 4), date(year, 12, 25)]
+    if year >= 2022:
+        fixed.append(date(year, 6, 19))  # Juneteenth
+
+    holidays = {observed for observed in (_observed(day) for day in fixed) if observed}
+    holidays.update({
+        _nth_weekday(year, 1, 0, 3),     # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),     # Washington's Birthday
+        _easter_sunday(year) - timedelta(days=2),  # Good Friday
+        _last_weekday(year, 5, 0),       # Memorial Day
+        _nth_weekday(year, 9, 0, 1),     # Labor Day
+        _nth_weekday(year, 11, 3, 4),    # Thanksgiving
+    })
+    return frozenset(holidays)
+
+
+def is_trading_day(day: date) -> bool:
+    """Whether the exchange holds a regular session on the given day"""
+    return day.weekday() < 5 and day not in exchange_holidays(day.year)
+
+
+def first_trading_day_on_or_after(day: date) -> date:
+    """The first trading session on or after a day"""
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return day
+
+
+def last_trading_day_on_or_before(day: date) -> date:
+    """The last trading session on or before a day"""
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def has_trading_day(start: date, end: date) -> bool:
+    """Whether the inclusive range [start, end] contains at least one session"""
+    if end < start:
+        return False
+    return first_trading_day_on_or_after(start) <= end
+
+
+def trading_days(start: date, end: date) -> np.ndarray:
+    """The sessions in the inclusive range [start, end] as a sorted datetime64[D] array"""
+    holidays = [day for year in range(start.year, end.year + 1) for day in exchange_holidays(year)]
+    days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    return days[np.is_busday(days, holidays=holidays)]
@@ -0,0 +1,135 @@
+import os
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.database.database import SessionLocal
+from app.models.models import Stock, FinancialData
+
+load_dotenv()
+
+PEER_FIELDS = ["ticker", "name", "sector", "industry", "market_cap", "pe_ratio", "pb_ratio", "dividend_yield", "roe", "debt_to_equity", "date"]
+
+
+def _rank_key(peer: Dict[str, Any]):
+    # Largest companies first, companies without a market cap last
+    market_cap = peer.get("market_cap")
+    return (market_cap is None, -(market_cap or 0), peer["ticker"])
+
+
+class PeerIndex:
+    """
+    In-memory industry and sector peer lists for /industry/{industry}/peers.
+
+    Built from the Stock rows and their latest FinancialData snapshots, ranked by
+    market cap and rebuilt by a background task. Requests are answered with a
+    dictionary lookup; snapshots stored by the fundamentals cache are applied to
+    the index as they are written.
+    """
+
+    def __init__(self, refresh_seconds: Optional[int] = None):
+        self.refresh_seconds = refresh_seconds or int(os.getenv("PEER_INDEX_REFRESH_SECONDS", "900"))
+        self._by_industry: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_sector: Dict[str, List[Dict[str, Any]]] = {}
+        # The industry and sector keys each ticker is listed under
+        self._groups: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        self.built_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, industry: str) -> Optional[List[Dict[str, Any]]]:
+        """Peers for an industry name, falling back to a sector name; None if unknown"""
+        key = industry.lower()
+        return self._by_industry.get(key) or self._by_sector.get(key)
+
+    def rebuild(self, db: Session):
+        """Replace the index with the current contents of the database"""
+        latest = db.query(
+            FinancialData.stock_id,
+            func.max(FinancialData.date).label("date")
+        ).group_by(FinancialData.stock_id).subquery()
+
+        rows = db.query(Stock, FinancialData).join(
+            latest, latest.c.stock_id == Stock.id
+        ).join(
+            FinancialData, and_(FinancialData.stock_id == latest.c.stock_id, FinancialData.date == latest.c.date)
+        ).all()
+
+        by_industry: Dict[str, List[Dict[str, Any]]] = {}
+        by_sector: Dict[str, List[Dict[str, Any]]] = {}
+        groups: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        for stock, snapshot in rows:
+            peer = {field: getattr(snapshot, field, None) for field in PEER_FIELDS}
+            peer.update(ticker=stock.ticker, name=stock.name, sector=stock.sector, industry=stock.industry)
+            if stock.industry:
+                by_industry.setdefault(stock.industry.lower(), []).append(peer)
+            if stock.sector:
+                by_sector.setdefault(stock.sector.lower(), []).append(peer)
+            groups[stock.ticker] = (stock.industry.lower() if stock.industry else None, stock.sector.lower() if stock.sector else None)
+
+        for peers in list(by_industry.values()) + list(by_sector.values()):
+            peers.sort(key=_rank_key)
+
+        # Swap whole maps so readers never see a partially built index
+        self._by_industry, self._by_sector, self._groups = by_industry, by_sector, groups
+        self.built_at = datetime.now()
+
+    def update(self, data: Dict[str, Any]):
+        """Apply freshly fetched fundamentals for one ticker"""
+        peer = {field: data.get(field) for field in PEER_FIELDS}
+        ticker = peer["ticker"]
+        keys = (peer["industry"].lower() if peer["industry"] else None, peer["sector"].lower() if peer["sector"] else None)
+        # A company whose industry or sector changed leaves its previous groups
+        for index, key in zip((self._by_industry, self._by_sector), self._groups.get(ticker, (None, None))):
+            if key is None or key not in index:
+                continue
+            peers = [p for p in index[key] if p["ticker"] != ticker]
+            if peers:
+                index[key] = peers
+            else:
+                del index[key]
+        for index, key in zip((self._by_industry, self._by_sector), keys):
+            if not key:
+                continue
+            peers = [p for p in index.get(key, []) if p["ticker"] != ticker]
+            peers.append(peer)
+            peers.sort(key=_rank_key)
+            index[key] = peers
+        self._groups[ticker] = keys
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self._rebuild_with_session)
+            except Exception as e:
+                # Keep serving the previous index
+                print(f"Peer index rebuild failed: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def _rebuild_with_session(self):
+        db = SessionLocal()
+        try:
+            self.rebuild(db)
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "industries": len(self._by_industry),
+            "sectors": len(self._by_sector),
+            "built_at": self.built_at.isoformat() if self.built_at else None,
+        }
+
+
+peer_index = PeerIndex()
@@ -0,0 +1,199 @@
+import os
+import time
+import fcntl
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date
+
+import numpy as np
+import pyarrow as pa
+from dotenv import load_dotenv
+
+from app.adapters.bar_series import BarSeries, SERIES_FIELDS, SERIES_DTYPES
+
+load_dotenv()
+
+# Dates as int64 day numbers, which view as datetime64[D] without a copy
+STORE_SCHEMA = pa.schema(
+    [("date", pa.int64())]
+    + [(field, pa.int64() if field == "volume" else pa.float64()) for field in SERIES_FIELDS]
+)
+
+
+class MappedBars:
+    """Zero-copy column views of one memory-mapped price file"""
+    __slots__ = ("key", "days", "columns")
+
+    def __init__(self, key: Tuple[int, int, int], days: np.ndarray, columns: Dict[str, np.ndarray]):
+        self.key = key
+        self.days = days
+        self.columns = columns
+
+    def between(self, first: date, last: date) -> BarSeries:
+        low, high = np.searchsorted(self.days, [
+            np.datetime64(first, "D").astype(np.int64), np.datetime64(last, "D").astype(np.int64) + 1
+        ])
+        return BarSeries(self.days[low:high].view("datetime64[D]"), **{field: column[low:high] for field, column in self.columns.items()})
+
+    def series(self) -> BarSeries:
+        return BarSeries(self.days.view("datetime64[D]"), **self.columns)
+
+
+class PriceStore:
+    """
+    Optional columnar copy of historical_data: one memory-mapped file per stock.
+
+    PRICE_STORE_DIR holds STOCK_ID.arrow, an uncompressed Arrow IPC file with
+    every stored bar of the stock sorted by date. Reads map the file and slice
+    the columns by date range without copying, so multi-year reads across many
+    tickers cost a binary search per ticker, and the pages are shared through
+    the page cache by all workers on the host. At most PRICE_STORE_OPEN_FILES
+    mappings are kept open per process.
+
+    The historical store keeps the files in sync with its ingest path: once a
+    write-behind flush has committed fetched bars, they are merged into the
+    stock's file from a worker thread, and a stock read before it has a file
+    gets one built from its rows. Files are replaced atomically, so readers
+    never see a partial file. Delete the directory when the database is
+    recreated, as files are named by stock id.
+    """
+
+    def __init__(self, directory: Optional[str] = None, open_files: Optional[int] = None):
+        self.directory = directory if directory is not None else os.getenv("PRICE_STORE_DIR", "")
+        self.open_files = open_files or int(os.getenv("PRICE_STORE_OPEN_FILES", "4096"))
+        self._mapped: "OrderedDict[int, MappedBars]" = OrderedDict()
+        self.reads = 0
+        self.misses = 0
+        self.opens = 0
+        self.created = 0
+        self.writes = 0
+        self.last_write_ms = 0.0
+        if self.enabled:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def read(self, stock_ids: List[int], first: date, last: date) -> Tuple[Dict[int, BarSeries], List[int]]:
+        """Bars in [first, last] of each stock that has a file, and the stocks that have none"""
+        series, missing = {}, []
+        for stock_id in stock_ids:
+            mapped = self._open(stock_id)
+            if mapped is None:
+                missing.append(stock_id)
+                continue
+            series[stock_id] = mapped.between(first, last)
+        self.reads += len(stock_ids)
+        self.misses += len(missing)
+        return series, missing
+
+    def has(self, stock_id: int) -> bool:
+        return os.path.exists(self._path(stock_id))
+
+    def create(self, stock_id: int, series: BarSeries):
+        """Write a stock's first file, unless one appeared meanwhile (it is at least as recent)"""
+        temporary = self._write_temporary(stock_id, series)
+        try:
+            os.link(temporary, self._path(stock_id))
+            self.created += 1
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(temporary)
+
+    def replace(self, stock_id: int, series: BarSeries):
+        """Make the file hold exactly these bars"""
+        with self._locked():
+            os.replace(self._write_temporary(stock_id, series), self._path(stock_id))
+
+    def merge(self, stock_id: int, series: BarSeries):
+        """Add bars to a stock's file; bars on dates already in the file replace them"""
+        with self._locked():
+            # Mapped outside the LRU, which belongs to the readers on the event loop
+            mapped = self._map(stock_id) if self.has(stock_id) else None
+            parts = [mapped.series()] if mapped is not None else []
+            merged = BarSeries.concat(parts + [series]).dedupe()
+            os.replace(self._write_temporary(stock_id, merged), self._path(stock_id))
+
+    def discard(self, stock_id: int):
+        """Remove a stock's file, so its next read rebuilds it from the database"""
+        with self._locked():
+            try:
+                os.unlink(self._path(stock_id))
+            except FileNotFoundError:
+                pass
+
+    def _open(self, stock_id: int) -> Optional[MappedBars]:
+        try:
+            stat = os.stat(self._path(stock_id))
+        except FileNotFoundError:
+            self._mapped.pop(stock_id, None)
+            return None
+        key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        mapped = self._mapped.get(stock_id)
+        if mapped is not None and mapped.key == key:
+            self._mapped.move_to_end(stock_id)
+            return mapped
+
+        mapped = self._map(stock_id, key)
+        self._mapped[stock_id] = mapped
+        self._mapped.move_to_end(stock_id)
+        while len(self._mapped) > self.open_files:
+            self._mapped.popitem(last=False)
+        self.opens += 1
+        return mapped
+
+    def _map(self, stock_id: int, key: Tuple[int, int, int] = (0, 0, 0)) -> MappedBars:
+        table = pa.ipc.open_file(pa.memory_map(self._path(stock_id))).read_all()
+        # One chunk per column, written that way, so these are views of the mapping
+        columns = {field: table.column(field).chunk(0).to_numpy() if len(table) else np.array([], dtype=SERIES_DTYPES[field]) for field in SERIES_FIELDS}
+        days = table.column("date").chunk(0).to_numpy() if len(table) else np.array([], dtype=np.int64)
+        return MappedBars(key, days, columns)
+
+    def _write_temporary(self, stock_id: int, series: BarSeries) -> str:
+        started = time.monotonic()
+        series = series.dedupe()
+        table = pa.Table.from_arrays(
+            [pa.array(series.dates.astype("datetime64[D]").astype(np.int64))]
+            + [pa.array(getattr(series, field)) for field in SERIES_FIELDS],
+            schema=STORE_SCHEMA
+        )
+        # Files are written from the event loop (create) and from the write-behind thread
+        temporary = f"{self._path(stock_id)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with pa.OSFile(temporary, "wb") as sink, pa.ipc.new_file(sink, STORE_SCHEMA) as writer:
+            writer.write_table(table)
+        self.writes += 1
+        self.last_write_ms = (time.monotonic() - started) * 1000
+        return temporary
+
+    @contextmanager
+    def _locked(self):
+        """Serialize read-modify-write of files between the worker processes sharing the directory"""
+        with open(os.path.join(self.directory, ".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _path(self, stock_id: int) -> str:
+        return os.path.join(self.directory, f"{stock_id}.arrow")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "open_files": len(self._mapped),
+            "reads": self.reads,
+            # Stocks read before they had a file, whose file was then built from the database
+            "misses": self.misses,
+            "opens": self.opens,
+            "created": self.created,
+            "writes": self.writes,
+            "last_write_ms": round(self.last_write_ms, 2),
+        }
+
+
+price_store = PriceStore()
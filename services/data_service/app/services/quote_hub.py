@@ -0,0 +1,194 @@
+import os
+import time
+import asyncio
+from typing import List, Dict, Any, Optional, Set, Iterable
+from dotenv import load_dotenv
+
+from app.adapters.factory import get_data_source
+from app.adapters.scheduler import upstream_lane
+from app.services.quote_store import quote_store
+
+load_dotenv()
+
+
+class QuoteSubscription:
+    """
+    One streaming client: the tickers it follows and the quotes not yet sent to it.
+
+    Pending quotes are kept per ticker, so a client that reads slower than
+    quotes arrive gets the newest quote of each ticker instead of a growing
+    backlog (coalescing); its buffer never exceeds one quote per ticker.
+    """
+
+    def __init__(self):
+        self.tickers: Set[str] = set()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._ready = asyncio.Event()
+        self.delivered = 0
+
+    def has_pending(self, ticker: str) -> bool:
+        return ticker in self._pending
+
+    def offer(self, quote: Dict[str, Any]):
+        self._pending[quote["ticker"]] = quote
+        self._ready.set()
+
+    async def next(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Wait for quotes and take every pending one; empty after timeout seconds without any"""
+        if not self._pending:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        quotes = list(self._pending.values())
+        self._pending.clear()
+        self.delivered += len(quotes)
+        return quotes
+
+
+class QuoteHub:
+    """
+    Polls the data source for the quotes of all subscribed tickers and fans them out.
+
+    Subscriptions are reference-counted per ticker: a ticker is polled once per
+    QUOTE_POLL_SECONDS however many clients follow it, and dropped from the
+    poll when its last subscriber leaves. A newly subscribed ticker is polled
+    right away; new subscribers of a known ticker get its latest quote at once.
+    Polls go out in batches of QUOTE_BATCH_SIZE through the upstream scheduler's
+    alerts lane, below interactive page loads. Only changed quotes are fanned out;
+    every polled quote is recorded in the quote store.
+    """
+
+    def __init__(self, poll_seconds: Optional[float] = None, batch_size: Optional[int] = None):
+        self.poll_seconds = poll_seconds or float(os.getenv("QUOTE_POLL_SECONDS", "5"))
+        self.batch_size = batch_size or int(os.getenv("QUOTE_BATCH_SIZE", "200"))
+        self._subscribers: Dict[str, Set[QuoteSubscription]] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._new: Set[str] = set()
+        self._connections = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+        self.published = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.last_poll_ms: Optional[float] = None
+
+    def connect(self) -> QuoteSubscription:
+        self._connections += 1
+        return QuoteSubscription()
+
+    def disconnect(self, subscription: QuoteSubscription):
+        self._connections -= 1
+        self.unsubscribe(subscription, list(subscription.tickers))
+
+    def subscribe(self, subscription: QuoteSubscription, tickers: Iterable[str]):
+        for ticker in tickers:
+            if ticker in subscription.tickers:
+                continue
+            subscription.tickers.add(ticker)
+            self._subscribers.setdefault(ticker, set()).add(subscription)
+            if ticker in self._latest:
+                subscription.offer(self._latest[ticker])
+            else:
+                self._new.add(ticker)
+        if self._new and self._wakeup is not None:
+            self._wakeup.set()
+
+    def unsubscribe(self, subscription: QuoteSubscription, tickers: Iterable[str]):
+        for ticker in tickers:
+            subscription.tickers.discard(ticker)
+            subscribers = self._subscribers.get(ticker)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                # Last subscriber gone: stop polling the ticker
+                del self._subscribers[ticker]
+                self._latest.pop(ticker, None)
+                self._new.discard(ticker)
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        upstream_lane.set("alerts")
+        next_poll = 0.0
+        while True:
+            self._wakeup.clear()
+            try:
+                if self._subscribers and time.monotonic() >= next_poll:
+                    self._new.clear()
+                    next_poll = time.monotonic() + self.poll_seconds
+                    await self._poll(list(self._subscribers))
+                elif self._new:
+                    new = list(self._new)
+                    self._new.clear()
+                    await self._poll(new)
+            except Exception as e:
+                # Keep streaming the last quotes and retry on the next poll
+                self.errors += 1
+                print(f"Quote poll failed: {e}")
+
+            timeout = max(0.0, next_poll - time.monotonic()) if self._subscribers else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, tickers: List[str]):
+        started = time.perf_counter()
+        batches = [tickers[i:i + self.batch_size] for i in range(0, len(tickers), self.batch_size)]
+        results = await asyncio.gather(*[get_data_source().get_quotes(batch) for batch in batches], return_exceptions=True)
+        self.polls += 1
+        self.last_poll_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        for result in results:
+            if isinstance(result, Exception):
+                self.errors += 1
+                print(f"Quote poll failed: {result}")
+                continue
+            quotes, _ = result
+            await quote_store.record(quotes)
+            for ticker, quote in quotes.items():
+                self.publish(quote)
+
+    def publish(self, quote: Dict[str, Any]):
+        """Record a quote and offer it to the ticker's subscribers if it changed"""
+        ticker = quote["ticker"]
+        subscribers = self._subscribers.get(ticker)
+        if not subscribers:
+            return
+        previous = self._latest.get(ticker)
+        if previous is not None and (previous["price"], previous["market_time"]) == (quote["price"], quote["market_time"]):
+            return
+        self._latest[ticker] = quote
+        self.published += 1
+        for subscription in subscribers:
+            if subscription.has_pending(ticker):
+                self.coalesced += 1
+            subscription.offer(quote)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": self._connections,
+            "tickers": len(self._subscribers),
+            "subscriptions": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "polls": self.polls,
+            "last_poll_ms": self.last_poll_ms,
+            "published": self.published,
+            # Quotes replaced by a newer one before a slow client read them
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+        }
+
+
+quote_hub = QuoteHub()
@@ -0,0 +1,160 @@
+import os
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from dotenv import load_dotenv
+
+from app.adapters.data_source import DataSource, BatchResult, build_quote
+from app.database.database import insert_for
+from app.models.models import LatestQuote
+from app.services.singleflight import quotes_flight
+from app.services.write_behind import write_behind
+
+load_dotenv()
+
+# Quote fields stored in latest_quotes besides the ticker and the timestamps
+QUOTE_FIELDS = ["price", "previous_close", "change", "change_percent", "volume", "currency"]
+
+# A quote and the time it was fetched
+StoredQuote = Tuple[Dict[str, Any], datetime]
+
+
+def parse_market_time(value: Optional[str]) -> Optional[datetime]:
+    """Parse a quote's ISO market time into a naive UTC datetime for the table"""
+    if not value:
+        return None
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+class QuoteStore:
+    """
+    Latest quote per ticker, kept in memory and in the latest_quotes table.
+
+    Quotes younger than QUOTE_TTL_SECONDS are answered from memory, or from the
+    table after a restart. Older and unknown tickers are fetched with one batch
+    quote call, joining fetches already in flight, and written to both (the
+    table through the write-behind buffer). When
+    that fetch fails the last known quote is returned, marked stale. The quote
+    hub records every quote it polls, so streamed tickers stay fresh without
+    extra upstream calls. Memory holds one entry per ticker ever quoted.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds or float(os.getenv("QUOTE_TTL_SECONDS", "60"))
+        self._quotes: Dict[str, StoredQuote] = {}
+        self.requests = 0
+        self.loaded = 0
+        self.fetched = 0
+        self.stale_served = 0
+
+    async def get_many(self, tickers: List[str], db: AsyncSession, data_source: DataSource) -> BatchResult:
+        """Get the latest quote of several tickers with its age; errors for tickers without any quote"""
+        self.requests += len(tickers)
+        now = datetime.now()
+        known = {ticker: self._quotes[ticker] for ticker in tickers if ticker in self._quotes}
+
+        not_known = [ticker for ticker in tickers if ticker not in known]
+        if not_known:
+            loaded = await db.run_sync(self._load, not_known)
+            self.loaded += len(loaded)
+            self._quotes.update(loaded)
+            known.update(loaded)
+            # Return the connection to the pool before any wait on the data source
+            await db.commit()
+
+        errors = {}
+        expired = [ticker for ticker in tickers if ticker not in known or self._age(known[ticker], now) > self.ttl_seconds]
+        if expired:
+            fetched, errors = await quotes_flight.do_batch(expired, lambda new_tickers: self._fetch_and_store(new_tickers, data_source))
+            known.update(fetched)
+
+        data = {}
+        for ticker in tickers:
+            if ticker not in known:
+                continue
+            if errors.pop(ticker, None) is not None:
+                # The refresh failed; the last known quote is better than none
+                self.stale_served += 1
+            data[ticker] = self._render(known[ticker], now)
+        return data, errors
+
+    async def record(self, quotes: Dict[str, Dict[str, Any]]):
+        """Store quotes fetched elsewhere (the quote hub's polls)"""
+        if not quotes:
+            return
+        fetched_at = datetime.now()
+        stored = {ticker: (quote, fetched_at) for ticker, quote in quotes.items()}
+        self._quotes.update(stored)
+        await write_behind.put("quotes", stored)
+
+    def _age(self, stored: StoredQuote, now: datetime) -> float:
+        return (now - stored[1]).total_seconds()
+
+    def _render(self, stored: StoredQuote, now: datetime) -> Dict[str, Any]:
+        quote, fetched_at = stored
+        age = self._age(stored, now)
+        result = dict(quote)
+        result["fetched_at"] = fetched_at.isoformat()
+        result["age_seconds"] = int(age)
+        result["stale"] = age > self.ttl_seconds
+        return result
+
+    async def _fetch_and_store(self, tickers: List[str], data_source: DataSource) -> Tuple[Dict[str, StoredQuote], Dict[str, str]]:
+        quotes, errors = await data_source.get_quotes(tickers)
+        fetched_at = datetime.now()
+        self.fetched += len(quotes)
+
+        stored = {ticker: (quote, fetched_at) for ticker, quote in quotes.items()}
+        self._quotes.update(stored)
+        await write_behind.put("quotes", stored)
+
+        return stored, errors
+
+    def _load(self, db: Session, tickers: List[str]) -> Dict[str, StoredQuote]:
+        rows = db.query(LatestQuote).filter(LatestQuote.ticker.in_(tickers)).all()
+        return {
+            row.ticker: (
+                build_quote(row.ticker, row.price, row.previous_close, volume=row.volume, market_time=row.market_time, currency=row.currency),
+                row.fetched_at
+            )
+            for row in rows
+        }
+
+    def _store(self, db: Session, quotes: Dict[str, StoredQuote]):
+        """Upsert one latest_quotes row per ticker (committed by the caller)"""
+        rows = [
+            dict(
+                {field: quote.get(field) for field in QUOTE_FIELDS},
+                ticker=ticker,
+                market_time=parse_market_time(quote.get("market_time")),
+                fetched_at=fetched_at
+            )
+            for ticker, (quote, fetched_at) in quotes.items()
+        ]
+        insert = insert_for(db)
+        statement = insert(LatestQuote)
+        statement = statement.on_conflict_do_update(
+            index_elements=["ticker"],
+            set_={field: statement.excluded[field] for field in QUOTE_FIELDS + ["market_time", "fetched_at"]}
+        )
+        # Bound per row and executed as a batch, like upsert_bars: one VALUES list with
+        # every quote would pass the driver's bind parameter limit at a few thousand tickers
+        db.execute(statement, rows)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tickers": len(self._quotes),
+            "requests": self.requests,
+            "loaded": self.loaded,
+            "fetched": self.fetched,
+            # Quotes returned past their TTL because the refresh failed
+            "stale_served": self.stale_served,
+        }
+
+
+quote_store = QuoteStore()
+write_behind.register("quotes", quote_store._store)
@@ -0,0 +1,96 @@
+from typing import Optional
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.adapters.bar_series import BarSeries
+
+HISTORICAL_INTERVALS = ["1d", "1wk", "1mo"]
+
+
+def parse_interval(interval: str) -> str:
+    if interval not in HISTORICAL_INTERVALS:
+        raise HTTPException(status_code=400, detail=f"Unknown interval: {interval}; expected one of {', '.join(HISTORICAL_INTERVALS)}")
+    return interval
+
+
+def parse_max_points(max_points: Optional[int]) -> Optional[int]:
+    if max_points is not None and max_points < 3:
+        raise HTTPException(status_code=400, detail="max_points must be at least 3")
+    return max_points
+
+
+def period_starts(series: BarSeries, interval: str) -> np.ndarray:
+    """The first calendar day of the week (Monday) or month each daily bar falls in"""
+    days = series.dates.astype("datetime64[D]")
+    if interval == "1mo":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    # 1970-01-01 was a Thursday, so day numbers shifted by 3 are 0 on Mondays
+    day_numbers = days.astype(np.int64)
+    return (day_numbers - (day_numbers + 3) % 7).astype("datetime64[D]")
+
+
+def resample(series: BarSeries, interval: str) -> BarSeries:
+    """
+    Aggregate daily bars into weekly or monthly bars.
+
+    Open is the first open of the period, high/low the extremes, close and
+    adjusted close the last values and volume the sum. Bars are labelled with
+    the period start, like Yahoo's own 1wk/1mo bars, so series of different
+    tickers line up. The current period is included while it is still open.
+    """
+    if interval == "1d" or not len(series):
+        return series
+
+    keys = period_starts(series, interval)
+    starts = np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+    ends = np.concatenate((starts[1:], [len(series)])) - 1
+
+    return BarSeries(
+        keys[starts],
+        open=series.open[starts],
+        # fmax/fmin skip missing prices instead of propagating NaN
+        high=np.fmax.reduceat(series.high, starts),
+        low=np.fmin.reduceat(series.low, starts),
+        close=series.close[ends],
+        volume=np.add.reduceat(series.volume, starts),
+        adjusted_close=series.adjusted_close[ends],
+    )
+
+
+def lttb(series: BarSeries, max_points: int) -> BarSeries:
+    """
+    Decimate to at most max_points bars with Largest-Triangle-Three-Buckets on close.
+
+    The first and last bars are always kept; from each bucket in between the bar
+    forming the largest triangle with the previously kept bar and the average of
+    the next bucket is kept. The kept bars are returned whole (all fields).
+    """
+    n = len(series)
+    if max_points >= n or max_points < 3:
+        return series
+
+    x = series.dates.astype("datetime64[D]").astype(np.float64)
+    y = series.close
+    # Bucket edges over the bars between the first and the last one
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        # Average point of the next bucket (the last bar for the final bucket)
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.nanargmax(area)) if not np.isnan(area).all() else start
+        selected[bucket + 1] = previous
+
+    return series.take(selected)
@@ -0,0 +1,252 @@
+import os
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.adapters.bar_series import BarSeries
+from app.services.market_calendar import trading_days, last_trading_day_on_or_before
+
+load_dotenv()
+
+DateRange = Tuple[date, date]
+# Stored and pending bars of several stocks in [first, last] per stock id (HistoricalStore.read_series)
+SeriesLoader = Callable[[List[int], date, date], Awaitable[Dict[int, BarSeries]]]
+
+# Days added past the requested end when the session axis grows, so it is not regrown every day
+AXIS_SLACK_DAYS = 120
+INITIAL_ROWS = 64
+# Plans whose rows were dropped by a concurrent request while loading are redone
+PLAN_ATTEMPTS = 3
+
+
+class ReturnsMatrix:
+    """
+    Aligned adjusted closes and log returns of many stocks, shared by all requests.
+
+    Two C-contiguous float64 arrays hold one row per stock and one column per
+    session of the exchange calendar, NaN where a stock has no bar. Each row
+    records the sessions it holds completely, so a request only loads what its
+    rows are missing (usually nothing after the first request) and cuts the
+    sub-matrices out of the arrays. Bars written by the historical store are
+    copied into the rows already held as they are flushed; sessions from today
+    on may still change and are reloaded by every request.
+
+    The log return of a session is taken against the previous session's close
+    and is NaN when either is missing. At most RETURNS_MATRIX_MAX_TICKERS rows
+    are kept, dropping the least recently requested stock first. Bars on days
+    that are not sessions of the calendar are not held.
+    """
+
+    def __init__(self, max_tickers: Optional[int] = None):
+        self.max_tickers = max_tickers or int(os.getenv("RETURNS_MATRIX_MAX_TICKERS", "1000"))
+        self.sessions = np.array([], dtype="datetime64[D]")
+        self.closes = np.full((0, 0), np.nan)
+        self.returns = np.full((0, 0), np.nan)
+        # Calendar days spanned by the session axis
+        self._axis: Optional[DateRange] = None
+        # Row of each stock, least recently requested first
+        self._rows: "OrderedDict[int, int]" = OrderedDict()
+        # Sessions each row holds completely
+        self._windows: Dict[int, DateRange] = {}
+        self._free: List[int] = []
+        self.requests = 0
+        self.loaded_series = 0
+        self.recorded_bars = 0
+        self.off_calendar_bars = 0
+        self.evictions = 0
+        self.replans = 0
+
+    async def get(self, load: SeriesLoader, stock_ids: List[int], first: date, last: date) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The sessions in [first, last] and the adjusted close and log return rows of the stocks, in their order"""
+        if len(stock_ids) > self.max_tickers:
+            raise ValueError(f"At most {self.max_tickers} tickers fit in the returns matrix")
+        self.requests += 1
+        today = datetime.now().date()
+        last = min(last, today)
+        if last < first:
+            return np.array([], dtype="datetime64[D]"), np.full((len(stock_ids), 0), np.nan), np.full((len(stock_ids), 0), np.nan)
+
+        # The first session's return needs the close before it
+        load_first = last_trading_day_on_or_before(first - timedelta(days=1))
+        # Like the coverage ledger, today's session is never held as complete
+        settled = min(last, today - timedelta(days=1))
+
+        for _ in range(PLAN_ATTEMPTS):
+            plan = {stock_id: self._windows.get(stock_id) for stock_id in stock_ids}
+            parts: Dict[DateRange, List[int]] = {}
+            for stock_id, window in plan.items():
+                for part in self._missing(window, load_first, settled):
+                    parts.setdefault(part, []).append(stock_id)
+            if last > settled:
+                parts[(max(load_first, settled + timedelta(days=1)), last)] = list(stock_ids)
+
+            loaded = []
+            for (part_first, part_last), part_ids in parts.items():
+                loaded.append((part_first, part_last, part_ids, await load(part_ids, part_first, part_last)))
+                self.loaded_series += len(part_ids)
+
+            # Nothing below awaits, so rows cannot change between this check and the slice
+            if all(self._still_valid(self._windows.get(stock_id), window, load_first, settled) for stock_id, window in plan.items()):
+                self._apply(stock_ids, load_first, last, settled, loaded)
+                return self._slice(stock_ids, first, last)
+            self.replans += 1
+        raise RuntimeError("Returns matrix rows kept changing while loading; retry with fewer tickers")
+
+    def record(self, stock_id: int, series: BarSeries):
+        """Copy newly stored bars into the stock's row, if the matrix holds it"""
+        row = self._rows.get(stock_id)
+        if row is None or not len(series) or self._axis is None:
+            return
+        series = series.between(*self._axis)
+        columns = self._scatter(row, series)
+        if len(columns):
+            self._update_returns(row, columns.min(), columns.max() + 2)
+        self.recorded_bars += len(columns)
+
+    def _still_valid(self, current: Optional[DateRange], planned: Optional[DateRange], first: date, last: date) -> bool:
+        """Whether parts loaded against the planned window still complete the row's window to [first, last]"""
+        if planned is None:
+            # A row added meanwhile must touch the loaded range, or the held sessions would not be contiguous
+            return current is None or (current[0] <= last and current[1] >= first)
+        # Another request may have extended the row, but it must not have been dropped
+        return current is not None and current[0] <= planned[0] and current[1] >= planned[1]
+
+    def _missing(self, window: Optional[DateRange], first: date, last: date) -> List[DateRange]:
+        """The parts of [first, last], and of the gap to the held window, that a row still needs"""
+        if last < first:
+            return []
+        if window is None:
+            return [(first, last)]
+        held_first, held_last = window
+        parts = []
+        if first < held_first:
+            parts.append((first, held_first - timedelta(days=1)))
+        if last > held_last:
+            parts.append((held_last + timedelta(days=1), last))
+        return parts
+
+    def _apply(self, stock_ids: List[int], first: date, last: date, settled: date, loaded: List[Tuple[date, date, List[int], Dict[int, BarSeries]]]):
+        self._cover(first, last)
+        rows = self._assign_rows(stock_ids)
+        for part_first, part_last, part_ids, series in loaded:
+            low, high = self._columns(part_first, part_last)
+            for stock_id in part_ids:
+                row = rows[stock_id]
+                self.closes[row, low:high] = np.nan
+                if stock_id in series:
+                    self._scatter(row, series[stock_id].between(part_first, part_last))
+                self._update_returns(row, low, high + 1)
+        if first <= settled:
+            for stock_id in stock_ids:
+                window = self._windows.get(stock_id)
+                self._windows[stock_id] = (min(window[0], first), max(window[1], settled)) if window else (first, settled)
+
+    def _assign_rows(self, stock_ids: List[int]) -> Dict[int, int]:
+        """Rows of the stocks, taking free or least recently requested rows for new ones"""
+        for stock_id in stock_ids:
+            if stock_id in self._rows:
+                self._rows.move_to_end(stock_id)
+        for stock_id in stock_ids:
+            if stock_id in self._rows:
+                continue
+            if not self._free and len(self._rows) < self.max_tickers:
+                self._grow_rows()
+            if self._free:
+                row = self._free.pop()
+            else:
+                evicted, row = self._rows.popitem(last=False)
+                self._windows.pop(evicted, None)
+                self.evictions += 1
+            self.closes[row] = np.nan
+            self.returns[row] = np.nan
+            self._rows[stock_id] = row
+        return {stock_id: self._rows[stock_id] for stock_id in stock_ids}
+
+    def _grow_rows(self):
+        capacity = len(self.closes)
+        grown = min(max(capacity * 2, INITIAL_ROWS), self.max_tickers)
+        self.closes = self._with_rows(self.closes, grown)
+        self.returns = self._with_rows(self.returns, grown)
+        self._free.extend(range(grown - 1, capacity - 1, -1))
+
+    def _cover(self, first: date, last: date):
+        """Extend the session axis to [first, last], keeping what the rows hold"""
+        if self._axis and self._axis[0] <= first and last <= self._axis[1]:
+            return
+        if self._axis:
+            first = min(first, self._axis[0])
+            last = max(last + timedelta(days=AXIS_SLACK_DAYS), self._axis[1]) if last > self._axis[1] else self._axis[1]
+        else:
+            last = last + timedelta(days=AXIS_SLACK_DAYS)
+        sessions = trading_days(first, last)
+        offset = int(np.searchsorted(sessions, self.sessions[0])) if len(self.sessions) else 0
+        self.closes = self._with_columns(self.closes, len(sessions), offset)
+        self.returns = self._with_columns(self.returns, len(sessions), offset)
+        self.sessions = sessions
+        self._axis = (first, last)
+
+    def _with_rows(self, matrix: np.ndarray, rows: int) -> np.ndarray:
+        grown = np.full((rows, matrix.shape[1]), np.nan)
+        grown[:len(matrix)] = matrix
+        return grown
+
+    def _with_columns(self, matrix: np.ndarray, columns: int, offset: int) -> np.ndarray:
+        """The matrix widened to `columns`, its old columns starting at `offset`"""
+        grown = np.full((len(matrix), columns), np.nan)
+        grown[:, offset:offset + matrix.shape[1]] = matrix
+        return grown
+
+    def _columns(self, first: date, last: date) -> Tuple[int, int]:
+        """The column slice of the sessions in [first, last]"""
+        return (
+            int(np.searchsorted(self.sessions, np.datetime64(first, "D"), side="left")),
+            int(np.searchsorted(self.sessions, np.datetime64(last, "D"), side="right")),
+        )
+
+    def _scatter(self, row: int, series: BarSeries) -> np.ndarray:
+        """Write the series' adjusted closes into the row; returns the columns written"""
+        dates = series.dates.astype("datetime64[D]")
+        columns = np.minimum(np.searchsorted(self.sessions, dates), max(len(self.sessions) - 1, 0))
+        on_calendar = self.sessions[columns] == dates if len(self.sessions) else np.zeros(len(dates), dtype=bool)
+        self.off_calendar_bars += int(len(dates) - on_calendar.sum())
+        columns = columns[on_calendar]
+        self.closes[row, columns] = series.adjusted_close[on_calendar]
+        return columns
+
+    def _update_returns(self, row: int, low: int, high: int):
+        """Recompute the log returns of columns [low, high) of a row"""
+        low, high = max(low, 1), min(high, len(self.sessions))
+        if high <= low:
+            return
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.log(self.closes[row, low:high] / self.closes[row, low - 1:high - 1])
+        returns[~np.isfinite(returns)] = np.nan
+        self.returns[row, low:high] = returns
+
+    def _slice(self, stock_ids: List[int], first: date, last: date) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        low, high = self._columns(first, last)
+        rows = [self._rows[stock_id] for stock_id in stock_ids]
+        # Fancy indexing copies, so later updates do not show through
+        return self.sessions[low:high].copy(), self.closes[rows, low:high], self.returns[rows, low:high]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tickers": len(self._rows),
+            "row_capacity": len(self.closes),
+            "sessions": len(self.sessions),
+            "first_session": str(self.sessions[0]) if len(self.sessions) else None,
+            "last_session": str(self.sessions[-1]) if len(self.sessions) else None,
+            "memory_mb": round((self.closes.nbytes + self.returns.nbytes) / 2 ** 20, 2),
+            "requests": self.requests,
+            "loaded_series": self.loaded_series,
+            "recorded_bars": self.recorded_bars,
+            "off_calendar_bars": self.off_calendar_bars,
+            "evictions": self.evictions,
+            "replans": self.replans,
+        }
+
+
+returns_matrix = ReturnsMatrix()
@@ -0,0 +1,90 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+# Results and error messages keyed by the same keys that were requested
+KeyedResult = Tuple[Dict[Hashable, Any], Dict[Hashable, str]]
+
+
+class SingleFlight:
+    """
+    Per-key registry of in-flight upstream work.
+
+    Concurrent callers asking for the same key (e.g. ticker, data kind and date
+    range) share one execution instead of each calling the data source and
+    writing the same rows. The shared work runs as its own task, so a caller
+    that disconnects does not cancel it for the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.requests = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do_batch(self, keys: List[Hashable], fn: Callable[[List[Hashable]], Awaitable[KeyedResult]]) -> KeyedResult:
+        """
+        Resolve several keys at once.
+
+        Keys already in flight are awaited; the rest are passed to fn in one call,
+        which must return (results, errors) keyed by those keys. If a shared call
+        raises, its keys are reported as errors.
+        """
+        self.requests += len(keys)
+
+        tasks: Dict[Hashable, asyncio.Future] = {}
+        new_keys = []
+        for key in keys:
+            if key in self._in_flight:
+                tasks[key] = self._in_flight[key]
+                self.coalesced += 1
+            else:
+                new_keys.append(key)
+
+        if new_keys:
+            self.executions += 1
+            task = asyncio.ensure_future(fn(new_keys))
+            for key in new_keys:
+                self._in_flight[key] = task
+                tasks[key] = task
+            task.add_done_callback(lambda done, started=new_keys: self._finish(started, done))
+
+        results: Dict[Hashable, Any] = {}
+        errors: Dict[Hashable, str] = {}
+        for task in set(tasks.values()):
+            try:
+                task_results, task_errors = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                task_errors = {key: str(e) or e.__class__.__name__ for key, other in tasks.items() if other is task}
+                task_results = {}
+            results.update({key: value for key, value in task_results.items() if key in tasks})
+            errors.update({key: value for key, value in task_errors.items() if key in tasks})
+
+        return results, errors
+
+    def _finish(self, keys: List[Hashable], task: asyncio.Future):
+        for key in keys:
+            if self._in_flight.get(key) is task:
+                del self._in_flight[key]
+        # Mark a failure as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
+
+
+historical_flight = SingleFlight("historical")
+financials_flight = SingleFlight("financials")
+quotes_flight = SingleFlight("quotes")
+
+
+def single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    return {flight.name: flight.stats() for flight in (historical_flight, financials_flight, quotes_flight)}
@@ -0,0 +1,304 @@
+import os
+import re
+import csv
+import time
+import asyncio
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.database.database import SessionLocal
+from app.models.models import Stock, FinancialData
+
+load_dotenv()
+
+SYMBOL_FIELDS = ["ticker", "name", "sector", "industry", "exchange", "market_cap", "pe_ratio"]
+
+# Column names accepted in symbol listing files (e.g. nasdaqlisted.txt, otherlisted.txt or a plain CSV)
+LISTING_COLUMNS = {
+    "ticker": ["ticker", "symbol", "act symbol", "nasdaq symbol"],
+    "name": ["name", "security name", "company name", "company"],
+    "sector": ["sector"],
+    "industry": ["industry"],
+    "exchange": ["exchange", "listing exchange"],
+    "market_cap": ["market_cap", "market cap", "marketcap"],
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def load_listing(path: str) -> List[Dict[str, Any]]:
+    """Read a comma- or pipe-delimited symbol listing with a header row"""
+    with open(path, newline="", encoding="utf-8") as f:
+        header = f.readline()
+        f.seek(0)
+        reader = csv.DictReader(f, delimiter="|" if "|" in header else ",")
+        columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+        mapping = {
+            field: next((columns[alias] for alias in aliases if alias in columns), None)
+            for field, aliases in LISTING_COLUMNS.items()
+        }
+        if mapping["ticker"] is None:
+            raise ValueError(f"No ticker/symbol column in {path}")
+
+        symbols = []
+        for row in reader:
+            ticker = (row.get(mapping["ticker"]) or "").strip().upper()
+            # nasdaqtrader files end with a "File Creation Time" footer row
+            if not ticker or " " in ticker:
+                continue
+            item = {field: (row.get(column) or "").strip() if column else "" for field, column in mapping.items()}
+            item["ticker"] = ticker
+            try:
+                item["market_cap"] = float(item["market_cap"]) if item["market_cap"] else None
+            except ValueError:
+                item["market_cap"] = None
+            symbols.append(item)
+        return symbols
+
+
+class SymbolIndex:
+    """
+    In-memory search index for /industry/search autocomplete.
+
+    Tickers and the words of company names are kept in sorted arrays for prefix
+    lookups with bisect; a trigram index over ticker and name handles typos.
+    Sector, industry and exchange match on word prefixes. Results are ranked by
+    match quality and then by market cap. Queries already sent to the data
+    source are remembered for a while, since its results were added to the
+    index and asking again would not find more.
+    """
+
+    def __init__(self, refresh_seconds: Optional[int] = None, listing_path: Optional[str] = None,
+                 searched_ttl_seconds: Optional[int] = None, max_searched: int = 10000):
+        self.refresh_seconds = refresh_seconds or int(os.getenv("SYMBOL_INDEX_REFRESH_SECONDS", "3600"))
+        self.listing_path = listing_path or os.getenv("SYMBOL_LISTING_FILE", "")
+        self.searched_ttl_seconds = searched_ttl_seconds or int(os.getenv("SYMBOL_SEARCH_UPSTREAM_TTL_SECONDS", "3600"))
+        self.max_searched = max_searched
+        self._symbols: Dict[str, Dict[str, Any]] = {}
+        self._prefixes: List[Tuple[str, str, str]] = []  # (token, field, ticker), sorted
+        self._trigrams: Dict[str, set] = {}
+        self._searched: "OrderedDict[str, float]" = OrderedDict()
+        self.built_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Best local matches for a query, highest score and market cap first"""
+        return self.match(query, limit)[0]
+
+    def match(self, query: str, limit: int = 10) -> Tuple[List[Dict[str, Any]], bool]:
+        """Best local matches and whether any matched a ticker or word prefix, not just trigrams"""
+        text = query.strip().lower()
+        if not text:
+            return [], False
+
+        scores: Dict[str, float] = {}
+        words = _WORD.findall(text)
+
+        # Exact and prefix matches on ticker, name words, sector, industry and exchange
+        weights = {"ticker": 3.0, "name": 2.0, "sector": 1.0, "industry": 1.0, "exchange": 0.5}
+        for position, word in enumerate(words):
+            i = bisect_left(self._prefixes, (word,))
+            while i < len(self._prefixes) and self._prefixes[i][0].startswith(word):
+                token, field, ticker = self._prefixes[i]
+                weight = weights[field] * (1.5 if token == word else 1.0)
+                # The first word of the query matters most
+                scores[ticker] = scores.get(ticker, 0.0) + weight / (position + 1)
+                i += 1
+
+        exact = text.upper()
+        if exact in self._symbols:
+            scores[exact] = scores.get(exact, 0.0) + 10.0
+        prefix_matched = bool(scores)
+
+        # Fuzzy fallback on trigram overlap when prefixes found little
+        if len(scores) < limit and len(text) >= 3:
+            query_grams = _trigrams(text)
+            overlap: Dict[str, int] = {}
+            for gram in query_grams:
+                for ticker in self._trigrams.get(gram, ()):
+                    overlap[ticker] = overlap.get(ticker, 0) + 1
+            for ticker, shared in overlap.items():
+                similarity = shared / len(query_grams)
+                if similarity >= 0.5:
+                    scores[ticker] = max(scores.get(ticker, 0.0), similarity)
+
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (-item[1], -(self._symbols[item[0]].get("market_cap") or 0), item[0])
+        )
+        return [dict(self._symbols[ticker]) for ticker, _ in ranked[:limit]], prefix_matched
+
+    def searched_upstream(self, query: str) -> bool:
+        key = query.strip().lower()
+        searched_at = self._searched.get(key)
+        if searched_at is None:
+            return False
+        if time.monotonic() - searched_at > self.searched_ttl_seconds:
+            del self._searched[key]
+            return False
+        return True
+
+    def record_upstream_search(self, query: str):
+        """Remember a query sent to the data source (after its results were added)"""
+        self._searched[query.strip().lower()] = time.monotonic()
+        self._searched.move_to_end(query.strip().lower())
+        while len(self._searched) > self.max_searched:
+            self._searched.popitem(last=False)
+
+    def add(self, items: List[Dict[str, Any]]):
+        """Add or update symbols in place (e.g. freshly fetched fundamentals or upstream search results)"""
+        changed = []
+        for item in items:
+            ticker = (item.get("ticker") or "").upper()
+            if not ticker:
+                continue
+            old = self._symbols.get(ticker)
+            self._merge(self._symbols, item)
+            entry = self._symbols[ticker]
+            if old == entry:
+                continue
+            if old:
+                for token in self._tokens(old):
+                    i = bisect_left(self._prefixes, token)
+                    if i < len(self._prefixes) and self._prefixes[i] == token:
+                        del self._prefixes[i]
+                for gram in self._grams(old):
+                    self._trigrams.get(gram, set()).discard(ticker)
+            for token in self._tokens(entry):
+                insort(self._prefixes, token)
+            for gram in self._grams(entry):
+                self._trigrams.setdefault(gram, set()).add(ticker)
+            changed.append(entry)
+        if changed:
+            self._forget_searches(changed)
+
+    def _forget_searches(self, entries: List[Dict[str, Any]]):
+        """Drop the remembered upstream searches that the added or changed symbols could match"""
+        tickers = {entry["ticker"].lower() for entry in entries}
+        tokens = sorted({token for entry in entries for token, _, _ in self._tokens(entry)})
+        grams = set().union(*(self._grams(entry) for entry in entries))
+
+        def could_match(query: str) -> bool:
+            if query in tickers:
+                return True
+            # A query word that is a prefix of a new token (the prefix search)
+            for word in _WORD.findall(query):
+                i = bisect_left(tokens, word)
+                if i < len(tokens) and tokens[i].startswith(word):
+                    return True
+            # Or enough shared trigrams for the fuzzy fallback
+            if len(query) >= 3:
+                query_grams = _trigrams(query)
+                return len(query_grams & grams) / len(query_grams) >= 0.5
+            return False
+
+        for query in [query for query in self._searched if could_match(query)]:
+            del self._searched[query]
+
+    def rebuild(self, db: Session):
+        """Rebuild from the symbol listing file and the Stock table"""
+        symbols: Dict[str, Dict[str, Any]] = {}
+        if self.listing_path:
+            for item in load_listing(self.listing_path):
+                self._merge(symbols, item)
+
+        latest = db.query(
+            FinancialData.stock_id,
+            func.max(FinancialData.date).label("date")
+        ).group_by(FinancialData.stock_id).subquery()
+        rows = db.query(Stock, FinancialData.market_cap, FinancialData.pe_ratio).outerjoin(
+            latest, latest.c.stock_id == Stock.id
+        ).outerjoin(
+            FinancialData, and_(FinancialData.stock_id == latest.c.stock_id, FinancialData.date == latest.c.date)
+        ).all()
+        for stock, market_cap, pe_ratio in rows:
+            self._merge(symbols, {
+                "ticker": stock.ticker, "name": stock.name, "sector": stock.sector,
+                "industry": stock.industry, "market_cap": market_cap, "pe_ratio": pe_ratio,
+            })
+
+        self._build(symbols)
+        self._searched.clear()
+        self.built_at = datetime.now()
+
+    def _merge(self, symbols: Dict[str, Dict[str, Any]], item: Dict[str, Any]):
+        ticker = (item.get("ticker") or "").upper()
+        if not ticker:
+            return
+        entry = symbols.get(ticker, {field: None for field in SYMBOL_FIELDS})
+        entry = dict(entry)
+        # Keep what is already known when the new source leaves a field empty
+        for field in SYMBOL_FIELDS:
+            value = item.get(field)
+            if value not in (None, ""):
+                entry[field] = value
+        entry["ticker"] = ticker
+        symbols[ticker] = entry
+
+    def _tokens(self, entry: Dict[str, Any]) -> List[Tuple[str, str, str]]:
+        ticker = entry["ticker"]
+        tokens = [(ticker.lower(), "ticker", ticker)]
+        for field in ("name", "sector", "industry", "exchange"):
+            for word in sorted(set(_WORD.findall((entry.get(field) or "").lower()))):
+                tokens.append((word, field, ticker))
+        return tokens
+
+    def _grams(self, entry: Dict[str, Any]) -> set:
+        return _trigrams(entry["ticker"].lower()) | _trigrams((entry.get("name") or "").lower())
+
+    def _build(self, symbols: Dict[str, Dict[str, Any]]):
+        prefixes = []
+        trigrams: Dict[str, set] = {}
+        for ticker, entry in symbols.items():
+            prefixes.extend(self._tokens(entry))
+            for gram in self._grams(entry):
+                trigrams.setdefault(gram, set()).add(ticker)
+        prefixes.sort()
+
+        # Swap everything at once so searches never see a half-built index
+        self._symbols, self._prefixes, self._trigrams = symbols, prefixes, trigrams
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self._rebuild_with_session)
+            except Exception as e:
+                # Keep serving the previous index
+                print(f"Symbol index rebuild failed: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def _rebuild_with_session(self):
+        db = SessionLocal()
+        try:
+            self.rebuild(db)
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "symbols": len(self._symbols),
+            "upstream_searches": len(self._searched),
+            "built_at": self.built_at.isoformat() if self.built_at else None,
+        }
+
+
+symbol_index = SymbolIndex()
@@ -0,0 +1,120 @@
+import os
+import asyncio
+from typing import List, Dict, Any, Optional
+from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from dotenv import load_dotenv
+
+from app.adapters.factory import get_data_source
+from app.adapters.scheduler import upstream_lane
+from app.database.database import SessionLocal
+from app.models.models import TrendingSnapshot
+
+load_dotenv()
+
+
+class TrendingSnapshotService:
+    """
+    Background-refreshed snapshot for /industry/trending.
+
+    A background task fetches the trending list from the data source every
+    refresh interval and persists it, so a restart serves the last snapshot
+    instead of starting cold. Requests read the in-memory copy; only the very
+    first request on an empty database waits for a fetch, as does a request for
+    more stocks than the snapshot was fetched with, which also grows the size
+    of later snapshots.
+    """
+
+    def __init__(self, refresh_seconds: Optional[int] = None, size: Optional[int] = None):
+        self.refresh_seconds = refresh_seconds or int(os.getenv("TRENDING_REFRESH_SECONDS", "900"))
+        self.size = size or int(os.getenv("TRENDING_SNAPSHOT_SIZE", "20"))
+        self.stocks: List[Dict[str, Any]] = []
+        self.fetched_at: Optional[datetime] = None
+        # Number of stocks asked of the data source for the current snapshot
+        self.fetched_size = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def get(self, count: int) -> List[Dict[str, Any]]:
+        """The first count trending stocks of the current snapshot"""
+        if self.fetched_at is None or count > self.fetched_size:
+            self.size = max(self.size, count)
+            await self.refresh()
+        return self.stocks[:count]
+
+    def age_seconds(self) -> Optional[int]:
+        if self.fetched_at is None:
+            return None
+        return int((datetime.now() - self.fetched_at).total_seconds())
+
+    async def refresh(self):
+        """Fetch and persist a new snapshot; concurrent callers share one fetch"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        started = datetime.now()
+        async with self._lock:
+            if self.fetched_at is not None and self.fetched_at >= started and self.fetched_size >= self.size:
+                return
+            size = self.size
+            stocks = jsonable_encoder(await get_data_source().get_trending_stocks(size))
+            fetched_at = datetime.now()
+            await asyncio.to_thread(self._save, stocks, fetched_at)
+            self.stocks, self.fetched_at, self.fetched_size = stocks, fetched_at, size
+
+    def load(self):
+        """Load the last persisted snapshot"""
+        db = SessionLocal()
+        try:
+            snapshot = db.query(TrendingSnapshot).order_by(TrendingSnapshot.fetched_at.desc()).first()
+            if snapshot is not None:
+                self.stocks, self.fetched_at = snapshot.stocks, snapshot.fetched_at
+                self.fetched_size = max(self.size, len(self.stocks))
+        finally:
+            db.close()
+
+    def _save(self, stocks: List[Dict[str, Any]], fetched_at: datetime):
+        db = SessionLocal()
+        try:
+            # Only the latest snapshot is kept
+            db.query(TrendingSnapshot).delete()
+            db.add(TrendingSnapshot(fetched_at=fetched_at, stocks=stocks))
+            db.commit()
+        finally:
+            db.close()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        upstream_lane.set("batch")
+        try:
+            await asyncio.to_thread(self.load)
+        except Exception as e:
+            print(f"Loading the trending snapshot failed: {e}")
+        while True:
+            age = self.age_seconds()
+            if age is not None and age < self.refresh_seconds:
+                await asyncio.sleep(self.refresh_seconds - age)
+            try:
+                await self.refresh()
+            except Exception as e:
+                # Keep serving the previous snapshot and retry after the next interval
+                print(f"Trending snapshot refresh failed: {e}")
+                await asyncio.sleep(self.refresh_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "stocks": len(self.stocks),
+            "size": self.size,
+            "fetched_at": self.fetched_at.isoformat() if self.fetched_at else None,
+            "age_seconds": self.age_seconds(),
+        }
+
+
+trending_snapshot = TrendingSnapshotService()
@@ -0,0 +1,328 @@
+import os
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from app.database.database import AsyncSessionLocal
+
+load_dotenv()
+
+# Writes the coalesced records of one kind (committed by the buffer)
+Writer = Callable[[Session, Dict[Hashable, Any]], None]
+# Combines a pending record with a newer one for the same key
+Merge = Callable[[Any, Any], Any]
+# Follow-up work on records of one kind once their transaction has committed
+Committed = Callable[[Dict[Hashable, Any]], Awaitable[None]]
+
+
+def keep_latest(pending: Any, newer: Any) -> Any:
+    return newer
+
+
+class WriteBehindBuffer:
+    """
+    Write-behind queue for what the data service stores after serving it.
+
+    Callers put records keyed per kind (fundamentals and quotes per ticker,
+    fetched bars per stock) and return at once. A record whose key is still
+    pending is merged into it, so a hot ticker is written once per flush. A
+    background task writes everything pending in one transaction, kinds in
+    registration order, WRITE_BEHIND_FLUSH_SECONDS after the oldest record or
+    as soon as WRITE_BEHIND_BATCH_SIZE records are pending. At
+    WRITE_BEHIND_MAX_PENDING records put waits until a flush has brought the
+    count back down, which bounds memory.
+
+    When the transaction fails while the database answers, the batch is
+    written one kind at a time, and a failing kind one record at a time, so a
+    record that cannot be written does not hold back the others; it is dropped
+    after WRITE_BEHIND_MAX_ATTEMPTS failed writes. Records that were not
+    written are kept for the next flush, which is retried with exponential
+    backoff up to WRITE_BEHIND_MAX_BACKOFF_SECONDS.
+
+    A kind can register a committed callback for work that must only happen
+    once its records are stored, such as updating files; it is awaited after
+    each commit with the records that commit wrote, while they are still
+    visible through pending(), and its failures are logged, not retried.
+
+    Reads that must see unwritten records look them up with pending(), and
+    stop() flushes what is left. Until start() is called, put writes the
+    records through itself.
+    """
+
+    def __init__(self, flush_seconds: Optional[float] = None, batch_size: Optional[int] = None, max_pending: Optional[int] = None):
+        self.flush_seconds = flush_seconds or float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", "1"))
+        self.batch_size = batch_size or int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+        self.max_pending = max_pending or int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000"))
+        self.max_attempts = int(os.getenv("WRITE_BEHIND_MAX_ATTEMPTS", "5"))
+        self.max_backoff_seconds = float(os.getenv("WRITE_BEHIND_MAX_BACKOFF_SECONDS", "60"))
+        self._writers: Dict[str, Tuple[Writer, Merge]] = {}
+        self._committed: Dict[str, Committed] = {}
+        self._pending: Dict[str, Dict[Hashable, Any]] = {}
+        self._in_flight: Dict[str, Dict[Hashable, Any]] = {}
+        # When the oldest pending record was put (time.monotonic)
+        self._oldest: Optional[float] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        # Failed writes of records written on their own, per (kind, key)
+        self._attempts: Dict[Tuple[str, Hashable], int] = {}
+        # Flushes failed in a row, and when the next one may run (time.monotonic)
+        self._failures_in_row = 0
+        self._retry_at: Optional[float] = None
+        self.received = 0
+        self.coalesced = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.written = 0
+        self.dropped = 0
+        self.backpressure_waits = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+    def register(self, kind: str, writer: Writer, merge: Merge = keep_latest, committed: Optional[Committed] = None):
+        """Add a kind of record; kinds are written in registration order (referenced rows first)"""
+        self._writers[kind] = (writer, merge)
+        if committed is not None:
+            self._committed[kind] = committed
+
+    async def put(self, kind: str, records: Dict[Hashable, Any]):
+        """Queue records for writing, merging them into pending records with the same key"""
+        if not records:
+            return
+        _, merge = self._writers[kind]
+        pending = self._pending.setdefault(kind, {})
+        for key, record in records.items():
+            if key in pending:
+                pending[key] = merge(pending[key], record)
+                self.coalesced += 1
+            else:
+                pending[key] = record
+        self.received += len(records)
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+
+        if self._task is None:
+            await self.flush()
+            return
+        if self.pending_count() >= self.max_pending:
+            # Bounded memory: this caller waits for the write instead of the queue growing
+            self.backpressure_waits += 1
+            while self.pending_count() >= self.max_pending:
+                if self._retry_at is not None and self._retry_at > time.monotonic():
+                    await asyncio.sleep(self._retry_at - time.monotonic())
+                await self.flush()
+        elif self.pending_count() >= self.batch_size:
+            self._wakeup.set()
+
+    def pending(self, kind: str, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Records of the given keys not yet committed, including those being flushed right now"""
+        if kind not in self._writers:
+            return {}
+        _, merge = self._writers[kind]
+        in_flight = self._in_flight.get(kind, {})
+        pending = self._pending.get(kind, {})
+        result = {}
+        for key in keys:
+            if key in in_flight and key in pending:
+                result[key] = merge(in_flight[key], pending[key])
+            elif key in in_flight:
+                result[key] = in_flight[key]
+            elif key in pending:
+                result[key] = pending[key]
+        return result
+
+    def pending_count(self) -> int:
+        return sum(len(records) for records in self._pending.values())
+
+    async def flush(self):
+        """Write everything pending in one transaction, isolating the records that fail"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self.pending_count():
+                return
+            batch, self._pending = self._pending, {}
+            oldest, self._oldest = self._oldest, None
+            size = sum(len(records) for records in batch.values())
+            # Readers keep seeing the records through pending() until they are committed
+            self._in_flight = batch
+            # Records are removed from here as they are committed or dropped
+            unwritten = {kind: dict(records) for kind, records in batch.items()}
+            dropped = self.dropped
+            started = time.monotonic()
+            try:
+                await self._write_batch(unwritten)
+            except asyncio.CancelledError:
+                # Stopped mid-flush; the writes are upserts, so stop() can simply write the rest again
+                self._requeue(unwritten, oldest)
+                raise
+            finally:
+                self._in_flight = {}
+
+            finished = time.monotonic()
+            failed = sum(len(records) for records in unwritten.values())
+            written = size - failed - (self.dropped - dropped)
+            self.written += written
+            if failed:
+                self.failed_flushes += 1
+                self._requeue(unwritten, oldest)
+                self._back_off(finished)
+                return
+            self._failures_in_row = 0
+            self._retry_at = None
+            for kind, records in batch.items():
+                for key in records:
+                    self._attempts.pop((kind, key), None)
+
+            self.flushes += 1
+            self.last_batch_size = written
+            self.max_batch_size = max(self.max_batch_size, written)
+            self.last_flush_ms = (finished - started) * 1000
+            self.last_lag_ms = (finished - oldest) * 1000
+            self.max_lag_ms = max(self.max_lag_ms, self.last_lag_ms)
+
+    async def _write_batch(self, unwritten: Dict[str, Dict[Hashable, Any]]):
+        """Write the records in one transaction or, when that fails while the database answers, kind by kind"""
+        size = sum(len(records) for records in unwritten.values())
+        error = await self._commit(unwritten)
+        if error is None:
+            unwritten.clear()
+            return
+        print(f"Write-behind flush of {size} records failed: {error}")
+        if not await self._database_reachable():
+            return
+
+        # The database answers, so some record cannot be written: find it without holding back the others
+        for kind in self._writers:
+            records = unwritten.get(kind)
+            if not records:
+                continue
+            if await self._commit({kind: records}) is None:
+                del unwritten[kind]
+                continue
+            for key in list(records):
+                error = await self._commit({kind: {key: records[key]}})
+                if error is None:
+                    del records[key]
+                    self._attempts.pop((kind, key), None)
+                    continue
+                if not await self._database_reachable():
+                    return
+                attempts = self._attempts.get((kind, key), 0) + 1
+                if attempts >= self.max_attempts:
+                    print(f"Write-behind dropped the {kind} record {key!r} after {attempts} failed writes: {error}")
+                    del records[key]
+                    self._attempts.pop((kind, key), None)
+                    self.dropped += 1
+                else:
+                    self._attempts[(kind, key)] = attempts
+            if not records:
+                del unwritten[kind]
+
+    async def _commit(self, batch: Dict[str, Dict[Hashable, Any]]) -> Optional[Exception]:
+        """Write the records in one transaction and run their committed callbacks; the error if the write failed"""
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.run_sync(self._write, batch)
+                await db.commit()
+        except Exception as e:
+            return e
+        for kind, committed in self._committed.items():
+            if batch.get(kind):
+                try:
+                    await committed(batch[kind])
+                except Exception as e:
+                    # The records are stored, so writing them again would not help
+                    print(f"Write-behind follow-up of {len(batch[kind])} committed {kind} records failed: {e}")
+        return None
+
+    async def _database_reachable(self) -> bool:
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+    def _back_off(self, now: float):
+        """Delay the next flush, doubling the delay with every failed flush in a row"""
+        delay = min(self.flush_seconds * 2 ** self._failures_in_row, self.max_backoff_seconds)
+        self._failures_in_row += 1
+        self._retry_at = now + delay
+
+    def _write(self, db: Session, batch: Dict[str, Dict[Hashable, Any]]):
+        for kind, (writer, _) in self._writers.items():
+            if batch.get(kind):
+                writer(db, batch[kind])
+
+    def _requeue(self, batch: Dict[str, Dict[Hashable, Any]], oldest: float):
+        """Put the records of a failed flush back; records put since then are newer"""
+        for kind, records in batch.items():
+            _, merge = self._writers[kind]
+            pending = self._pending.setdefault(kind, {})
+            for key, record in records.items():
+                pending[key] = merge(record, pending[key]) if key in pending else record
+        self._oldest = oldest if self._oldest is None else min(oldest, self._oldest)
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background flushes and write what is still pending"""
+        if self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            due = self._oldest + self.flush_seconds if self._oldest is not None else time.monotonic() + self.flush_seconds
+            if self._retry_at is not None:
+                due = max(due, self._retry_at)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(0.0, due - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            # A full batch does not cut a backoff short
+            if self._retry_at is not None and self._retry_at > time.monotonic():
+                continue
+            await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending_count(),
+            "in_flight": sum(len(records) for records in self._in_flight.values()),
+            "received": self.received,
+            # Records merged into a pending record for the same key instead of written separately
+            "coalesced": self.coalesced,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "written": self.written,
+            # Records given up on after WRITE_BEHIND_MAX_ATTEMPTS failed writes
+            "dropped": self.dropped,
+            "retry_in_seconds": round(max(0.0, self._retry_at - time.monotonic()), 1) if self._retry_at is not None else 0,
+            "backpressure_waits": self.backpressure_waits,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "mean_batch_size": round(self.written / self.flushes, 1) if self.flushes else 0,
+            "last_flush_ms": round(self.last_flush_ms, 1),
+            # Time from the oldest record of a flush being put to its commit
+            "last_lag_ms": round(self.last_lag_ms, 1),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+        }
+
+
+write_behind = WriteBehindBuffer()
@@ -0,0 +1,183 @@
+"""
+Benchmark: requests per second of database-bound handlers with a blocking (sync
+session) and an asyncio (async session) database driver, at 50-200 concurrent
+clients.
+
+Both handlers look up a stock and read a year of its bars; the third row is the
+real /stocks/{ticker}/historical endpoint, which now runs on the async session.
+Every statement is given DB_LATENCY_MS of round-trip time through SQLite's trace
+callback, which runs on the thread executing the statement: for the sync driver
+that is the event loop itself, as when psycopg2 waits on its socket, while
+aiosqlite (like asyncpg) waits off the loop. With DB_LATENCY_MS=0 the numbers
+are plain SQLite throughput. The sync handler closes its session before
+returning, its best case; see read_bars_sync.
+
+    cd services/data_service
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.bench_async_db
+"""
+import asyncio
+import os
+import time
+from datetime import date, timedelta
+from typing import List, Dict, Any, Optional
+
+import httpx
+import numpy as np
+from fastapi import FastAPI, Depends
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+
+from app.adapters import factory
+from app.adapters.data_source import DataSource
+from app.database.database import Base, engine, async_engine, get_db, get_async_db
+from app.main import app
+from app.models.models import Stock, HistoricalData
+
+TICKERS = 200
+START_DATE = date(2025, 1, 1)
+END_DATE = date(2026, 1, 1)
+CONCURRENCY = [50, 100, 200]
+REQUESTS_PER_CLIENT = 10
+DB_LATENCY_MS = float(os.getenv("DB_LATENCY_MS", "2"))
+
+# Switched on once the bars are seeded
+latency = {"seconds": 0.0}
+
+
+def simulate_round_trip(statement: str):
+    if latency["seconds"]:
+        time.sleep(latency["seconds"])
+
+
+@event.listens_for(engine, "connect")
+def on_sync_connect(dbapi_connection, connection_record):
+    dbapi_connection.set_trace_callback(simulate_round_trip)
+
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def on_async_connect(dbapi_connection, connection_record):
+    # aiosqlite runs its sqlite3 connection, and so the callback, on its own thread
+    await_only(dbapi_connection.driver_connection.set_trace_callback(simulate_round_trip))
+
+
+class SeededDataSource(DataSource):
+    """Synthetic weekday bars, so the store can be filled without network access"""
+
+    async def get_historical_data(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict[str, Any]]:
+        bars = []
+        day = start_date
+        while day < end_date:
+            if day.weekday() < 5:
+                price = 100.0 + len(bars)
+                bars.append({"date": day, "open": price, "high": price + 1, "low": price - 1, "close": price, "volume": 1000, "adjusted_close": price})
+            day += timedelta(days=1)
+        return bars
+
+    async def get_financial_data(self, ticker: str) -> Dict[str, Any]:
+        return {"ticker": ticker, "name": ticker, "sector": "", "industry": "", "date": date.today()}
+
+    async def get_peer_companies(self, industry: str) -> List[Dict[str, Any]]:
+        return []
+
+    async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
+        return []
+
+    async def get_trending_stocks(self, count: Optional[int] = 5) -> List[Dict[str, Any]]:
+        return []
+
+
+bench_app = FastAPI()
+
+
+@bench_app.get("/sync/{ticker}")
+async def read_bars_sync(ticker: str, db: Session = Depends(get_db)):
+    """The handlers' pattern before the migration: sync session inside an async handler"""
+    stock = db.query(Stock).filter(Stock.ticker == ticker).first()
+    bars = db.query(HistoricalData.date, HistoricalData.close).filter(
+        HistoricalData.stock_id == stock.id,
+        HistoricalData.date >= START_DATE,
+        HistoricalData.date < END_DATE
+    ).order_by(HistoricalData.date).all()
+    # Without this the connection is only returned by get_db's teardown, which cannot run
+    # while the loop blocks on checkout: past pool_size + max_overflow concurrent requests
+    # everything stalls until pool_timeout
+    db.close()
+    return {"ticker": ticker, "bars": len(bars)}
+
+
+@bench_app.get("/async/{ticker}")
+async def read_bars_async(ticker: str, db: AsyncSession = Depends(get_async_db)):
+    """The same reads on the async session"""
+    stock = (await db.execute(select(Stock).where(Stock.ticker == ticker))).scalars().first()
+    bars = (await db.execute(select(HistoricalData.date, HistoricalData.close).where(
+        HistoricalData.stock_id == stock.id,
+        HistoricalData.date >= START_DATE,
+        HistoricalData.date < END_DATE
+    ).order_by(HistoricalData.date))).all()
+    return {"ticker": ticker, "bars": len(bars)}
+
+
+def ticker(i: int) -> str:
+    return f"DB{i:04d}"
+
+
+async def seed():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(TICKERS):
+            response = await client.get(f"/stocks/{ticker(i)}/historical", params={"start_date": START_DATE, "end_date": END_DATE})
+            assert response.status_code == 200, response.text
+
+
+async def run(target: FastAPI, path: str, params: Dict[str, Any], concurrency: int) -> Dict[str, float]:
+    latencies = []
+
+    async def client_loop(client: httpx.AsyncClient, worker: int):
+        for n in range(REQUESTS_PER_CLIENT):
+            started = time.perf_counter()
+            response = await client.get(path.format(ticker=ticker((worker * REQUESTS_PER_CLIENT + n) % TICKERS)), params=params)
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.text
+
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*[client_loop(client, worker) for worker in range(concurrency)])
+        elapsed = time.perf_counter() - started
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": float(np.percentile(latencies, 50)) * 1000,
+        "p95": float(np.percentile(latencies, 95)) * 1000,
+    }
+
+
+async def benchmark():
+    await seed()
+    latency["seconds"] = DB_LATENCY_MS / 1000
+
+    cases = [
+        ("sync session", bench_app, "/sync/{ticker}", {}),
+        ("async session", bench_app, "/async/{ticker}", {}),
+        ("/historical", app, "/stocks/{ticker}/historical", {"start_date": START_DATE, "end_date": END_DATE, "fields": "date,close"}),
+    ]
+    print(f"{TICKERS} tickers x {(END_DATE - START_DATE).days} days, {DB_LATENCY_MS:g}ms per statement, {REQUESTS_PER_CLIENT} requests per client")
+    print(f"{'handler':<15} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, target, path, params in cases:
+        for concurrency in CONCURRENCY:
+            result = await run(target, path, params, concurrency)
+            print(f"{name:<15} {concurrency:>7} {result['rps']:>8.1f} {result['p50']:>8.1f} {result['p95']:>8.1f}")
+
+
+def main():
+    factory._data_source = SeededDataSource()
+    Base.metadata.create_all(bind=engine)
+    # Importing the app already opened a connection; new ones get the trace callback
+    engine.dispose()
+    # One event loop throughout: pooled async connections belong to the loop that opened them
+    asyncio.run(benchmark())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: CPU time and allocations of the bar pipeline with per-bar dicts vs. BarSeries.
+
+Each pipeline takes a yfinance-style history DataFrame through the three stages
+bars pass in the data service:
+- adapter conversion (iterrows into dicts vs. BarSeries.from_frame)
+- persistence (dedupe and the executemany parameter rows for the upsert)
+- serialization (format=columnar JSON)
+
+Series: 10 years of daily bars and 60 days of 5-minute intraday bars. "bars held"
+is the memory the adapter output keeps alive while it moves between the stages.
+
+    cd services/data_service
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.bench_bar_series
+"""
+import json
+import time
+import tracemalloc
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+
+from app.adapters.bar_series import BarSeries
+from app.services.historical_store import BAR_FIELDS
+
+REPEAT = 10
+
+
+def make_frame(index: pd.DatetimeIndex) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index))))
+    return pd.DataFrame({
+        "Open": close * 0.999, "High": close * 1.01, "Low": close * 0.99, "Close": close,
+        "Volume": rng.integers(1_000, 1_000_000, len(index)),
+    }, index=index)
+
+
+def daily_frame() -> pd.DataFrame:
+    return make_frame(pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=252 * 10, tz="America/New_York"))
+
+
+def intraday_frame() -> pd.DataFrame:
+    days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=60)
+    index = pd.DatetimeIndex([
+        day + pd.Timedelta(hours=9, minutes=30) + pd.Timedelta(minutes=5 * i) for day in days for i in range(78)
+    ]).tz_localize("America/New_York")
+    return make_frame(index)
+
+
+def frame_to_dicts(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    # The adapter conversion this replaced
+    bars: List[Dict[str, Any]] = []
+    for index, row in frame.iterrows():
+        bars.append({
+            "date": index.to_pydatetime(),
+            "open": float(row["Open"]),
+            "high": float(row["High"]),
+            "low": float(row["Low"]),
+            "close": float(row["Close"]),
+            "volume": int(row["Volume"]),
+            "adjusted_close": float(row["Close"])
+        })
+    return bars
+
+
+def dict_pipeline(frame: pd.DataFrame) -> bytes:
+    bars = frame_to_dicts(frame)
+    rows = list({
+        bar["date"]: {"stock_id": 1, "date": bar["date"], **{field: bar[field] for field in BAR_FIELDS}}
+        for bar in bars
+    }.values())
+    columns = {field: [row[field] for row in rows] for field in ["date"] + BAR_FIELDS}
+    columns["date"] = [day.isoformat() for day in columns["date"]]
+    return json.dumps(columns).encode()
+
+
+def series_pipeline(frame: pd.DataFrame) -> bytes:
+    series = BarSeries.from_frame(frame).dedupe()
+    columns = [series.python_dates()] + [getattr(series, field).tolist() for field in BAR_FIELDS]
+    rows = [dict(zip(["date"] + BAR_FIELDS, values), stock_id=1) for values in zip(*columns)]
+    assert len(rows) == len(series)
+    return json.dumps(series.to_columns()).encode()
+
+
+def held_bytes(convert, frame: pd.DataFrame) -> int:
+    """Memory still allocated for the adapter output after conversion"""
+    tracemalloc.start()
+    result = convert(frame)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def measure(pipeline, frame: pd.DataFrame):
+    started = time.process_time()
+    for _ in range(REPEAT):
+        pipeline(frame)
+    cpu_ms = (time.process_time() - started) / REPEAT * 1000
+
+    tracemalloc.start()
+    pipeline(frame)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu_ms, peak
+
+
+def main():
+    print(f"{'series':>10} {'bars':>6} {'pipeline':>10} {'cpu ms':>8} {'peak alloc':>11} {'bars held':>10}")
+    for label, frame in (("10y daily", daily_frame()), ("60d 5m", intraday_frame())):
+        for name, pipeline, convert in (
+            ("dicts", dict_pipeline, frame_to_dicts),
+            ("BarSeries", series_pipeline, BarSeries.from_frame),
+        ):
+            cpu_ms, peak = measure(pipeline, frame)
+            held = held_bytes(convert, frame)
+            print(f"{label:>10} {len(frame):>6} {name:>10} {cpu_ms:>8.1f} {peak / 1024:>9.0f}KB {held / 1024:>8.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: concurrent throughput of /stocks/{ticker}/financials for different executor
+pool sizes.
+
+Upstream calls are simulated by a data source whose fetch blocks its thread for a fixed
+time (like a Yahoo scrape), so no network access is needed. Every request uses a distinct
+ticker to miss the fundamentals cache. With the blocking calls on the event loop,
+throughput would stay at 1 / UPSTREAM_SECONDS whatever the concurrency.
+
+    cd services/data_service
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.bench_financials_concurrency
+"""
+import asyncio
+import time
+from datetime import date, datetime
+from typing import List, Dict, Any, Optional
+
+import httpx
+
+from app.adapters import factory
+from app.adapters.data_source import DataSource
+from app.adapters.executor import BlockingCallExecutor, set_executor
+from app.main import app
+
+UPSTREAM_SECONDS = 0.2
+REQUESTS = 64
+POOL_SIZES = [1, 2, 4, 8, 16, 32]
+
+
+class SlowDataSource(DataSource):
+    """Blocks a worker thread for UPSTREAM_SECONDS per call"""
+
+    def _fetch_info(self, ticker: str) -> Dict[str, Any]:
+        time.sleep(UPSTREAM_SECONDS)
+        return {"ticker": ticker, "name": ticker, "sector": "", "industry": "", "pe_ratio": 15.0, "date": datetime.now().date()}
+
+    async def get_financial_data(self, ticker: str) -> Dict[str, Any]:
+        return await self.run_blocking(self._fetch_info, ticker)
+
+    async def get_historical_data(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict[str, Any]]:
+        return []
+
+    async def get_peer_companies(self, industry: str) -> List[Dict[str, Any]]:
+        return []
+
+    async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
+        return []
+
+    async def get_trending_stocks(self, count: Optional[int] = 5) -> List[Dict[str, Any]]:
+        return []
+
+
+async def run(pool_size: int) -> float:
+    set_executor(BlockingCallExecutor(max_workers=pool_size))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.get(f"/stocks/B{pool_size}X{i}/financials") for i in range(REQUESTS)
+        ])
+        elapsed = time.perf_counter() - started
+    assert all(response.status_code == 200 for response in responses)
+    return REQUESTS / elapsed
+
+
+def main():
+    factory._data_source = SlowDataSource()
+    print(f"{REQUESTS} concurrent requests, {UPSTREAM_SECONDS * 1000:.0f}ms blocking upstream call each")
+    print(f"{'pool':>5} {'req/s':>8}")
+    for pool_size in POOL_SIZES:
+        print(f"{pool_size:>5} {asyncio.run(run(pool_size)):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
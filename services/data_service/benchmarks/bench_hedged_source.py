@@ -0,0 +1,122 @@
+"""
+Benchmark: tail latency of a data source with occasional stalls, alone and
+behind a CompositeDataSource that hedges to a second source.
+
+The primary answers in PRIMARY_MS, except for STALL_RATE of calls, which take
+STALL_MS (a slow Yahoo response or a retried 5xx). The secondary is a little
+slower but never stalls. CLIENTS callers make REQUESTS_PER_CLIENT calls each.
+The composite should keep p99 close to the secondary's latency while sending
+only a few percent of calls twice. A final run makes the primary fail every
+call and reports how quickly its circuit breaker takes it out of the path.
+
+    cd services/data_service
+    python -m benchmarks.bench_hedged_source
+"""
+import asyncio
+import random
+import time
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from app.adapters.composite import CompositeDataSource
+from app.adapters.data_source import DataSource
+from app.adapters.scheduler import UpstreamScheduler, set_scheduler
+
+PRIMARY_MS = 20
+SECONDARY_MS = 30
+STALL_MS = 2000
+STALL_RATE = 0.02
+CLIENTS = 50
+REQUESTS_PER_CLIENT = 40
+
+
+class UnavailableError(Exception):
+    def __init__(self):
+        super().__init__("Service unavailable")
+        self.status_code = 503
+
+
+class SimulatedSource(DataSource):
+    """Sleeps like an upstream round trip; stalls or fails at the given rates"""
+
+    def __init__(self, latency_ms: float, stall_rate: float = 0.0, seed: int = 0):
+        self.latency = latency_ms / 1000
+        self.stall_rate = stall_rate
+        self.failing = False
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    async def get_financial_data(self, ticker: str) -> Dict[str, Any]:
+        self.calls += 1
+        jitter = self._random.uniform(0.8, 1.2)
+        await asyncio.sleep(STALL_MS / 1000 if self._random.random() < self.stall_rate else self.latency * jitter)
+        if self.failing:
+            raise UnavailableError()
+        return {"ticker": ticker}
+
+    async def get_historical_data(self, ticker: str, start_date=None, end_date=None) -> List[Dict[str, Any]]:
+        return []
+
+    async def get_peer_companies(self, industry: str) -> List[Dict[str, Any]]:
+        return []
+
+    async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
+        return []
+
+    async def get_trending_stocks(self, count: Optional[int] = 5) -> List[Dict[str, Any]]:
+        return []
+
+
+async def run(source: DataSource) -> Dict[str, float]:
+    latencies = []
+
+    async def client(worker: int):
+        for n in range(REQUESTS_PER_CLIENT):
+            started = time.perf_counter()
+            try:
+                await source.get_financial_data(f"T{worker}")
+            except UnavailableError:
+                pass
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[client(worker) for worker in range(CLIENTS)])
+    p50, p95, p99, worst = np.percentile(np.array(latencies) * 1000, [50, 95, 99, 100])
+    return {"p50": p50, "p95": p95, "p99": p99, "max": worst}
+
+
+async def benchmark():
+    # No quota: the simulated sources do not call the scheduler anyway
+    set_scheduler(UpstreamScheduler(rate=1e6, burst=10 ** 6))
+    calls = CLIENTS * REQUESTS_PER_CLIENT
+    print(f"{calls} calls; primary {PRIMARY_MS}ms with {STALL_RATE:.0%} stalls of {STALL_MS}ms, secondary {SECONDARY_MS}ms")
+    print(f"{'setup':<20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'extra calls':>12}")
+
+    primary = SimulatedSource(PRIMARY_MS, STALL_RATE, seed=1)
+    result = await run(primary)
+    print(f"{'primary alone':<20} {result['p50']:>8.1f} {result['p95']:>8.1f} {result['p99']:>8.1f} {result['max']:>8.1f} {0:>12}")
+
+    primary = SimulatedSource(PRIMARY_MS, STALL_RATE, seed=1)
+    secondary = SimulatedSource(SECONDARY_MS, seed=2)
+    composite = CompositeDataSource([("primary", primary), ("secondary", secondary)])
+    result = await run(composite)
+    extra = primary.calls + secondary.calls - calls
+    print(f"{'hedged composite':<20} {result['p50']:>8.1f} {result['p95']:>8.1f} {result['p99']:>8.1f} {result['max']:>8.1f} {extra:>12}")
+    stats = composite.stats()
+    print(f"hedge delay {stats['sources']['primary']['hedge_delay_ms']['get_financial_data']}ms, "
+          f"{stats['hedges']} hedges, secondary won {stats['sources']['secondary']['wins']}")
+
+    primary.failing = True
+    before = primary.calls
+    result = await run(composite)
+    circuit = composite.stats()["sources"]["primary"]["circuit"]
+    print(f"{'primary failing':<20} {result['p50']:>8.1f} {result['p95']:>8.1f} {result['p99']:>8.1f} {result['max']:>8.1f} {primary.calls - before:>12}")
+    print(f"primary breaker {circuit['state']} after {primary.calls - before} failed calls, {circuit['trips']} trip(s)")
+
+
+def main():
+    asyncio.run(benchmark())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: payload size and encode/decode time of the historical response formats.
+
+Renders a 5-year, 20-ticker batch the way POST /stocks/batch/historical does for
+format=rows, format=columnar and format=arrow, with all fields and with the
+fields=date,close projection used by the valuation and report services, and
+reports raw and gzip sizes.
+
+    cd services/data_service
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.bench_historical_formats
+"""
+import gzip
+import json
+import time
+from datetime import date, timedelta
+
+import pyarrow as pa
+
+from app.adapters.bar_series import BarSeries
+from app.services.historical_format import HISTORICAL_FIELDS, historical_batch_response
+from app.services.market_calendar import is_trading_day
+
+TICKERS = 20
+YEARS = 5
+REPEAT = 5
+
+
+def make_bars():
+    start = date.today() - timedelta(days=365 * YEARS)
+    days = [start + timedelta(days=i) for i in range(365 * YEARS) if is_trading_day(start + timedelta(days=i))]
+    return [
+        {
+            "date": day, "open": 100.0 + i * 0.01, "high": 101.0 + i * 0.01, "low": 99.0 + i * 0.01,
+            "close": 100.5 + i * 0.01, "volume": 1_000_000 + i, "adjusted_close": 100.4 + i * 0.01
+        }
+        for i, day in enumerate(days)
+    ]
+
+
+def decode(format: str, body: bytes):
+    if format == "arrow":
+        return pa.ipc.open_stream(body).read_all()
+    return json.loads(body)
+
+
+def measure(data, format: str, fields):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        body = historical_batch_response(data, {}, format, fields).body
+    encode_ms = (time.perf_counter() - started) / REPEAT * 1000
+
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        decode(format, body)
+    decode_ms = (time.perf_counter() - started) / REPEAT * 1000
+
+    return len(body), len(gzip.compress(body)), encode_ms, decode_ms
+
+
+def main():
+    bars = BarSeries.from_rows(make_bars())
+    data = {f"T{i:03d}": bars for i in range(TICKERS)}
+    print(f"{TICKERS} tickers x {len(bars)} bars")
+    print(f"{'format':>10} {'fields':>10} {'bytes':>10} {'gzip':>10} {'encode ms':>10} {'decode ms':>10}")
+    for fields in (HISTORICAL_FIELDS, ["date", "close"]):
+        for format in ("rows", "columnar", "arrow"):
+            size, gzip_size, encode_ms, decode_ms = measure(data, format, fields)
+            label = "all" if fields == HISTORICAL_FIELDS else ",".join(fields)
+            print(f"{format:>10} {label:>10} {size:>10} {gzip_size:>10} {encode_ms:>10.1f} {decode_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: multi-year historical reads across many tickers from historical_data
+vs. the memory-mapped price files.
+
+TICKERS stocks with YEARS of daily bars are written to DATABASE_URL and to
+price files in a temporary directory. Every window in WINDOWS is then read for
+all tickers at once, from the database with load_series and from the price
+store with its mappings cold (first read in the process) and warm.
+
+Runs against DATABASE_URL (use a scratch database, rows are written and removed):
+
+    cd services/data_service
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.bench_price_store
+"""
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.adapters.bar_series import BarSeries
+from app.database.database import engine, Base, SessionLocal, upgrade_schema
+from app.models.models import Stock, HistoricalData
+from app.services.historical_store import upsert_bars, load_series
+from app.services.price_store import PriceStore
+
+TICKERS = 200
+YEARS = 10
+END_DATE = date(2026, 1, 1)
+WINDOWS = {
+    "1m": 30,
+    "1y": 365,
+    "5y": 365 * 5,
+    "10y": 365 * 10,
+}
+
+
+def make_series(seed: int) -> BarSeries:
+    days = np.arange(np.datetime64(END_DATE - timedelta(days=365 * YEARS), "D"), np.datetime64(END_DATE, "D"))
+    days = days[np.is_busday(days)]
+    prices = 100.0 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0.0003, 0.02, len(days))))
+    return BarSeries.from_columns(days, {
+        "open": prices, "high": prices * 1.01, "low": prices * 0.99, "close": prices,
+        "volume": np.full(len(days), 1_000_000), "adjusted_close": prices,
+    })
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema()
+
+    db = SessionLocal()
+    stocks = [Stock(ticker=f"__BENCH{i:04d}__", name="Benchmark") for i in range(TICKERS)]
+    db.add_all(stocks)
+    db.commit()
+    stock_ids = [stock.id for stock in stocks]
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            writer = PriceStore(directory)
+            for i, stock_id in enumerate(stock_ids):
+                series = make_series(i)
+                upsert_bars(db, stock_id, series)
+                writer.create(stock_id, series)
+            db.commit()
+            print(f"{TICKERS} tickers, {YEARS}y of bars each; microseconds per ticker")
+            print(f"{'window':>6} {'database':>10} {'files cold':>11} {'files warm':>11}")
+
+            for label, days in WINDOWS.items():
+                first, last = END_DATE - timedelta(days=days), END_DATE
+                results = [timed(lambda: load_series(db, stock_ids, first, last))]
+                # A new store has no mappings open yet, like a freshly started worker
+                reader = PriceStore(directory)
+                results.append(timed(lambda: reader.read(stock_ids, first, last)))
+                results.append(timed(lambda: reader.read(stock_ids, first, last)))
+                print(f"{label:>6} " + " ".join(f"{seconds * 1e6 / TICKERS:>10.1f}" for seconds in results))
+    finally:
+        db.query(HistoricalData).filter(HistoricalData.stock_id.in_(stock_ids)).delete(synchronize_session=False)
+        db.query(Stock).filter(Stock.id.in_(stock_ids)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: quote fan-out to thousands of streaming clients on one process.
+
+SUBSCRIBERS clients each follow TICKERS_PER_CLIENT of TICKERS tickers (popular
+tickers more often) and read as fast as they can; SLOW_SUBSCRIBERS more read
+only once a second. The simulated data source counts upstream lookups: the
+hub should make one per ticker per poll however many clients follow it, where
+per-client polling would make one per subscription. Slow clients must end up
+with at most one pending quote per ticker.
+
+    cd services/data_service
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.bench_quote_hub
+"""
+import asyncio
+import random
+import time
+from datetime import date, datetime
+from typing import List, Dict, Any, Optional
+
+from app.adapters import factory
+from app.adapters.data_source import DataSource, BatchResult, build_quote
+from app.services.quote_hub import QuoteHub
+
+TICKERS = 500
+TICKERS_PER_CLIENT = 10
+SUBSCRIBERS = 5000
+SLOW_SUBSCRIBERS = 500
+POLL_SECONDS = 0.5
+DURATION_SECONDS = 5
+
+
+class TickingDataSource(DataSource):
+    """Returns a new price for every ticker on every call and counts the lookups"""
+
+    def __init__(self):
+        self.calls = 0
+        self.lookups = 0
+
+    async def get_quotes(self, tickers: List[str]) -> BatchResult:
+        self.calls += 1
+        self.lookups += len(tickers)
+        now = datetime.now()
+        return {ticker: build_quote(ticker, 100 + random.random(), 100.0, market_time=now) for ticker in tickers}, {}
+
+    async def get_financial_data(self, ticker: str) -> Dict[str, Any]:
+        return {}
+
+    async def get_historical_data(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict[str, Any]]:
+        return []
+
+    async def get_peer_companies(self, industry: str) -> List[Dict[str, Any]]:
+        return []
+
+    async def search_stocks(self, query: str) -> List[Dict[str, Any]]:
+        return []
+
+    async def get_trending_stocks(self, count: Optional[int] = 5) -> List[Dict[str, Any]]:
+        return []
+
+
+async def reader(hub: QuoteHub, tickers: List[str], pause: float, received: List[int], backlog: List[int]):
+    subscription = hub.connect()
+    hub.subscribe(subscription, tickers)
+    try:
+        while True:
+            quotes = await subscription.next()
+            received[0] += len(quotes)
+            backlog[0] = max(backlog[0], len(quotes))
+            if pause:
+                await asyncio.sleep(pause)
+    finally:
+        hub.disconnect(subscription)
+
+
+async def run():
+    source = TickingDataSource()
+    factory._data_source = source
+    hub = QuoteHub(poll_seconds=POLL_SECONDS)
+    hub.start()
+
+    universe = [f"Q{i:04d}" for i in range(TICKERS)]
+    weights = [1 / (rank + 1) for rank in range(TICKERS)]
+    fast_received, fast_backlog = [0], [0]
+    slow_received, slow_backlog = [0], [0]
+    readers = []
+    for i in range(SUBSCRIBERS + SLOW_SUBSCRIBERS):
+        tickers = list(set(random.choices(universe, weights, k=TICKERS_PER_CLIENT)))
+        slow = i >= SUBSCRIBERS
+        readers.append(asyncio.create_task(reader(
+            hub, tickers, 1.0 if slow else 0,
+            slow_received if slow else fast_received,
+            slow_backlog if slow else fast_backlog
+        )))
+
+    await asyncio.sleep(0.1)
+    started = time.perf_counter()
+    await asyncio.sleep(DURATION_SECONDS)
+    elapsed = time.perf_counter() - started
+    stats = hub.stats()
+
+    for task in readers:
+        task.cancel()
+    await asyncio.gather(*readers, return_exceptions=True)
+    await hub.stop()
+
+    polls = stats["polls"]
+    print(f"{SUBSCRIBERS} fast + {SLOW_SUBSCRIBERS} slow clients, {stats['tickers']} tickers, "
+          f"{stats['subscriptions']} subscriptions, {polls} polls in {elapsed:.1f}s")
+    print(f"upstream lookups: {source.lookups} in {source.calls} calls "
+          f"(per-client polling: {stats['subscriptions'] * polls})")
+    print(f"quotes delivered: {fast_received[0]} fast, {slow_received[0]} slow; coalesced {stats['coalesced']}")
+    print(f"largest read: {fast_backlog[0]} quotes fast, {slow_backlog[0]} slow (cap {TICKERS_PER_CLIENT})")
+    print(f"connections after disconnect: {hub.stats()['connections']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
@@ -0,0 +1,113 @@
+"""
+Benchmark: building an aligned adjusted close / log return matrix per request
+(load each ticker's bars, pd.concat on date, as the report charts do) vs. cutting
+it from the shared ReturnsMatrix.
+
+TICKERS stocks with YEARS of daily bars are written to DATABASE_URL. Each case
+then builds the matrices of REQUESTS random baskets of BASKET tickers over a
+WINDOW_DAYS window: rebuilt from the stored bars every time, from the returns
+matrix as it fills (first requests load their rows), and once it holds them.
+
+Runs against DATABASE_URL (use a scratch database, rows are written and removed):
+
+    cd services/data_service
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.bench_returns_matrix
+"""
+import asyncio
+import random
+import time
+from datetime import date, timedelta
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from app.adapters.bar_series import BarSeries
+from app.database.database import engine, Base, SessionLocal, upgrade_schema
+from app.models.models import Stock, HistoricalData
+from app.services.historical_store import upsert_bars, load_series
+from app.services.market_calendar import trading_days
+from app.services.returns_matrix import ReturnsMatrix
+
+TICKERS = 200
+YEARS = 10
+BASKET = 20
+WINDOW_DAYS = 365 * 3
+REQUESTS = 200
+END_DATE = date(2026, 1, 1)
+
+
+def make_series(seed: int) -> BarSeries:
+    days = trading_days(END_DATE - timedelta(days=365 * YEARS), END_DATE)
+    prices = 100.0 * np.exp(np.cumsum(np.random.default_rng(seed).normal(0.0003, 0.02, len(days))))
+    return BarSeries.from_columns(days, {
+        "open": prices, "high": prices * 1.01, "low": prices * 0.99, "close": prices,
+        "volume": np.full(len(days), 1_000_000), "adjusted_close": prices,
+    })
+
+
+def rebuild(db, stock_ids: List[int], first: date, last: date):
+    """What each consumer does today: one frame per ticker, aligned with pd.concat"""
+    series = load_series(db, stock_ids, first - timedelta(days=7), last)
+    frames = [
+        pd.DataFrame({stock_id: series[stock_id].adjusted_close}, index=series[stock_id].dates)
+        for stock_id in stock_ids if stock_id in series
+    ]
+    closes = pd.concat(frames, axis=1)
+    returns = np.log(closes / closes.shift(1))
+    return closes.loc[np.datetime64(first):], returns.loc[np.datetime64(first):]
+
+
+def baskets(stock_ids: List[int]):
+    chooser = random.Random(1)
+    for _ in range(REQUESTS):
+        first = END_DATE - timedelta(days=chooser.randint(WINDOW_DAYS, 365 * YEARS))
+        yield chooser.sample(stock_ids, BASKET), first, first + timedelta(days=WINDOW_DAYS)
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema()
+
+    db = SessionLocal()
+    stocks = [Stock(ticker=f"__BENCH{i:04d}__", name="Benchmark") for i in range(TICKERS)]
+    db.add_all(stocks)
+    db.commit()
+    stock_ids = [stock.id for stock in stocks]
+
+    async def load(ids: List[int], first: date, last: date):
+        return load_series(db, ids, first, last)
+
+    try:
+        for i, stock_id in enumerate(stock_ids):
+            upsert_bars(db, stock_id, make_series(i))
+        db.commit()
+        print(f"{REQUESTS} baskets of {BASKET} of {TICKERS} tickers, {WINDOW_DAYS // 365}y windows within {YEARS}y")
+        print(f"{'case':<24} {'ms per basket':>14}")
+
+        started = time.perf_counter()
+        for basket, first, last in baskets(stock_ids):
+            rebuild(db, basket, first, last)
+        print(f"{'rebuild per request':<24} {(time.perf_counter() - started) * 1000 / REQUESTS:>14.2f}")
+
+        matrix = ReturnsMatrix(max_tickers=TICKERS)
+
+        async def cut() -> float:
+            started = time.perf_counter()
+            for basket, first, last in baskets(stock_ids):
+                await matrix.get(load, basket, first, last)
+            return time.perf_counter() - started
+
+        for label in ("matrix, filling", "matrix, warm"):
+            print(f"{label:<24} {asyncio.run(cut()) * 1000 / REQUESTS:>14.2f}")
+        stats = matrix.stats()
+        print(f"matrix holds {stats['tickers']} tickers x {stats['sessions']} sessions, {stats['memory_mb']}MB")
+    finally:
+        db.query(HistoricalData).filter(HistoricalData.stock_id.in_(stock_ids)).delete(synchronize_session=False)
+        db.query(Stock).filter(Stock.id.in_(stock_ids)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark: interactive call latency while batch jobs saturate the upstream quota.
+
+A simulated upstream call takes 50ms. BATCH_CALLS batch-lane calls are started
+at once, then INTERACTIVE_CALLS interactive calls arrive one every 200ms while
+the batch backlog drains. Without priority lanes interactive calls queue behind
+the whole backlog; with them they wait for at most one refill interval.
+
+    cd services/data_service
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.bench_upstream_scheduler
+"""
+import asyncio
+import time
+
+from app.adapters.scheduler import UpstreamScheduler
+
+RATE = 20
+BURST = 10
+BATCH_CALLS = 200
+INTERACTIVE_CALLS = 20
+CALL_SECONDS = 0.05
+
+
+async def upstream_call():
+    await asyncio.sleep(CALL_SECONDS)
+
+
+async def run(interactive_lane: str):
+    scheduler = UpstreamScheduler(rate=RATE, burst=BURST, reserve=2)
+    batch = [asyncio.create_task(scheduler.call(upstream_call, lane="batch")) for _ in range(BATCH_CALLS)]
+    await asyncio.sleep(0.5)
+
+    latencies = []
+    for _ in range(INTERACTIVE_CALLS):
+        started = time.perf_counter()
+        await scheduler.call(upstream_call, lane=interactive_lane)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.2)
+
+    await asyncio.gather(*batch)
+    latencies.sort()
+    return latencies, scheduler.stats()["lanes"]["batch"]["wait_ms_max"]
+
+
+def main():
+    print(f"{BATCH_CALLS} batch calls, {INTERACTIVE_CALLS} interactive calls, {RATE} calls/s, burst {BURST}")
+    print(f"{'interactive lane':>17} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'batch max wait ms':>18}")
+    for lane in ("batch", "interactive"):
+        latencies, batch_wait = asyncio.run(run(lane))
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[int(len(latencies) * 0.95)]
+        print(f"{lane:>17} {p50:>8.0f} {p95:>8.0f} {latencies[-1]:>8.0f} {batch_wait:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
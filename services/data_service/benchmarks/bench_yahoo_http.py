@@ -0,0 +1,110 @@
+"""
+Benchmark: the async HTTP Yahoo adapter against the replay server, with and
+without multi-symbol quote batching and kept-alive connections.
+
+Synthetic recordings for TICKERS symbols are written to a temporary directory
+and served by app.adapters.yahoo_replay with REQUEST_LATENCY_MS per request and
+CONNECT_LATENCY_MS per new connection (the handshakes a pooled connection
+saves). Quotes for all tickers are fetched once batched and once one symbol per
+request; then every ticker's chart is fetched CONCURRENCY at a time with
+keep-alive and with a new connection per request.
+
+    cd services/data_service
+    python -m benchmarks.bench_yahoo_http
+"""
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from app.adapters.scheduler import UpstreamScheduler, set_scheduler
+from app.adapters.yahoo_http import YahooHttpAdapter, day_timestamp
+from app.adapters.yahoo_replay import ReplayStore, serve
+
+TICKERS = 500
+DAYS = 30
+CONCURRENCY = 10
+REQUEST_LATENCY_MS = float(os.getenv("REQUEST_LATENCY_MS", "50"))
+CONNECT_LATENCY_MS = float(os.getenv("CONNECT_LATENCY_MS", "100"))
+END_DATE = date(2026, 1, 1)
+
+
+def ticker(i: int) -> str:
+    return f"HT{i:04d}"
+
+
+def write_recordings(directory: str):
+    store = ReplayStore(directory)
+    days = [END_DATE - timedelta(days=DAYS - i) for i in range(DAYS)]
+    timestamps = [day_timestamp(day) + 14 * 3600 + 1800 for day in days]
+    for i in range(TICKERS):
+        prices = [100.0 + i + n for n in range(DAYS)]
+        store.save("chart", ticker(i), {"chart": {"result": [{
+            "meta": {"symbol": ticker(i), "gmtoffset": -18000},
+            "timestamp": timestamps,
+            "indicators": {
+                "quote": [{"open": prices, "high": prices, "low": prices, "close": prices, "volume": [1000] * DAYS}],
+                "adjclose": [{"adjclose": prices}],
+            },
+        }], "error": None}})
+        store.save("quote", ticker(i), {
+            "symbol": ticker(i), "regularMarketPrice": prices[-1], "regularMarketPreviousClose": prices[-2],
+            "regularMarketVolume": 1000, "regularMarketTime": timestamps[-1], "currency": "USD",
+        })
+
+
+async def run(server, name: str, batch_size: int, keepalive: int, fetch):
+    source = YahooHttpAdapter(base_url=server.base_url)
+    source.cookie_url = ""
+    source.quote_batch_size = batch_size
+    source.max_keepalive = keepalive
+    requests, connections = server.requests, server.connections
+    started = time.perf_counter()
+    count = await fetch(source)
+    elapsed = time.perf_counter() - started
+    await source.aclose()
+    print(f"{name:<28} {count:>7} {server.requests - requests:>9} {server.connections - connections:>12} {elapsed * 1000:>9.0f}")
+
+
+async def fetch_quotes(source: YahooHttpAdapter) -> int:
+    data, errors = await source.get_quotes([ticker(i) for i in range(TICKERS)])
+    assert not errors, errors
+    return len(data)
+
+
+async def fetch_charts(source: YahooHttpAdapter) -> int:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one(i: int) -> int:
+        async with semaphore:
+            return len(await source.get_historical_series(ticker(i), END_DATE - timedelta(days=DAYS), END_DATE))
+
+    bars = await asyncio.gather(*[one(i) for i in range(TICKERS)])
+    assert all(bars), "empty chart"
+    return len(bars)
+
+
+async def benchmark(server):
+    # No quota: this measures the HTTP path, not the token bucket
+    set_scheduler(UpstreamScheduler(rate=1e6, burst=10 ** 6))
+    print(f"{TICKERS} tickers, {REQUEST_LATENCY_MS:g}ms per request, {CONNECT_LATENCY_MS:g}ms per new connection")
+    print(f"{'case':<28} {'results':>7} {'requests':>9} {'connections':>12} {'ms':>9}")
+    await run(server, "quotes, batched", 100, 10, fetch_quotes)
+    await run(server, "quotes, one per request", 1, 10, fetch_quotes)
+    await run(server, "charts, keep-alive", 100, CONCURRENCY, fetch_charts)
+    await run(server, "charts, new connections", 100, 0, fetch_charts)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        write_recordings(directory)
+        server = serve(directory, latency_ms=REQUEST_LATENCY_MS, connect_latency_ms=CONNECT_LATENCY_MS, background=True)
+        try:
+            asyncio.run(benchmark(server))
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
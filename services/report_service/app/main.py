@@ -3,7 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import os
 
-from app.routers import reports, alerts
+from app.routers import reports, alerts, prefetch
 from app.database.database import engine, Base
 from app.tasks.scheduler import start_scheduler, shutdown_scheduler
 
@@ -34,6 +34,7 @@ app.mount("/report-files", StaticFiles(directory="reports"), name="report_files"
 # Include routers
 app.include_router(reports.router, prefix="/reports", tags=["Reports"])
 app.include_router(alerts.router, prefix="/alerts", tags=["Alerts"])
+app.include_router(prefetch.router, prefix="/prefetch", tags=["Prefetch"])
 
 @app.get("/", tags=["Root"])
 async def read_root():
@@ -78,3 +78,16 @@ class NotificationLog(Base):
     # Relationships
     alert = relationship("Alert", backref="notifications")
     report = relationship("Report", backref="notifications")
+
+class PrefetchRun(Base):
+    __tablename__ = "prefetch_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    started_at = Column(TIMESTAMP(timezone=True), index=True)
+    duration_seconds = Column(Float)
+    tickers = Column(Integer)  # Distinct tickers referenced by holdings, baskets and active alerts
+    bars_warmed = Column(Integer)  # Tickers whose price history was brought up to date
+    fundamentals_warmed = Column(Integer)  # Tickers whose fundamentals were returned
+    fundamentals_stale = Column(Integer)  # Of those, tickers served stale while a refresh runs
+    sources = Column(JSON, nullable=True)  # Ticker count per source (portfolio_holdings, basket_stocks, alerts)
+    errors = Column(JSON, nullable=True)  # Error message per ticker
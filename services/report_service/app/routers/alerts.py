@@ -1,14 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Body, Query
 from typing import Dict, List, Any, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.database import get_db
+from app.database.database import get_async_db
 from app.models.models import Alert, NotificationLog, AlertType
 
 router = APIRouter()
 
 @router.post("/set", response_model=Dict[str, Any])
-async def set_alert(alert_data: Dict[str, Any] = Body(...), db: Session = Depends(get_db)):
+async def set_alert(alert_data: Dict[str, Any] = Body(...), db: AsyncSession = Depends(get_async_db)):
     """Set up an alert for a specific stock"""
     user_id = alert_data.get("user_id")
     if not user_id:
@@ -36,8 +37,8 @@ async def set_alert(alert_data: Dict[str, Any] = Body(...), db: Session = Depend
     )
     
     db.add(alert)
-    db.commit()
-    db.refresh(alert)
+    await db.commit()
+    await db.refresh(alert)
     
     return {
         "id": alert.id,
@@ -55,21 +56,21 @@ async def list_alerts(
     active_only: bool = Query(False),
     ticker: Optional[str] = Query(None),
     alert_type: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List alerts for a user"""
-    query = db.query(Alert).filter(Alert.user_id == user_id)
+    query = select(Alert).where(Alert.user_id == user_id)
     
     if active_only:
-        query = query.filter(Alert.is_active == True)
+        query = query.where(Alert.is_active == True)
     
     if ticker:
-        query = query.filter(Alert.ticker == ticker)
+        query = query.where(Alert.ticker == ticker)
     
     if alert_type:
-        query = query.filter(Alert.alert_type == alert_type)
+        query = query.where(Alert.alert_type == alert_type)
     
-    alerts = query.order_by(Alert.created_at.desc()).all()
+    alerts = (await db.execute(query.order_by(Alert.created_at.desc()))).scalars().all()
     
     result = []
     for alert in alerts:
@@ -87,29 +88,29 @@ async def list_alerts(
     return result
 
 @router.delete("/delete/{alert_id}", response_model=Dict[str, str])
-async def delete_alert(alert_id: int, db: Session = Depends(get_db)):
+async def delete_alert(alert_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete an alert"""
-    alert = db.query(Alert).filter(Alert.id == alert_id).first()
+    alert = (await db.execute(select(Alert).where(Alert.id == alert_id))).scalars().first()
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
     # Delete from database
-    db.delete(alert)
-    db.commit()
+    await db.delete(alert)
+    await db.commit()
     
     return {"message": "Alert deleted successfully"}
 
 @router.put("/toggle/{alert_id}", response_model=Dict[str, Any])
-async def toggle_alert(alert_id: int, db: Session = Depends(get_db)):
+async def toggle_alert(alert_id: int, db: AsyncSession = Depends(get_async_db)):
     """Toggle an alert active status"""
-    alert = db.query(Alert).filter(Alert.id == alert_id).first()
+    alert = (await db.execute(select(Alert).where(Alert.id == alert_id))).scalars().first()
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
     # Toggle is_active
     alert.is_active = not alert.is_active
-    db.commit()
-    db.refresh(alert)
+    await db.commit()
+    await db.refresh(alert)
     
     return {
         "id": alert.id,
@@ -122,12 +123,12 @@ async def list_notifications(
     user_id: int,
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """List notifications for a user"""
-    notifications = db.query(NotificationLog).filter(
+    notifications = (await db.execute(select(NotificationLog).where(
         NotificationLog.user_id == user_id
-    ).order_by(NotificationLog.sent_at.desc()).offset(offset).limit(limit).all()
+    ).order_by(NotificationLog.sent_at.desc()).offset(offset).limit(limit))).scalars().all()
     
     result = []
     for notification in notifications:
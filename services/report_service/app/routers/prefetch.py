@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from typing import Dict, List, Any
+from sqlalchemy.orm import Session
+
+from app.database.database import get_db
+from app.models.models import PrefetchRun
+from app.tasks.prefetch_tasks import prefetch_market_data, collect_prefetch_tickers
+
+router = APIRouter()
+
+@router.post("/run", response_model=Dict[str, Any])
+async def run_prefetch(background_tasks: BackgroundTasks):
+    """Start a prefetch run now instead of waiting for the scheduled one"""
+    background_tasks.add_task(prefetch_market_data)
+    return {"message": "Prefetch started", "status": "pending"}
+
+@router.get("/tickers", response_model=Dict[str, List[str]])
+async def get_prefetch_tickers():
+    """Get the tickers the next prefetch run would warm, per source"""
+    try:
+        return await collect_prefetch_tickers()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to collect prefetch tickers: {str(e)}")
+
+@router.get("/runs", response_model=List[Dict[str, Any]])
+async def list_prefetch_runs(limit: int = Query(10, description="Number of most recent runs"), db: Session = Depends(get_db)):
+    """Get the most recent prefetch runs with their coverage and duration"""
+    runs = db.query(PrefetchRun).order_by(PrefetchRun.started_at.desc()).limit(limit).all()
+
+    return [
+        {
+            "id": run.id,
+            "started_at": run.started_at,
+            "duration_seconds": run.duration_seconds,
+            "tickers": run.tickers,
+            "bars_warmed": run.bars_warmed,
+            "fundamentals_warmed": run.fundamentals_warmed,
+            "fundamentals_stale": run.fundamentals_stale,
+            "bars_coverage": round(run.bars_warmed / run.tickers, 3) if run.tickers else None,
+            "fundamentals_coverage": round(run.fundamentals_warmed / run.tickers, 3) if run.tickers else None,
+            "sources": run.sources,
+            "errors": run.errors,
+        }
+        for run in runs
+    ]
@@ -48,6 +48,12 @@ class UserServiceClient:
         response.raise_for_status()
         return response.json()
     
+    async def get_referenced_tickers(self) -> Dict[str, List[str]]:
+        """Get the distinct tickers of all portfolio holdings and basket stocks"""
+        response = await self.client.get("/internal/tickers")
+        response.raise_for_status()
+        return response.json()
+    
     async def close(self):
         """Close the HTTP client"""
         await self.client.aclose()
@@ -2,12 +2,15 @@ from app.services.data_client import DataServiceClient
 from app.services.valuation_client import ValuationServiceClient
 from app.database.database import SessionLocal
 from app.models.models import Alert, NotificationLog
-from datetime import datetime, timedelta
+from datetime import datetime
+
+# Tickers per quote request, below the data service's batch limit
+QUOTE_BATCH_SIZE = 200
 
 async def check_price_alerts():
     """Check for price-based alerts that need to be triggered"""
     # Initialize data service
-    data_client = DataServiceClient()
+    data_client = DataServiceClient(priority="alerts")
     
     try:
         # Get active price and percentage change alerts
@@ -25,21 +28,28 @@ async def check_price_alerts():
                     ticker_alerts[alert.ticker] = []
                 ticker_alerts[alert.ticker].append(alert)
             
+            if not ticker_alerts:
+                return
+
+            # Quotes for all tickers in a few batch calls; the data service serves recent quotes from memory
+            tickers = list(ticker_alerts)
+            quotes = {"data": {}, "errors": {}}
+            for offset in range(0, len(tickers), QUOTE_BATCH_SIZE):
+                batch = await data_client.get_quotes_batch(tickers[offset:offset + QUOTE_BATCH_SIZE])
+                quotes["data"].update(batch["data"])
+                quotes["errors"].update(batch["errors"])
+            for ticker, error in quotes["errors"].items():
+                print(f"Error getting quote for {ticker}: {error}")
+
             # Check each ticker
             for ticker, alerts in ticker_alerts.items():
                 try:
-                    # Get current data and 1-day historical data
-                    financial_data = await data_client.get_financial_data(ticker)
-                    historical_data = await data_client.get_historical_data(
-                        ticker, 
-                        (datetime.now() - timedelta(days=2)).date()
-                    )
-                    
-                    if not financial_data or not historical_data or len(historical_data) < 2:
+                    quote = quotes["data"].get(ticker.upper())
+                    if not quote:
                         continue
                     
-                    current_price = financial_data.get("current_price") or financial_data.get("close")
-                    previous_close = historical_data[0]["close"] if len(historical_data) > 1 else None
+                    current_price = quote.get("price")
+                    previous_close = quote.get("previous_close")
                     
                     if not current_price:
                         continue
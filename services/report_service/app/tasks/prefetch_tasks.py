@@ -0,0 +1,117 @@
+import os
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, List, Any
+from dotenv import load_dotenv
+
+from app.services.data_client import DataServiceClient
+from app.services.user_client import UserServiceClient
+from app.database.database import SessionLocal
+from app.models.models import Alert, PrefetchRun
+
+load_dotenv()
+
+# Price history warmed per ticker; covers the valuation service's one-year window
+PREFETCH_HISTORY_DAYS = int(os.getenv("PREFETCH_HISTORY_DAYS", "365"))
+PREFETCH_WAVE_SIZE = int(os.getenv("PREFETCH_WAVE_SIZE", "50"))
+PREFETCH_WAVE_PAUSE_SECONDS = float(os.getenv("PREFETCH_WAVE_PAUSE_SECONDS", "5"))
+
+_running = asyncio.Lock()
+
+
+async def collect_prefetch_tickers() -> Dict[str, List[str]]:
+    """Tickers per source: portfolio holdings and basket stocks (user service) and active alerts"""
+    user_client = UserServiceClient()
+    try:
+        sources = await user_client.get_referenced_tickers()
+    finally:
+        await user_client.close()
+
+    db = SessionLocal()
+    try:
+        alerts = db.query(Alert.ticker).filter(Alert.is_active == True).distinct().all()
+        sources["alerts"] = sorted({row.ticker.upper() for row in alerts if row.ticker})
+    finally:
+        db.close()
+    return sources
+
+
+async def prefetch_market_data() -> Dict[str, Any]:
+    """
+    Warm the data service's price store and fundamentals cache before market open.
+
+    The tickers referenced by portfolios, baskets and active alerts are fetched
+    in waves of PREFETCH_WAVE_SIZE with a pause in between, in the data
+    service's batch lane so page loads keep their share of the upstream quota.
+    Only dates are requested for the bars: the data service fills the missing
+    ranges either way. The run's coverage and duration are stored as a
+    PrefetchRun.
+    """
+    if _running.locked():
+        print("Prefetch already running; skipping")
+        return {"status": "skipped"}
+
+    async with _running:
+        started = datetime.now()
+        sources = await collect_prefetch_tickers()
+        tickers = sorted(set().union(*sources.values()))
+        start_date = (started - timedelta(days=PREFETCH_HISTORY_DAYS)).date()
+
+        bars_warmed, fundamentals_warmed, fundamentals_stale = set(), set(), set()
+        errors: Dict[str, str] = {}
+        data_client = DataServiceClient(priority="batch")
+        try:
+            for offset in range(0, len(tickers), PREFETCH_WAVE_SIZE):
+                if offset:
+                    await asyncio.sleep(PREFETCH_WAVE_PAUSE_SECONDS)
+                wave = tickers[offset:offset + PREFETCH_WAVE_SIZE]
+                historical, financials = await asyncio.gather(
+                    data_client.get_historical_data_batch(wave, start_date, fields=["date"]),
+                    data_client.get_financial_data_batch(wave),
+                    return_exceptions=True
+                )
+
+                if isinstance(historical, Exception):
+                    errors.update({ticker: f"Price history: {historical}" for ticker in wave})
+                else:
+                    bars_warmed.update(historical["data"])
+                    errors.update({ticker: f"Price history: {error}" for ticker, error in historical["errors"].items()})
+
+                if isinstance(financials, Exception):
+                    errors.update({ticker: f"Fundamentals: {financials}" for ticker in wave if ticker not in errors})
+                else:
+                    for ticker, data in financials["data"].items():
+                        fundamentals_warmed.add(ticker)
+                        # Stale values were returned as-is and the data service is refreshing them
+                        if any(field.get("stale") for field in data.get("freshness", {}).values()):
+                            fundamentals_stale.add(ticker)
+                    errors.update({
+                        ticker: f"Fundamentals: {error}" for ticker, error in financials["errors"].items() if ticker not in errors
+                    })
+        finally:
+            await data_client.close()
+
+        duration = (datetime.now() - started).total_seconds()
+        summary = {
+            "started_at": started.isoformat(),
+            "duration_seconds": round(duration, 1),
+            "tickers": len(tickers),
+            "bars_warmed": len(bars_warmed),
+            "fundamentals_warmed": len(fundamentals_warmed),
+            "fundamentals_stale": len(fundamentals_stale),
+            "sources": {source: len(items) for source, items in sources.items()},
+            "errors": errors,
+        }
+
+        db = SessionLocal()
+        try:
+            db.add(PrefetchRun(**dict(summary, started_at=started)))
+            db.commit()
+        finally:
+            db.close()
+
+        print(
+            f"Prefetch warmed bars for {len(bars_warmed)}/{len(tickers)} and fundamentals for "
+            f"{len(fundamentals_warmed)}/{len(tickers)} tickers in {duration:.1f}s ({len(errors)} errors)"
+        )
+        return summary
@@ -5,7 +5,7 @@ import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 import jinja2
 import aiofiles
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import io
 import uuid
 
@@ -15,10 +15,13 @@ from app.services.user_client import UserServiceClient
 from app.database.database import SessionLocal
 from app.models.models import Report
 
+# Report ranges longer than this are charted from weekly bars
+LONG_RANGE_DAYS = 730
+
 async def generate_portfolio_report(user_id: int, portfolio_id: int, title: str, description: Optional[str] = None, parameters: Optional[Dict[str, Any]] = None):
     """Generate a report for a user's portfolio"""
     # Initialize services
-    data_client = DataServiceClient()
+    data_client = DataServiceClient(priority="batch")
     valuation_client = ValuationServiceClient()
     user_client = UserServiceClient()
     
@@ -45,11 +48,7 @@ async def generate_portfolio_report(user_id: int, portfolio_id: int, title: str,
             except:
                 pass
         
-        historical_data = {}
-        financial_data = {}
-        for ticker in tickers:
-            historical_data[ticker] = await data_client.get_historical_data(ticker, start_date)
-            financial_data[ticker] = await data_client.get_financial_data(ticker)
+        historical_data, financial_data = await fetch_market_data(data_client, tickers, start_date)
         
         # Generate report
         report_html = await generate_portfolio_html_report(
@@ -97,7 +96,7 @@ async def generate_portfolio_report(user_id: int, portfolio_id: int, title: str,
 async def generate_basket_report(user_id: int, basket_id: int, title: str, description: Optional[str] = None, parameters: Optional[Dict[str, Any]] = None):
     """Generate a report for a user's custom stock basket"""
     # Initialize services
-    data_client = DataServiceClient()
+    data_client = DataServiceClient(priority="batch")
     valuation_client = ValuationServiceClient()
     user_client = UserServiceClient()
     
@@ -124,11 +123,7 @@ async def generate_basket_report(user_id: int, basket_id: int, title: str, descr
             except:
                 pass
         
-        historical_data = {}
-        financial_data = {}
-        for ticker in tickers:
-            historical_data[ticker] = await data_client.get_historical_data(ticker, start_date)
-            financial_data[ticker] = await data_client.get_financial_data(ticker)
+        historical_data, financial_data = await fetch_market_data(data_client, tickers, start_date)
         
         # Generate report
         report_html = await generate_basket_html_report(
@@ -173,6 +168,21 @@ async def generate_basket_report(user_id: int, basket_id: int, title: str, descr
         await valuation_client.close()
         await user_client.close()
 
+async def fetch_market_data(data_client: DataServiceClient, tickers: List[str], start_date) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, Dict[str, Any]]]:
+    """Fetch historical and financial data for all tickers with two batch calls"""
+    # The charts only plot closing prices; weekly closes are plenty for multi-year ranges
+    interval = "1wk" if (datetime.now().date() - start_date).days > LONG_RANGE_DAYS else None
+    historical = await data_client.get_historical_data_batch(tickers, start_date, fields=["date", "close"], interval=interval)
+    financials = await data_client.get_financial_data_batch(tickers)
+    
+    for ticker, error in {**historical["errors"], **financials["errors"]}.items():
+        print(f"Error fetching market data for {ticker}: {error}")
+    
+    # Reports are keyed by the tickers as stored in holdings/baskets
+    historical_data = {ticker: historical["data"].get(ticker.upper(), []) for ticker in tickers}
+    financial_data = {ticker: financials["data"].get(ticker.upper(), {}) for ticker in tickers}
+    return historical_data, financial_data
+
 async def generate_portfolio_html_report(portfolio, holdings, historical_data, financial_data, valuation_scores):
     """Generate HTML report for a portfolio"""
     # Load Jinja2 template
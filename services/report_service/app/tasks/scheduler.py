@@ -9,6 +9,7 @@ from app.database.database import SessionLocal
 from app.models.models import ReportSchedule, Alert
 from app.tasks.report_tasks import generate_portfolio_report, generate_basket_report
 from app.tasks.alert_tasks import check_price_alerts, check_valuation_score_alerts
+from app.tasks.prefetch_tasks import prefetch_market_data
 
 # Create a scheduler
 scheduler = None
@@ -43,6 +44,7 @@ def start_scheduler():
                 scheduler.remove_job('daily_scheduler')
                 scheduler.remove_job('price_alerts')
                 scheduler.remove_job('valuation_alerts')
+                scheduler.remove_job('market_prefetch')
             except:
                 pass  # Job doesn't exist, which is fine
             
@@ -50,6 +52,12 @@ def start_scheduler():
             scheduler.add_job(schedule_daily_tasks, 'cron', hour=0, minute=0, id='daily_scheduler', replace_existing=True)
             scheduler.add_job(check_price_alerts, 'interval', minutes=15, id='price_alerts', replace_existing=True)
             scheduler.add_job(check_valuation_score_alerts, 'cron', hour=8, minute=0, id='valuation_alerts', replace_existing=True)
+            # Warm the data service before market open, ahead of the valuation alerts
+            scheduler.add_job(
+                prefetch_market_data, 'cron', day_of_week='mon-fri',
+                hour=int(os.getenv("PREFETCH_HOUR", "7")), minute=int(os.getenv("PREFETCH_MINUTE", "0")),
+                id='market_prefetch', replace_existing=True
+            )
             
             print("Scheduler started and jobs added.")
         except Exception as e:
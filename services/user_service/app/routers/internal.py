@@ -1,21 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, List, Any
 
-from app.database.database import get_db
+from app.database.database import get_async_db
 from app.models.models import User, Portfolio, PortfolioHolding, StockBasket, BasketStock
 
 router = APIRouter()
 
 
 @router.get("/users/{user_id}/portfolio", response_model=List[Dict[str, Any]])
-async def get_user_portfolios(user_id: int, db: Session = Depends(get_db)):
+async def get_user_portfolios(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """Internal: Get all portfolios for a user (no auth required)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = (await db.execute(select(User).where(User.id == user_id))).scalars().first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    portfolios = db.query(Portfolio).filter(Portfolio.user_id == user_id).all()
+    portfolios = (await db.execute(select(Portfolio).where(Portfolio.user_id == user_id))).scalars().all()
     return [
         {
             "id": p.id,
@@ -29,12 +30,12 @@ async def get_user_portfolios(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/users/{user_id}/portfolio/{portfolio_id}", response_model=Dict[str, Any])
-async def get_portfolio(user_id: int, portfolio_id: int, db: Session = Depends(get_db)):
+async def get_portfolio(user_id: int, portfolio_id: int, db: AsyncSession = Depends(get_async_db)):
     """Internal: Get a specific portfolio (no auth required)"""
-    portfolio = db.query(Portfolio).filter(
+    portfolio = (await db.execute(select(Portfolio).where(
         Portfolio.id == portfolio_id,
         Portfolio.user_id == user_id,
-    ).first()
+    ))).scalars().first()
 
     if not portfolio:
         raise HTTPException(status_code=404, detail="Portfolio not found")
@@ -49,19 +50,19 @@ async def get_portfolio(user_id: int, portfolio_id: int, db: Session = Depends(g
 
 
 @router.get("/users/{user_id}/portfolio/{portfolio_id}/holding", response_model=List[Dict[str, Any]])
-async def get_portfolio_holdings(user_id: int, portfolio_id: int, db: Session = Depends(get_db)):
+async def get_portfolio_holdings(user_id: int, portfolio_id: int, db: AsyncSession = Depends(get_async_db)):
     """Internal: Get holdings for a portfolio (no auth required)"""
-    portfolio = db.query(Portfolio).filter(
+    portfolio = (await db.execute(select(Portfolio).where(
         Portfolio.id == portfolio_id,
         Portfolio.user_id == user_id,
-    ).first()
+    ))).scalars().first()
 
     if not portfolio:
         raise HTTPException(status_code=404, detail="Portfolio not found")
 
-    holdings = db.query(PortfolioHolding).filter(
+    holdings = (await db.execute(select(PortfolioHolding).where(
         PortfolioHolding.portfolio_id == portfolio_id
-    ).all()
+    ))).scalars().all()
 
     return [
         {
@@ -77,11 +78,11 @@ async def get_portfolio_holdings(user_id: int, portfolio_id: int, db: Session =
 
 
 @router.get("/users/{user_id}/customBaskets", response_model=List[Dict[str, Any]])
-async def get_user_baskets(user_id: int, db: Session = Depends(get_db)):
+async def get_user_baskets(user_id: int, db: AsyncSession = Depends(get_async_db)):
     """Internal: Get stock baskets for a user (no auth required)"""
-    baskets = db.query(StockBasket).filter(
+    baskets = (await db.execute(select(StockBasket).where(
         (StockBasket.created_by == user_id) | (StockBasket.is_public == True)
-    ).all()
+    ))).scalars().all()
 
     return [
         {
@@ -98,9 +99,9 @@ async def get_user_baskets(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/users/{user_id}/customBaskets/{basket_id}", response_model=Dict[str, Any])
-async def get_basket(user_id: int, basket_id: int, db: Session = Depends(get_db)):
+async def get_basket(user_id: int, basket_id: int, db: AsyncSession = Depends(get_async_db)):
     """Internal: Get a specific stock basket (no auth required)"""
-    basket = db.query(StockBasket).filter(StockBasket.id == basket_id).first()
+    basket = (await db.execute(select(StockBasket).where(StockBasket.id == basket_id))).scalars().first()
 
     if not basket:
         raise HTTPException(status_code=404, detail="Basket not found")
@@ -120,9 +121,9 @@ async def get_basket(user_id: int, basket_id: int, db: Session = Depends(get_db)
 
 
 @router.get("/users/{user_id}/customBaskets/{basket_id}/stocks", response_model=List[Dict[str, Any]])
-async def get_basket_stocks(user_id: int, basket_id: int, db: Session = Depends(get_db)):
+async def get_basket_stocks(user_id: int, basket_id: int, db: AsyncSession = Depends(get_async_db)):
     """Internal: Get stocks in a basket (no auth required)"""
-    basket = db.query(StockBasket).filter(StockBasket.id == basket_id).first()
+    basket = (await db.execute(select(StockBasket).where(StockBasket.id == basket_id))).scalars().first()
 
     if not basket:
         raise HTTPException(status_code=404, detail="Basket not found")
@@ -130,7 +131,7 @@ async def get_basket_stocks(user_id: int, basket_id: int, db: Session = Depends(
     if not basket.is_public and basket.created_by != user_id:
         raise HTTPException(status_code=403, detail="Access denied")
 
-    stocks = db.query(BasketStock).filter(BasketStock.basket_id == basket_id).all()
+    stocks = (await db.execute(select(BasketStock).where(BasketStock.basket_id == basket_id))).scalars().all()
 
     return [
         {
@@ -140,3 +141,15 @@ async def get_basket_stocks(user_id: int, basket_id: int, db: Session = Depends(
         }
         for s in stocks
     ]
+
+
+@router.get("/tickers", response_model=Dict[str, List[str]])
+async def get_referenced_tickers(db: AsyncSession = Depends(get_async_db)):
+    """Internal: Distinct tickers held in any portfolio or listed in any basket (no auth required)"""
+    holdings = (await db.execute(select(PortfolioHolding.ticker).distinct())).all()
+    basket_stocks = (await db.execute(select(BasketStock.ticker).distinct())).all()
+
+    return {
+        "portfolio_holdings": sorted({row.ticker.upper() for row in holdings if row.ticker}),
+        "basket_stocks": sorted({row.ticker.upper() for row in basket_stocks if row.ticker}),
+    }
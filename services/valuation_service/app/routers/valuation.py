@@ -1,27 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
 from typing import List, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.database import get_db
+from app.database.database import get_async_db
 from app.services.valuation import ValuationService
 from app.models.models import ValuationRule, ValuationScore
 
 router = APIRouter()
 
 @router.post("/score", response_model=Dict[str, Any])
-async def calculate_score(ticker: str, rule_id: int = None, db: Session = Depends(get_db)):
+async def calculate_score(ticker: str, rule_id: int = None, db: AsyncSession = Depends(get_async_db)):
     """Calculate valuation score for a given ticker using a specified rule"""
     try:
         # Get the rule from the database
         if rule_id:
-            rule = db.query(ValuationRule).filter(ValuationRule.id == rule_id).first()
+            rule = (await db.execute(select(ValuationRule).where(ValuationRule.id == rule_id))).scalars().first()
             if not rule:
                 raise HTTPException(status_code=404, detail=f"Valuation rule with ID {rule_id} not found")
         else:
             # Use the default rule if none specified
-            rule = db.query(ValuationRule).filter(ValuationRule.is_default == True).first()
+            rule = (await db.execute(select(ValuationRule).where(ValuationRule.is_default == True))).scalars().first()
             if not rule:
                 raise HTTPException(status_code=404, detail="No default valuation rule found")
+        # Return the connection to the pool while the scores are computed
+        await db.commit()
         
         # Create valuation service
         valuation_service = ValuationService()
@@ -38,7 +41,7 @@ async def calculate_score(ticker: str, rule_id: int = None, db: Session = Depend
                 score_components=score_data['score_components']
             )
             db.add(valuation_score)
-            db.commit()
+            await db.commit()
             
             return {
                 "ticker": ticker,
@@ -54,22 +57,24 @@ async def calculate_score(ticker: str, rule_id: int = None, db: Session = Depend
         raise HTTPException(status_code=500, detail=f"Failed to calculate valuation score: {str(e)}")
 
 @router.post("/batch", response_model=List[Dict[str, Any]])
-async def calculate_scores_batch(tickers: List[str] = Body(...), rule_id: int = None, db: Session = Depends(get_db)):
+async def calculate_scores_batch(tickers: List[str] = Body(...), rule_id: int = None, db: AsyncSession = Depends(get_async_db)):
     """Calculate valuation scores for multiple tickers"""
     try:
         # Get the rule from the database
         if rule_id:
-            rule = db.query(ValuationRule).filter(ValuationRule.id == rule_id).first()
+            rule = (await db.execute(select(ValuationRule).where(ValuationRule.id == rule_id))).scalars().first()
             if not rule:
                 raise HTTPException(status_code=404, detail=f"Valuation rule with ID {rule_id} not found")
         else:
             # Use the default rule if none specified
-            rule = db.query(ValuationRule).filter(ValuationRule.is_default == True).first()
+            rule = (await db.execute(select(ValuationRule).where(ValuationRule.is_default == True))).scalars().first()
             if not rule:
                 raise HTTPException(status_code=404, detail="No default valuation rule found")
+        # Return the connection to the pool while the scores are computed
+        await db.commit()
         
-        # Create valuation service
-        valuation_service = ValuationService()
+        # Create valuation service; bulk scoring yields upstream quota to interactive page loads
+        valuation_service = ValuationService(priority="batch")
         
         try:
             # Calculate scores in batch
@@ -89,7 +94,7 @@ async def calculate_scores_batch(tickers: List[str] = Body(...), rule_id: int =
                 )
                 db.add(valuation_score)
             
-            db.commit()
+            await db.commit()
             
             # Add rule name to each result
             for score_data in scores_data:
@@ -104,18 +109,18 @@ async def calculate_scores_batch(tickers: List[str] = Body(...), rule_id: int =
         raise HTTPException(status_code=500, detail=f"Failed to calculate valuation scores: {str(e)}")
 
 @router.get("/rules", response_model=List[Dict[str, Any]])
-async def get_valuation_rules(user_id: int = None, db: Session = Depends(get_db)):
+async def get_valuation_rules(user_id: int = None, db: AsyncSession = Depends(get_async_db)):
     """Get available valuation rules"""
     try:
         # Query rules
         if user_id:
             # Get system rules and user's custom rules
-            rules = db.query(ValuationRule).filter(
+            rules = (await db.execute(select(ValuationRule).where(
                 (ValuationRule.user_id == None) | (ValuationRule.user_id == user_id)
-            ).all()
+            ))).scalars().all()
         else:
             # Get only system rules
-            rules = db.query(ValuationRule).filter(ValuationRule.user_id == None).all()
+            rules = (await db.execute(select(ValuationRule).where(ValuationRule.user_id == None))).scalars().all()
         
         # Convert to list of dictionaries
         result = []
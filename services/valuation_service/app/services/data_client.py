@@ -1,41 +1,175 @@
 import os
+import copy
 import httpx
-from typing import Dict, List, Any, Optional
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import date, datetime, timedelta
 from dotenv import load_dotenv
 
 load_dotenv()
 
+class ResponseCache:
+    """
+    Small LRU of Data Service responses for conditional requests.
+
+    Holds the ETag and body of GET responses, revalidated with If-None-Match,
+    and the columns of historical series, refreshed with since= requests for
+    the newest bars only. Clients live for a single request or task, so the
+    cache is shared by all of them in the process.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or int(os.getenv("DATA_CLIENT_CACHE_SIZE", "256"))
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+
+    def get(self, key: Tuple) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Tuple, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache()
+
+
 class DataServiceClient:
     """Client for interacting with the Data Service API"""
     
-    def __init__(self):
+    def __init__(self, priority: Optional[str] = None):
+        """
+        priority is the Data Service's upstream lane for calls made on behalf of
+        this client: "interactive" (the default), "alerts" or "batch".
+        """
         self.base_url = os.getenv("DATA_SERVICE_URL", "http://data-service:8000")
-        self.client = httpx.AsyncClient(base_url=self.base_url, timeout=30.0)
+        headers = {"X-Upstream-Priority": priority} if priority else None
+        self.client = httpx.AsyncClient(base_url=self.base_url, timeout=30.0, headers=headers)
+    
+    async def get_historical_data(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                                  fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get historical price data for a ticker, optionally only some fields of each bar"""
+        params = self._historical_params(start_date, end_date, fields)
+            
+        return self._columns_to_rows(await self._get_json(f"/stocks/{ticker}/historical", params))
     
-    async def get_historical_data(self, ticker: str, start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict[str, Any]]:
-        """Get historical price data for a ticker"""
-        params = {}
+    async def get_financial_data(self, ticker: str) -> Dict[str, Any]:
+        """Get fundamental financial data for a ticker"""
+        return await self._get_json(f"/stocks/{ticker}/financials")
+
+    async def _get_json(self, path: str, params: Optional[Dict[str, str]] = None) -> Any:
+        """GET revalidated against the cached copy; a 304 reuses the cached body"""
+        key = ("get", path, tuple(sorted((params or {}).items())))
+        cached = response_cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+
+        response = await self.client.get(path, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            return copy.deepcopy(cached[1])
+        response.raise_for_status()
+        body = response.json()
+        etag = response.headers.get("etag")
+        if etag:
+            response_cache.put(key, (etag, copy.deepcopy(body)))
+        return body
+    
+    async def get_historical_data_batch(self, tickers: List[str], start_date: Optional[date] = None, end_date: Optional[date] = None,
+                                        fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Get historical price data for several tickers: {"data": {...}, "errors": {...}}"""
+        params = self._historical_params(start_date, end_date, fields)
+
+        data, errors = await self._historical_columns_batch(tickers, params)
+        return {"data": {ticker: self._columns_to_rows(columns) for ticker, columns in data.items()}, "errors": errors}
+
+    async def _historical_columns_batch(self, tickers: List[str], params: Dict[str, str]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Columnar batch where series already cached are only topped up.
+
+        Tickers seen before with the same window are requested with since= so
+        only the newest bars come back. The cursor is the date before each
+        cached series' last bar, because that bar may have been stored while
+        its session was still open. Only daily series with an explicit start
+        date and a date field are cached, as the others cannot be appended to.
+        """
+        cacheable = (
+            "start_date" in params and params.get("interval", "1d") == "1d"
+            and "date" in params.get("fields", "date").split(",")
+        )
+        keys = {ticker: ("historical", ticker, tuple(sorted(params.items()))) for ticker in tickers}
+        cached = {ticker: response_cache.get(keys[ticker]) for ticker in tickers} if cacheable else {}
+        cached = {ticker: columns for ticker, columns in cached.items() if columns and len(columns["date"]) >= 2}
+
+        data: Dict[str, Any] = {}
+        errors: Dict[str, Any] = {}
+        fresh = [ticker for ticker in tickers if ticker not in cached]
+        if fresh:
+            result = await self._post_historical(fresh, params)
+            data.update(result["data"])
+            errors.update(result["errors"])
+        if cached:
+            since = min(columns["date"][-2] for columns in cached.values())[:10]
+            result = await self._post_historical(list(cached), {**params, "since": since})
+            errors.update(result["errors"])
+            for ticker, newer in result["data"].items():
+                older = cached[ticker]
+                keep = bisect_right(older["date"], since)
+                data[ticker] = {field: older[field][:keep] + newer[field] for field in older}
+
+        if cacheable:
+            for ticker, columns in data.items():
+                response_cache.put(keys[ticker], columns)
+        return data, errors
+
+    async def _post_historical(self, tickers: List[str], params: Dict[str, str]) -> Dict[str, Any]:
+        response = await self.client.post("/stocks/batch/historical", json=tickers, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def _historical_params(self, start_date: Optional[date], end_date: Optional[date], fields: Optional[List[str]]) -> Dict[str, str]:
+        # Columnar responses are several times smaller than a list of bars
+        params = {"format": "columnar"}
         if start_date:
             params["start_date"] = start_date.isoformat()
         if end_date:
             params["end_date"] = end_date.isoformat()
-            
-        response = await self.client.get(f"/stocks/{ticker}/historical", params=params)
+        if fields:
+            params["fields"] = ",".join(fields)
+        return params
+
+    def _columns_to_rows(self, columns: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+        """Turn a columnar response back into the list of bars callers work with"""
+        names = list(columns)
+        return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+    async def get_financial_data_batch(self, tickers: List[str]) -> Dict[str, Any]:
+        """Get fundamental financial data for several tickers: {"data": {...}, "errors": {...}}"""
+        response = await self.client.post("/stocks/batch/financials", json=tickers)
         response.raise_for_status()
         return response.json()
-    
-    async def get_financial_data(self, ticker: str) -> Dict[str, Any]:
-        """Get fundamental financial data for a ticker"""
-        response = await self.client.get(f"/stocks/{ticker}/financials")
+
+    async def get_derived_metrics(self, ticker: str) -> Dict[str, Any]:
+        """Get the latest derived price metrics (volatility, 52-week range, drawdown, momentum) for a ticker; empty without price history"""
+        try:
+            return await self._get_json(f"/stocks/{ticker}/derived")
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return {}
+            raise
+
+    async def get_derived_metrics_batch(self, tickers: List[str]) -> Dict[str, Any]:
+        """Get the latest derived price metrics for several tickers: {"data": {...}, "errors": {...}}"""
+        response = await self.client.post("/stocks/batch/derived", json=tickers)
         response.raise_for_status()
         return response.json()
-    
+
     async def get_peer_companies(self, industry: str) -> List[Dict[str, Any]]:
         """Get peer companies for a given industry"""
-        response = await self.client.get(f"/industry/{industry}/peers")
-        response.raise_for_status()
-        return response.json()
+        return await self._get_json(f"/industry/{industry}/peers")
     
     async def close(self):
         """Close the HTTP client"""
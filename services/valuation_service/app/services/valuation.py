@@ -1,42 +1,50 @@
 from typing import Dict, Any, List, Optional
 import pandas as pd
-import numpy as np
-from datetime import date, datetime, timedelta
 
 from app.services.data_client import DataServiceClient
 
 class ValuationService:
     """Service for calculating valuation scores"""
     
-    def __init__(self):
-        self.data_client = DataServiceClient()
+    def __init__(self, priority: Optional[str] = None):
+        self.data_client = DataServiceClient(priority)
+        # Peer lists by industry, shared by all scores calculated by this instance
+        self._peer_data: Dict[str, List[Dict[str, Any]]] = {}
     
     async def close(self):
         await self.data_client.close()
     
-    async def calculate_score(self, ticker: str, rule_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate a valuation score based on the given rule configuration"""
+    async def calculate_score(self, ticker: str, rule_config: Dict[str, Any],
+                              financial_data: Optional[Dict[str, Any]] = None,
+                              derived_metrics: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Calculate a valuation score based on the given rule configuration.
+
+        Financial data and derived price metrics that were already fetched (e.g. by a
+        batch call) can be passed in; anything missing is fetched from the data service.
+        """
         # Get financial data
-        financial_data = await self.data_client.get_financial_data(ticker)
+        if financial_data is None:
+            financial_data = await self.data_client.get_financial_data(ticker)
         
-        # Get historical data if needed
-        historical_data = None
-        if any(metric.startswith('historical_') for metric in rule_config.get('metrics', {})):
-            start_date = (datetime.now() - timedelta(days=365)).date()
-            historical_data = await self.data_client.get_historical_data(ticker, start_date)
+        # Historical metrics read the data service's precomputed metrics instead of a price series
+        if derived_metrics is None and self._needs_historical_data(rule_config):
+            derived_metrics = await self.data_client.get_derived_metrics(ticker)
         
         # Get peer data if needed
         peer_data = None
         if any(metric.startswith('peer_') for metric in rule_config.get('metrics', {})):
             industry = financial_data.get('industry')
             if industry:
-                peer_data = await self.data_client.get_peer_companies(industry)
+                if industry not in self._peer_data:
+                    self._peer_data[industry] = await self.data_client.get_peer_companies(industry)
+                peer_data = self._peer_data[industry]
         
         # Calculate individual scores
         score_components = {}
         for metric_name, metric_config in rule_config.get('metrics', {}).items():
             score_components[metric_name] = self._calculate_metric_score(
-                ticker, metric_name, metric_config, financial_data, historical_data, peer_data
+                ticker, metric_name, metric_config, financial_data, derived_metrics, peer_data
             )
         
         # Calculate overall score using weightings
@@ -53,9 +61,12 @@ class ValuationService:
             'score_components': score_components
         }
     
+    def _needs_historical_data(self, rule_config: Dict[str, Any]) -> bool:
+        return any(metric.startswith('historical_') for metric in rule_config.get('metrics', {}))
+    
     def _calculate_metric_score(self, ticker: str, metric_name: str, metric_config: Dict[str, Any], 
                                financial_data: Dict[str, Any], 
-                               historical_data: Optional[List[Dict[str, Any]]] = None,
+                               derived_metrics: Optional[Dict[str, Any]] = None,
                                peer_data: Optional[List[Dict[str, Any]]] = None) -> float:
         """Calculate the score for a single metric"""
         # Basic financial metrics
@@ -73,8 +84,8 @@ class ValuationService:
             return self._score_roe(financial_data.get('roe'), metric_config)
         
         # Historical metrics
-        elif metric_name == 'historical_volatility' and historical_data:
-            return self._score_historical_volatility(historical_data, metric_config)
+        elif metric_name == 'historical_volatility' and derived_metrics:
+            return self._score_historical_volatility(derived_metrics, metric_config)
         
         # Peer comparison metrics
         elif metric_name == 'peer_pe_ratio' and peer_data:
@@ -246,17 +257,16 @@ class ValuationService:
             bonus = extra * 0.5  # Diminishing returns for very high ROE
             return min(100, 100 + bonus)
     
-    def _score_historical_volatility(self, historical_data: List[Dict[str, Any]], config: Dict[str, Any]) -> float:
+    def _score_historical_volatility(self, derived_metrics: Dict[str, Any], config: Dict[str, Any]) -> float:
         """Score volatility - lower is generally better"""
-        if not historical_data or len(historical_data) < 20:
+        # Annualized volatility of daily log returns over the longest filled window (one year, 60 or 20 sessions)
+        volatility = next(
+            (derived_metrics[field] for field in ('volatility_252', 'volatility_60', 'volatility_20') if derived_metrics.get(field) is not None),
+            None
+        )
+        if volatility is None:
             return config.get('default_score', 50.0)
-        
-        # Calculate daily returns
-        closes = [item['close'] for item in historical_data]
-        daily_returns = [(closes[i] / closes[i-1] - 1) for i in range(1, len(closes))]
-        
-        # Calculate annualized volatility (standard deviation of returns * sqrt(252))
-        volatility = np.std(daily_returns) * np.sqrt(252) * 100  # as percentage
+        volatility *= 100  # as percentage
         
         ideal_range = config.get('ideal_range', [10.0, 25.0])
         max_volatility = config.get('max_volatility', 50.0)
@@ -304,10 +314,27 @@ class ValuationService:
 
     async def calculate_scores_batch(self, tickers: List[str], rule_config: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Calculate valuation scores for multiple tickers"""
+        if not tickers:
+            return []
+        
+        # Two data service calls for the whole batch instead of two per ticker
+        financials = await self.data_client.get_financial_data_batch(tickers)
+        derived = {"data": {}, "errors": {}}
+        if self._needs_historical_data(rule_config):
+            derived = await self.data_client.get_derived_metrics_batch(tickers)
+        
         results = []
         for ticker in tickers:
             try:
-                score_data = await self.calculate_score(ticker, rule_config)
+                key = ticker.upper()
+                if key in financials["errors"]:
+                    raise ValueError(financials["errors"][key])
+                
+                score_data = await self.calculate_score(
+                    ticker, rule_config,
+                    financial_data=financials["data"].get(key),
+                    derived_metrics=derived["data"].get(key, {})
+                )
                 results.append(score_data)
             except Exception as e:
                 # Log the error and continue with next ticker